@@ -0,0 +1,165 @@
+"""
+FlowState Caching Utilities
+Bounded in-process caches used by the API server
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by item count and total weight
+
+    The weigher estimates the cost of a value (for example bytes held by a
+    hydrated engine). Values are re-weighed whenever they are touched, so
+    objects that grow while cached are still accounted for.
+    """
+
+    def __init__(self, max_entries: int, max_weight: Optional[int] = None,
+                 weigher: Optional[Callable[[Any], int]] = None):
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self.weigher = weigher or (lambda value: 1)
+
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._weights: Dict[Hashable, int] = {}
+        self._total_weight = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, valid: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        """
+        Get a cached value and mark it as recently used
+
+        A value for which valid(value) is false is not returned and counts as a miss.
+        """
+        with self._lock:
+            if key not in self._data or (valid is not None and not valid(self._data[key])):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._data.move_to_end(key)
+            self._reweigh(key)
+            value = self._data[key]
+            self._evict()
+            return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value without touching recency or counters"""
+        return self._data.get(key)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Insert or replace a value, evicting least recently used items if needed"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._reweigh(key)
+            self._evict()
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove a value without counting it as an eviction"""
+        with self._lock:
+            self._total_weight -= self._weights.pop(key, 0)
+            return self._data.pop(key, None)
+
+    def keys(self) -> List[Hashable]:
+        """Snapshot of the cached keys, least recently used first"""
+        with self._lock:
+            return list(self._data)
+
+    def values(self) -> List[Any]:
+        """Snapshot of the cached values, least recently used first"""
+        with self._lock:
+            return list(self._data.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self._total_weight = 0
+
+    def _reweigh(self, key: Hashable) -> None:
+        weight = self.weigher(self._data[key])
+        self._total_weight += weight - self._weights.get(key, 0)
+        self._weights[key] = weight
+
+    def _evict(self) -> None:
+        # Always keep the most recently used item, even if it alone exceeds max_weight
+        while len(self._data) > 1 and (
+            len(self._data) > self.max_entries or
+            (self.max_weight is not None and self._total_weight > self.max_weight)
+        ):
+            key, _ = self._data.popitem(last=False)
+            self._total_weight -= self._weights.pop(key, 0)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for sizing the cache"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "weight": self._total_weight,
+            "max_weight": self.max_weight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None
+        }
+
+
+class VersionedResultCache:
+    """
+    Memoizes per-user computations against the user's data version
+
+    Results are keyed by (user_id, endpoint, params) and remember the data
+    version they were computed from. A lookup with a newer version recomputes
+    and replaces the entry, so stale results never pile up; the underlying
+    LRU bounds the total number of stored results.
+    """
+
+    def __init__(self, max_entries: int):
+        self._cache = LRUCache(max_entries=max_entries)
+
+    def get(self, user_id: str, endpoint: str, params: tuple, version: Any) -> Optional[Any]:
+        """Cached result computed from this version, or None"""
+        # A result from another version has to be recomputed, so it is a miss
+        cached = self._cache.get((user_id, endpoint, params), lambda cached: cached[0] == version)
+        return None if cached is None else cached[1]
+
+    def put(self, user_id: str, endpoint: str, params: tuple, version: Any, result: Any) -> None:
+        self._cache.put((user_id, endpoint, params), (version, result))
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop every cached result of a user"""
+        for key in self._cache.keys():
+            if key[0] == user_id:
+                self._cache.pop(key)
+
+    def compact(self, keep: Callable[[str, str, tuple, Any], bool]) -> int:
+        """Drop results for which keep(user_id, endpoint, params, version) is false"""
+        removed = 0
+        for key in self._cache.keys():
+            cached = self._cache.peek(key)
+            if cached is not None and not keep(*key, cached[0]):
+                self._cache.pop(key)
+                removed += 1
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
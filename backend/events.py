@@ -0,0 +1,74 @@
+"""
+FlowState Session Events
+Fan-out of session changes to server-sent event streams
+"""
+
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+
+class SessionEventBroker:
+    """
+    Per-user publish/subscribe hub for session change events
+
+    Each open stream owns a bounded asyncio.Queue. A subscriber that falls
+    too far behind has its backlog replaced by a single "resync" event, so a
+    stalled tab can never make the server buffer without limit.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        """Open a queue receiving the user's session events"""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def has_subscribers(self, user_id: str) -> bool:
+        return user_id in self._subscribers
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, user_id: str, event: Dict[str, Any]) -> None:
+        """Deliver an event to every stream of the user; safe to call from any thread"""
+        if user_id not in self._subscribers or self._loop is None:
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            self._deliver(user_id, event)
+        else:
+            self._loop.call_soon_threadsafe(self._deliver, user_id, event)
+
+    def _deliver(self, user_id: str, event: Dict[str, Any]) -> None:
+        for queue in list(self._subscribers.get(user_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync"})
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,215 @@
+"""
+FlowState Metrics
+Minimal Prometheus instrumentation: counters, histograms, callback gauges
+and an ASGI middleware timing every request by route template
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; dense below 100 ms where API handlers should land
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: LabelValues = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+                for labels, value in items]
+
+
+class Histogram:
+    """Cumulative bucket histogram keyed by label values"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, labels: LabelValues = ()) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, labels)
+
+    def count(self, labels: LabelValues = ()) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, ([*counts], total, count))
+                           for labels, (counts, total, count) in self._series.items())
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class CallbackGauge:
+    """
+    Gauge (or counter) read from a callback at scrape time
+
+    The callback returns a single number, or a mapping of label values to
+    numbers for labelled series. Use kind="counter" for values that only grow.
+    """
+
+    def __init__(self, name: str, help_text: str,
+                 callback: Callable[[], Union[float, Dict[LabelValues, float]]],
+                 label_names: Sequence[str] = (), kind: str = "gauge"):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+        self.label_names = tuple(label_names)
+        self.kind = kind
+
+    def samples(self) -> List[str]:
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+                for labels, value in sorted(values.items()) if value is not None]
+
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered in Prometheus text format 0.0.4"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4"
+
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, label_names, buckets))
+
+    def gauge(self, name: str, help_text: str, callback: Callable, label_names: Sequence[str] = (),
+              kind: str = "gauge") -> CallbackGauge:
+        return self.register(CallbackGauge(name, help_text, callback, label_names, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and status per route template
+
+    Routes are labelled by their template (e.g. /api/users/{user_id}/tags)
+    rather than the raw path, so user ids never create new series.
+    """
+
+    def __init__(self, app, latency: Histogram, requests: Counter, errors: Counter):
+        self.app = app
+        self.latency = latency
+        self.requests = requests
+        self.errors = errors
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            labels = (scope["method"], route_template(scope))
+            self.latency.observe(time.perf_counter() - started, labels)
+            self.requests.inc(labels + (str(status),))
+            if status >= 500:
+                self.errors.inc(labels)
+
+
+def route_template(scope) -> str:
+    """Path template of the matched route, mount path for mounted apps"""
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "unmatched")
+    return scope.get("root_path") or "unmatched"
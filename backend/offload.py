@@ -0,0 +1,92 @@
+"""
+FlowState Analytics Offloading
+Runs CPU-heavy analytics off the asyncio event loop
+"""
+
+import asyncio
+import contextvars
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class AnalyticsSaturated(Exception):
+    """Raised instead of queueing when the analytics backlog is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Analytics queue is full; retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AnalyticsExecutor:
+    """
+    Bounded thread pool for analytics with per-user serialization
+
+    Jobs of the same user run one at a time, in arrival order, so a user
+    hammering refresh cannot occupy every worker; jobs of different users
+    run in parallel up to max_workers. At most max_pending jobs are admitted
+    (waiting or running); beyond that run() raises AnalyticsSaturated so the
+    caller can shed load instead of building an unbounded backlog.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, retry_after: int = 2):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analytics")
+        self._user_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def user_lock(self, user_id: str) -> asyncio.Lock:
+        """
+        Lock held by the user's job while it runs on the pool
+
+        Jobs read shared state from another thread, so code on the event
+        loop that changes what they read must hold this lock as well.
+        """
+        # Locks disappear with their last waiter, so idle users cost nothing
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._user_locks[user_id] = lock
+        return lock
+
+    @property
+    def saturated(self) -> bool:
+        return self.pending >= self.max_pending
+
+    async def run(self, user_id: str, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) on the pool after the user's earlier jobs finish"""
+        if self.saturated:
+            self.rejected += 1
+            raise AnalyticsSaturated(self.retry_after)
+        self.pending += 1
+        try:
+            async with self.user_lock(user_id):
+                self.running += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    # Like asyncio.to_thread, the job sees the caller's context variables
+                    context = contextvars.copy_context()
+                    return await loop.run_in_executor(self._executor, context.run, func, *args)
+                finally:
+                    self.running -= 1
+                    self.completed += 1
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,218 @@
+"""
+FlowState Request Profiling
+Opt-in cProfile capture of single requests for production debugging
+
+An administrator adds `X-FlowState-Profile: 1` and the admin token header
+to a request; that request runs under cProfile and its statistics are kept
+in memory for download, as pstats text or as a .prof file (the format
+written by `python -m cProfile -o`, readable by snakeviz, gprof2dot and
+flameprof). The middleware is only installed when an admin token is
+configured, so with profiling disabled requests do not pass through it.
+"""
+
+import contextvars
+import cProfile
+import hmac
+import io
+import marshal
+import pstats
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from caching import LRUCache
+from rate_limit import TokenBucket, parse_rate
+
+PROFILE_HEADER = b"x-flowstate-profile"
+ADMIN_TOKEN_HEADER = b"x-flowstate-admin-token"
+PROFILE_ID_HEADER = b"x-flowstate-profile-id"
+
+# The profile of the request being handled, visible to analytics worker
+# threads through the context the executor copies into them
+_active_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "flowstate_request_profile", default=None
+)
+
+
+@dataclass
+class RequestProfile:
+    """cProfile statistics of one request"""
+    profile_id: str
+    method: str
+    path: str
+    started_at: str
+    status: int = 0
+    duration_ms: float = 0.0
+    stats: Optional[pstats.Stats] = field(default=None, repr=False)
+    _thread_profiles: List[cProfile.Profile] = field(default_factory=list, repr=False)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "profile_id": self.profile_id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "status": self.status,
+            "duration_ms": round(self.duration_ms, 3),
+            "total_calls": self.stats.total_calls if self.stats else 0
+        }
+
+    def text(self, sort: str = "cumulative", limit: int = 60) -> str:
+        """Human-readable pstats table of the top functions"""
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.add(self.stats)
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def dump(self) -> bytes:
+        """Raw statistics in the .prof format"""
+        return marshal.dumps(self.stats.stats)
+
+
+@contextmanager
+def profile_thread() -> Iterator[None]:
+    """Profile this worker thread too when it works for a profiled request"""
+    capture = _active_profile.get()
+    if capture is None:
+        yield
+        return
+
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Interpreters with a process-wide profiler already capture this thread
+        yield
+        return
+    try:
+        yield
+    finally:
+        profile.disable()
+        capture._thread_profiles.append(profile)
+
+
+class RequestProfiler:
+    """
+    Admission and storage of request profiles
+
+    Profiling is expensive and cProfile cannot nest, so one request is
+    profiled at a time and at most `rate` (e.g. "10 per hour") are admitted;
+    other requests asking for a profile are served normally without one.
+    The newest `max_profiles` results are kept.
+    """
+
+    def __init__(self, rate: str = "10 per hour", max_profiles: int = 20):
+        count, period = parse_rate(rate)
+        self._bucket = TokenBucket(count, count / period, time.monotonic())
+        self._busy = threading.Lock()
+        self._profiles = LRUCache(max_entries=max_profiles)
+        self.captured = 0
+        self.refused = 0
+
+    def begin(self, method: str, path: str) -> Optional[RequestProfile]:
+        """Admit a profile, or None when busy or over the rate"""
+        if not self._busy.acquire(blocking=False):
+            self.refused += 1
+            return None
+        if self._bucket.take(time.monotonic()):
+            self._busy.release()
+            self.refused += 1
+            return None
+        return RequestProfile(
+            profile_id=uuid.uuid4().hex[:16],
+            method=method,
+            path=path,
+            started_at=datetime.now().isoformat()
+        )
+
+    def finish(self, capture: RequestProfile, profile: cProfile.Profile, status: int,
+               duration: float) -> None:
+        try:
+            stats = pstats.Stats(profile)
+            for thread_profile in capture._thread_profiles:
+                stats.add(thread_profile)
+            capture._thread_profiles.clear()
+            capture.stats = stats
+            capture.status = status
+            capture.duration_ms = duration * 1000
+            self._profiles.put(capture.profile_id, capture)
+            self.captured += 1
+        finally:
+            self._busy.release()
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return self._profiles.peek(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Stored profiles, newest first"""
+        return [capture.summary() for capture in reversed(list(self._profiles.values()))]
+
+    def stats(self) -> Dict[str, int]:
+        return {"stored": len(self._profiles), "captured": self.captured, "refused": self.refused}
+
+
+def token_matches(supplied: Optional[str], token: str) -> bool:
+    """Constant-time comparison against the configured admin token"""
+    return bool(token) and supplied is not None and hmac.compare_digest(
+        supplied.encode("utf-8"), token.encode("utf-8")
+    )
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware running admin-flagged requests under cProfile
+
+    The event loop thread is profiled for the whole request, so coroutines
+    of other requests interleaved with it show up as well; analytics run in
+    worker threads are added through profile_thread().
+    """
+
+    def __init__(self, app, profiler: RequestProfiler, token: str):
+        self.app = app
+        self.profiler = profiler
+        self.token = token
+
+    def _requested(self, scope) -> bool:
+        flag = supplied = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                flag = value
+            elif name == ADMIN_TOKEN_HEADER:
+                supplied = value.decode("latin-1")
+        return flag == b"1" and token_matches(supplied, self.token)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        capture = self.profiler.begin(scope["method"], scope["path"])
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                value = capture.profile_id.encode("ascii") if capture else b"refused"
+                message["headers"] = [*message.get("headers", []), (PROFILE_ID_HEADER, value)]
+            await send(message)
+
+        if capture is None:
+            await self.app(scope, receive, send_wrapper)
+            return
+
+        profile = cProfile.Profile()
+        context_token = _active_profile.set(capture)
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.disable()
+            _active_profile.reset(context_token)
+            self.profiler.finish(capture, profile, status, time.perf_counter() - started)
@@ -0,0 +1,158 @@
+"""
+FlowState Rate Limiting
+Token buckets per client, with tighter per-route budgets where configured
+"""
+
+import ipaddress
+import re
+import threading
+import time
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+from caching import LRUCache
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+RATE_PATTERN = re.compile(r"^\s*(\d+)\s*(?:per|/)\s*(second|minute|hour|day)s?\s*$")
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Parse "1000 per hour" (or "1000/hour") into (requests, seconds)"""
+    match = RATE_PATTERN.match(rate.lower())
+    if not match:
+        raise ValueError(f"Invalid rate limit: {rate!r}")
+    return int(match.group(1)), PERIODS[match.group(2)]
+
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_networks(spec: str) -> List[Network]:
+    """Parse "10.0.0.0/8, 127.0.0.1" into networks; single addresses are /32 or /128"""
+    networks = []
+    for part in spec.split(","):
+        part = part.strip()
+        if part:
+            try:
+                networks.append(ipaddress.ip_network(part, strict=False))
+            except ValueError:
+                raise ValueError(f"Invalid trusted proxy address: {part!r}")
+    return networks
+
+
+def _trusted(address: str, proxies: Iterable[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+
+def client_address(peer: str, forwarded_for: Optional[str], proxies: Iterable[Network]) -> str:
+    """
+    The address of the client behind any trusted proxies
+
+    X-Forwarded-For is only believed as far as it was written by trusted
+    proxies: starting at the connecting peer, each hop that is a trusted
+    proxy hands over to the address it appended, and the first hop that is
+    not trusted is the client. Anything further left was supplied by the
+    client and is ignored.
+    """
+    proxies = list(proxies)
+    address = peer
+    if not forwarded_for or not _trusted(peer, proxies):
+        return address
+    for hop in reversed(forwarded_for.split(",")):
+        hop = hop.strip()
+        try:
+            ipaddress.ip_address(hop)
+        except ValueError:
+            break
+        address = hop
+        if not _trusted(hop, proxies):
+            break
+    return address
+
+
+class TokenBucket:
+    """Holds up to `capacity` tokens, refilled continuously at `rate` per second"""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+
+    def wait(self, now: float) -> float:
+        """Refill up to now; returns 0 if a token is available, else seconds until one is"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> float:
+        """Consume one token; returns 0 on success, else seconds until one is available"""
+        wait = self.wait(now)
+        if not wait:
+            self.tokens -= 1
+        return wait
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter with one budget per client
+
+    A rate of "N per period" allows bursts of N and a sustained N per period.
+    Every request of a client draws on one bucket at the default rate, so
+    the default is the client's total budget whichever routes it calls.
+    Routes with an explicit rate also draw on a bucket of their own, and a
+    request goes through only if both have a token. Buckets live in a
+    bounded LRU; an evicted bucket simply starts full.
+    """
+
+    def __init__(self, default_rate: str, route_rates: Optional[Dict[str, str]] = None,
+                 max_buckets: int = 100000):
+        self.default_rate = parse_rate(default_rate)
+        self.route_rates = {route: parse_rate(rate) for route, rate in (route_rates or {}).items()}
+        self._buckets = LRUCache(max_entries=max_buckets)
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _bucket(self, key: Tuple[Hashable, Optional[str]], rate: Tuple[int, int], now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            count, period = rate
+            bucket = TokenBucket(count, count / period, now)
+            self._buckets.put(key, bucket)
+        return bucket
+
+    def acquire(self, client: Hashable, route: str, now: Optional[float] = None) -> float:
+        """Take a token from the client's budget and the route's own; returns seconds to wait if refused"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            buckets = [self._bucket((client, None), self.default_rate, now)]
+            if route in self.route_rates:
+                buckets.append(self._bucket((client, route), self.route_rates[route], now))
+            # Charge nothing unless every bucket can pay
+            wait = max(bucket.wait(now) for bucket in buckets)
+            if wait:
+                self.rejected += 1
+                return wait
+            for bucket in buckets:
+                bucket.take(now)
+            return 0.0
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """Drop buckets that have refilled completely; they would be recreated full anyway"""
+        now = time.monotonic() if now is None else now
+        removed = 0
+        with self._lock:
+            for key in self._buckets.keys():
+                bucket = self._buckets.peek(key)
+                if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.capacity:
+                    self._buckets.pop(key)
+                    removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        return {"buckets": len(self._buckets), "rejected": self.rejected}
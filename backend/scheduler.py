@@ -0,0 +1,137 @@
+"""
+FlowState Scheduler
+Periodic background jobs run as asyncio tasks inside the API process
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """A named job run every `interval` seconds or daily at a local `hour`"""
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: Optional[float] = None,
+                 hour: Optional[int] = None, exclusive: bool = False):
+        if (interval is None) == (hour is None):
+            raise ValueError("A job needs either an interval or an hour")
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.hour = hour
+        self.exclusive = exclusive
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_run: Optional[str] = None
+        self.last_duration = 0.0
+        self.last_result: Any = None
+
+    @property
+    def lease_seconds(self) -> float:
+        # Outlives the gap between runs, so the holder keeps the lease while alive
+        return 1.5 * (self.interval if self.interval is not None else 86400)
+
+    def next_delay(self, now: datetime) -> float:
+        """Seconds from now until the next run"""
+        if self.interval is not None:
+            return self.interval
+        target = now.replace(hour=self.hour, minute=0, second=0, microsecond=0)
+        if target <= now:
+            target += timedelta(days=1)
+        return (target - now).total_seconds()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "schedule": f"every {self.interval:g}s" if self.interval is not None else f"daily at {self.hour:02d}:00",
+            "exclusive": self.exclusive,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_run": self.last_run,
+            "last_duration_ms": round(self.last_duration * 1000, 3)
+        }
+
+
+class Scheduler:
+    """
+    Runs jobs on their schedules until stopped
+
+    Coroutine functions run on the event loop, so they may touch the same
+    objects as request handlers; plain functions run in a thread so they
+    cannot stall requests. An exclusive job first takes a lease through
+    lease(name, seconds) and is skipped when another worker process holds
+    it, so with several workers it runs once. A failing job is logged and
+    tried again at its next slot.
+    """
+
+    def __init__(self, lease: Optional[Callable[[str, float], bool]] = None):
+        self.lease = lease
+        self.jobs: Dict[str, Job] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def every(self, seconds: float, name: str, func: Callable[[], Any], exclusive: bool = False) -> Job:
+        return self._add(Job(name, func, interval=seconds, exclusive=exclusive))
+
+    def daily(self, hour: int, name: str, func: Callable[[], Any], exclusive: bool = False) -> Job:
+        return self._add(Job(name, func, hour=hour, exclusive=exclusive))
+
+    def _add(self, job: Job) -> Job:
+        self.jobs[job.name] = job
+        return job
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Schedule every job on the running event loop"""
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._run_forever(job), name=f"scheduler:{job.name}")
+                       for job in self.jobs.values()]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_forever(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(job.next_delay(datetime.now()))
+            await self.run_job(job.name)
+
+    async def run_job(self, name: str) -> Any:
+        """Run a job now; returns its result, or None when skipped or failed"""
+        job = self.jobs[name]
+        if job.exclusive and self.lease is not None:
+            if not await asyncio.to_thread(self.lease, job.name, job.lease_seconds):
+                job.skipped += 1
+                return None
+
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(job.func):
+                result = await job.func()
+            else:
+                result = await asyncio.to_thread(job.func)
+        except Exception:
+            job.failures += 1
+            logger.exception("Scheduled job %s failed", job.name)
+            return None
+        finally:
+            job.last_duration = time.perf_counter() - started
+            job.last_run = datetime.now().isoformat()
+
+        job.runs += 1
+        job.last_result = result
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"running": self.running, "jobs": {name: job.stats() for name, job in self.jobs.items()}}
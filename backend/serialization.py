@@ -0,0 +1,125 @@
+"""
+FlowState Serialization
+Fast JSON encoding for API responses and time entries
+
+orjson is used when installed; otherwise everything falls back to the
+standard json module, which produces the same bytes: dataclasses go
+through _default on both paths, and NaN and infinities become null as
+orjson writes them.
+"""
+
+import json
+import math
+from dataclasses import asdict, is_dataclass
+from datetime import date, datetime
+from enum import Enum
+from json.encoder import encode_basestring_ascii as _quote
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from enhanced_time_tracker import SessionTag, TimeEntry
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Types json/orjson do not handle natively, mirroring jsonable_encoder"""
+    if isinstance(obj, TimeEntry):
+        return obj.to_dict()
+    if isinstance(obj, SessionTag):
+        return obj.to_dict()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if is_dataclass(obj):
+        return asdict(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj: Any) -> Any:
+    """obj with NaN and infinities replaced by None, as orjson encodes them"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+def _dumps_json(content: Any) -> bytes:
+    """dumps() with the standard json module"""
+    try:
+        text = json.dumps(
+            content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        )
+    except ValueError:
+        # Rare enough that payloads are only walked for non-finite floats once one is found
+        text = json.dumps(
+            _finite(content), default=lambda obj: _finite(_default(obj)),
+            ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        )
+    return text.encode("utf-8")
+
+
+if orjson is not None:
+    # TimeEntry and other dataclasses go through _default as they do with json
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def dumps(content: Any) -> bytes:
+        """Encode a response payload to JSON bytes"""
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+else:
+    dumps = _dumps_json
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson when available
+
+    Returning one directly from a handler also skips FastAPI's
+    jsonable_encoder pass, which dominates the cost of large payloads.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def encode_tag(tag: SessionTag) -> str:
+    """JSON text equal to json.dumps(tag.to_dict())"""
+    sub_tag = "null" if tag.sub_tag is None else _quote(tag.sub_tag)
+    return f'{{"main_tag": {_quote(tag.main_tag)}, "sub_tag": {sub_tag}}}'
+
+
+def encode_entry(entry: TimeEntry) -> str:
+    """
+    JSON text equal to json.dumps(entry.to_dict())
+
+    Fields are written straight into a fixed template, without building the
+    intermediate dict or walking it generically.
+    """
+    estimated = "null" if entry.estimated_minutes is None else entry.estimated_minutes
+    end_time = f', "end_time": "{entry.end_time.isoformat()}"' if entry.end_time else ""
+    return (
+        f'{{"session_id": {_quote(entry.session_id)}, '
+        f'"start_time": "{entry.start_time.isoformat()}", '
+        f'"tag": {encode_tag(entry.tag)}, '
+        f'"task_description": {_quote(entry.task_description)}, '
+        f'"status": "{entry.status.value}", '
+        f'"confidence": "{entry.confidence.value}", '
+        f'"user_notes": {_quote(entry.user_notes)}, '
+        f'"interruptions": {entry.interruptions}, '
+        f'"energy_level": {entry.energy_level}, '
+        f'"focus_quality": {entry.focus_quality}, '
+        f'"estimated_minutes": {estimated}'
+        f'{end_time}}}'
+    )
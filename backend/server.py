@@ -12,16 +12,33 @@ from datetime import datetime, timedelta
 src_path = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(src_path))
 
-from fastapi import FastAPI, HTTPException, Depends
+# The repository root holds enhanced_time_tracker; sibling backend modules
+# (storage, caching, ...) are imported as top-level modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+backend_path = Path(__file__).parent
+sys.path.insert(0, str(backend_path))
+
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse, Response
 from pydantic import BaseModel
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
+import asyncio
+import base64
+import contextlib
+import functools
+import hashlib
+import math
 import json
+import socket
 import uuid
 
+# Top-level sections of /insights, in response order; fields= selects among them
+INSIGHT_SECTIONS = ("summary", "time_tracking_insights", "tag_insights", "estimation_accuracy",
+                    "ai_insights", "integration_insights", "next_steps", "limitations")
+
 # Import enhanced FlowState modules
 try:
     from enhanced_time_tracker import (
@@ -34,6 +51,7 @@ try:
         def __init__(self, user_id: str = "default_user"):
             self.user_id = user_id
             self.time_tracker = MultiSessionTimeTracker(user_id)
+            self.data_version = 0  # Stored data version this engine reflects
             
         def start_productivity_session(self, main_tag: str, sub_tag: str = None, 
                                      task_description: str = "", estimated_minutes: int = None, 
@@ -108,40 +126,50 @@ try:
         def get_daily_productivity_summary(self, date: Optional[datetime] = None) -> Dict[str, Any]:
             return self.time_tracker.get_daily_summary(date)
         
-        def get_comprehensive_insights(self, timeframe_days: int = 30) -> Dict[str, Any]:
-            tag_analytics = self.time_tracker.get_tag_analytics(timeframe_days)
-            estimation_accuracy = self.time_tracker.get_estimation_accuracy()
+        def get_comprehensive_insights(self, timeframe_days: int = 30,
+                                       sections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+            """Insights by section; sections that are not requested are not computed"""
+            wanted = set(INSIGHT_SECTIONS if sections is None else sections)
             
-            return {
-                "summary": {
+            # Only the per-tag sections need the full breakdown; the others
+            # get by with the totals
+            tag_analytics = None
+            if wanted & {"tag_insights", "ai_insights"}:
+                tag_analytics = self.time_tracker.get_tag_analytics(timeframe_days)
+            totals = tag_analytics
+            if totals is None and wanted & {"time_tracking_insights", "integration_insights"}:
+                totals = self.time_tracker.get_time_totals(timeframe_days)
+            
+            builders = {
+                "summary": lambda: {
                     "timeframe_days": timeframe_days, 
                     "data_sources": ["multi_session_tracking"], 
                     "confidence_levels": {},
                     "user_interpretation_guidance": "Your tags and patterns reflect your unique work style"
                 },
-                "time_tracking_insights": {
+                "time_tracking_insights": lambda: {
                     "active_days": timeframe_days,
-                    "total_tracked_time": tag_analytics.get("total_time_minutes", 0),
-                    "average_daily_time": tag_analytics.get("total_time_minutes", 0) / max(timeframe_days, 1),
-                    "total_sessions": tag_analytics.get("total_entries", 0)
+                    "total_tracked_time": totals.get("total_time_minutes", 0),
+                    "average_daily_time": totals.get("total_time_minutes", 0) / max(timeframe_days, 1),
+                    "total_sessions": totals.get("total_entries", 0)
                 },
-                "tag_insights": tag_analytics,
-                "estimation_accuracy": estimation_accuracy,
-                "ai_insights": [
+                "tag_insights": lambda: tag_analytics,
+                "estimation_accuracy": self.time_tracker.get_estimation_accuracy,
+                "ai_insights": lambda: [
                     {
                         "description": insight,
                         "confidence": "moderate",
                         "limitations": "Based on your self-reported data and tagging patterns"
                     } for insight in tag_analytics.get("insights", [])
                 ],
-                "integration_insights": [
+                "integration_insights": lambda: [
                     {
                         "type": "user_agency",
-                        "description": f"You're using {len(tag_analytics.get('user_tags', []))} different tags to categorize your work",
+                        "description": f"You're using {len(self.time_tracker.user_tags) if totals.get('total_entries') else 0} different tags to categorize your work",
                         "guidance": "This tagging system reflects your understanding of your work patterns"
                     }
                 ],
-                "next_steps": [
+                "next_steps": lambda: [
                     {
                         "title": "Refine Your Tags",
                         "description": "Consider if your current tags accurately reflect your work categories",
@@ -149,12 +177,13 @@ try:
                         "action": "Review and adjust tags that don't feel right to you"
                     }
                 ],
-                "limitations": [
+                "limitations": lambda: [
                     "Analysis is based entirely on your self-reported data",
                     "Tag effectiveness depends on consistent usage",
                     "Individual context and external factors are not captured"
                 ]
             }
+            return {section: builders[section]() for section in INSIGHT_SECTIONS if section in wanted}
         
         def get_patterns(self) -> Dict[str, Any]:
             """Get pattern analysis with honest limitations"""
@@ -200,6 +229,7 @@ try:
             self.total_sessions = 0
             self.ui_complexity_level = 1
             self.current_productivity_mode = "maintenance"
+            self.data_version = 0  # Stored data version this profile reflects
         
         def track_usage(self, session_type: str = "general"):
             self.total_sessions += 1
@@ -222,6 +252,28 @@ try:
                     "total_sessions": self.total_sessions
                 }
             }
+        
+        def to_dict(self) -> Dict[str, Any]:
+            """Convert to dictionary for storage"""
+            return {
+                "user_id": self.user_id,
+                "created_at": self.created_at.isoformat(),
+                "days_active": self.days_active,
+                "total_sessions": self.total_sessions,
+                "ui_complexity_level": self.ui_complexity_level,
+                "current_productivity_mode": self.current_productivity_mode
+            }
+        
+        @classmethod
+        def from_dict(cls, data: Dict[str, Any]) -> 'UserProfile':
+            """Create from dictionary"""
+            profile = cls(data["user_id"])
+            profile.created_at = datetime.fromisoformat(data["created_at"])
+            profile.days_active = data.get("days_active", 0)
+            profile.total_sessions = data.get("total_sessions", 0)
+            profile.ui_complexity_level = data.get("ui_complexity_level", 1)
+            profile.current_productivity_mode = data.get("current_productivity_mode", "maintenance")
+            return profile
 
 except ImportError:
     from core.productivity_engine import ProductivityEngine, ProductivityMode
@@ -432,8 +484,9 @@ except ImportError:
         def get_daily_productivity_summary(self, date: Optional[datetime] = None) -> Dict[str, Any]:
             return self.time_tracker.get_daily_summary(date)
         
-        def get_comprehensive_insights(self, timeframe_days: int = 30) -> Dict[str, Any]:
-            return {
+        def get_comprehensive_insights(self, timeframe_days: int = 30,
+                                       sections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+            insights = {
                 "summary": {"timeframe_days": timeframe_days, "data_sources": ["time_tracking"], "confidence_levels": {}, "user_interpretation_guidance": ""},
                 "time_tracking_insights": {
                     "active_days": min(timeframe_days, len(set(e.start_time.date() for e in self.time_tracker.entries if e.is_complete()))),
@@ -446,6 +499,9 @@ except ImportError:
                 "next_steps": [],
                 "limitations": []
             }
+            if sections is None:
+                return insights
+            return {section: value for section, value in insights.items() if section in sections}
         
         def export_complete_user_data(self) -> Dict[str, Any]:
             return {
@@ -477,10 +533,22 @@ except ImportError:
                 }
             }
 
+from storage import IDEMPOTENCY_PENDING, UserRepository, SQLiteRepository, VersionConflict
+from caching import LRUCache, VersionedResultCache
+from events import SessionEventBroker, format_sse
+from serialization import FastJSONResponse, dumps, encode_entry
+from offload import AnalyticsExecutor, AnalyticsSaturated
+from rate_limit import RateLimiter, client_address, parse_networks
+from metrics import MetricsMiddleware, MetricsRegistry
+from profiling import ProfilingMiddleware, RequestProfiler, profile_thread, token_matches
+from scheduler import Scheduler
+from static_assets import Asset, StaticAssetCache
+
 app = FastAPI(
     title="FlowState API",
     description="Human-Centered Productivity Intelligence API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -492,13 +560,258 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files for frontend
-app.mount("/static", StaticFiles(directory="/app/frontend/build/static"), name="static")
+# The React build is served from memory with precompressed variants; the
+# directory is re-scanned in the background every few seconds so new builds
+# are picked up
+FRONTEND_BUILD_DIR = os.environ.get("FLOWSTATE_FRONTEND_BUILD", "/app/frontend/build")
+STATIC_CHECK_SECONDS = float(os.environ.get("FLOWSTATE_STATIC_CHECK_SECONDS", "2"))
+frontend_assets = StaticAssetCache(FRONTEND_BUILD_DIR, check_interval=STATIC_CHECK_SECONDS)
+
+# Durable storage for users, profiles and time entries
+DATA_DIR = os.environ.get("FLOWSTATE_DATA_DIR", str(Path(__file__).parent / "data"))
+DB_PATH = os.environ.get("FLOWSTATE_DB_PATH", os.path.join(DATA_DIR, "flowstate.db"))
+
+repository: UserRepository = SQLiteRepository(DB_PATH)
+
+# Hydrated engines and profiles are kept in bounded LRU caches. Every change is
+# written through to the repository, so evicted users simply rehydrate from
+# storage on their next request.
+ENGINE_CACHE_SIZE = int(os.environ.get("FLOWSTATE_ENGINE_CACHE_SIZE", "1000"))
+ENGINE_CACHE_MB = int(os.environ.get("FLOWSTATE_ENGINE_CACHE_MB", "256"))
+PROFILE_CACHE_SIZE = int(os.environ.get("FLOWSTATE_PROFILE_CACHE_SIZE", "5000"))
+
+# Rough resident cost of a hydrated engine, used to enforce ENGINE_CACHE_MB
+ENGINE_BASE_BYTES = 4096
+ENTRY_BYTES = 1500
+
+def estimate_engine_bytes(engine: ProductivityEngine) -> int:
+    """Approximate memory held by a hydrated engine"""
+    return ENGINE_BASE_BYTES + ENTRY_BYTES * len(engine.time_tracker.entries)
+
+engine_cache = LRUCache(
+    max_entries=ENGINE_CACHE_SIZE,
+    max_weight=ENGINE_CACHE_MB * 1024 * 1024,
+    weigher=estimate_engine_bytes
+)
+profile_cache = LRUCache(max_entries=PROFILE_CACHE_SIZE)
+
+# Analytics results are memoized per user against the data version, so repeated
+# dashboard loads are answered from memory until a session changes
+RESULT_CACHE_SIZE = int(os.environ.get("FLOWSTATE_RESULT_CACHE_SIZE", "10000"))
+result_cache = VersionedResultCache(max_entries=RESULT_CACHE_SIZE)
+
+# Analytics run on a thread pool so heavy reports never stall session
+# start/end on the event loop; each user's jobs run one at a time
+ANALYTICS_WORKERS = int(os.environ.get("FLOWSTATE_ANALYTICS_WORKERS", str(min(4, os.cpu_count() or 1))))
+ANALYTICS_MAX_PENDING = int(os.environ.get("FLOWSTATE_ANALYTICS_MAX_PENDING", "64"))
+ANALYTICS_RETRY_AFTER = int(os.environ.get("FLOWSTATE_ANALYTICS_RETRY_AFTER", "2"))
+analytics_executor = AnalyticsExecutor(
+    max_workers=ANALYTICS_WORKERS, max_pending=ANALYTICS_MAX_PENDING, retry_after=ANALYTICS_RETRY_AFTER
+)
+
+@app.exception_handler(VersionConflict)
+async def version_conflict_handler(request: Request, exc: VersionConflict):
+    """Another worker changed the user's data mid-request; the client retries"""
+    return JSONResponse(
+        status_code=409,
+        content={"detail": "Your data was changed by another request, please retry"}
+    )
+
+@app.exception_handler(AnalyticsSaturated)
+async def analytics_saturated_handler(request: Request, exc: AnalyticsSaturated):
+    """Shed analytics load instead of queueing without bound"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Analytics are busy, please retry shortly"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+# Token buckets per client address: the default is each client's total
+# budget, and /insights and /patterns also draw on their own, tighter one.
+# Behind a reverse proxy the client address comes from X-Forwarded-For,
+# believed only as far as it was written by the trusted proxies listed in
+# FLOWSTATE_TRUSTED_PROXIES (addresses or CIDR ranges, comma separated).
+# Budgets default to the production config
+try:
+    from config.production import ProductionConfig
+    RATE_LIMIT_CONFIG = {
+        "enabled": ProductionConfig.RATE_LIMITING,
+        "default": ProductionConfig.RATE_LIMIT_DEFAULT,
+        "analytics": ProductionConfig.RATE_LIMIT_ANALYTICS,
+        "trusted_proxies": ProductionConfig.TRUSTED_PROXIES
+    }
+except ImportError:
+    RATE_LIMIT_CONFIG = {"enabled": True, "default": "1000 per hour", "analytics": "120 per hour",
+                         "trusted_proxies": ""}
+
+RATE_LIMITING = os.environ.get(
+    "FLOWSTATE_RATE_LIMITING", "1" if RATE_LIMIT_CONFIG["enabled"] else "0"
+) == "1"
+RATE_LIMIT_DEFAULT = os.environ.get("FLOWSTATE_RATE_LIMIT_DEFAULT", RATE_LIMIT_CONFIG["default"])
+RATE_LIMIT_ANALYTICS = os.environ.get("FLOWSTATE_RATE_LIMIT_ANALYTICS", RATE_LIMIT_CONFIG["analytics"])
+rate_limiter = RateLimiter(RATE_LIMIT_DEFAULT, {
+    "/api/users/{user_id}/insights": RATE_LIMIT_ANALYTICS,
+    "/api/users/{user_id}/patterns": RATE_LIMIT_ANALYTICS
+})
+RATE_LIMIT_EXEMPT = {"/api/health"}
+TRUSTED_PROXIES = parse_networks(
+    os.environ.get("FLOWSTATE_TRUSTED_PROXIES", RATE_LIMIT_CONFIG["trusted_proxies"])
+)
+
+async def enforce_rate_limit(request: Request):
+    """
+    Charge API requests to the calling client's address
+    
+    The user id in the path is chosen by the caller, so charging it would
+    let anyone spend another user's budget and spread their own over
+    made-up ids; the address is what the caller cannot pick. Requests
+    relayed by a trusted proxy are charged to the address it forwarded
+    for, so clients behind one ingress do not share a budget.
+    """
+    route = getattr(request.scope.get("route"), "path", "")
+    if not RATE_LIMITING or not route.startswith("/api/") or route in RATE_LIMIT_EXEMPT:
+        return
+    
+    peer = request.client.host if request.client else "-"
+    client = client_address(peer, request.headers.get("x-forwarded-for"), TRUSTED_PROXIES)
+    wait = rate_limiter.acquire(client, route)
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+
+# Applies to every route registered below
+app.router.dependencies.append(Depends(enforce_rate_limit))
+
+# Prometheus metrics served at /metrics. Values are per process; with several
+# workers each scrape sees the worker that answered it
+metrics = MetricsRegistry()
+request_latency = metrics.histogram(
+    "flowstate_http_request_duration_seconds", "Request latency by route template",
+    ("method", "route")
+)
+request_count = metrics.counter(
+    "flowstate_http_requests_total", "Requests by route template and status",
+    ("method", "route", "status")
+)
+request_errors = metrics.counter(
+    "flowstate_http_errors_total", "Requests that failed with a 5xx status",
+    ("method", "route")
+)
+analytics_seconds = metrics.histogram(
+    "flowstate_analytics_duration_seconds", "Time spent computing analytics (cache misses only)",
+    ("function",)
+)
+metrics.gauge("flowstate_users", "Stored users", repository.count_users)
+metrics.gauge("flowstate_time_entries", "Stored time entries", repository.count_entries)
+metrics.gauge(
+    "flowstate_cached_time_entries", "Time entries held by cached engines",
+    lambda: sum(len(engine.time_tracker.entries) for engine in engine_cache.values())
+)
+metrics.gauge("flowstate_active_sessions", "Active sessions of cached users", lambda: sum(
+    len(engine.time_tracker.active_sessions) for engine in engine_cache.values()
+))
+CACHES = {"engines": engine_cache, "profiles": profile_cache, "results": result_cache}
+for stat, kind, help_text in (
+    ("size", "gauge", "Entries held by each cache"),
+    ("hits", "counter", "Cache hits"),
+    ("misses", "counter", "Cache misses"),
+    ("evictions", "counter", "Entries evicted to respect the cache bounds"),
+    ("hit_rate", "gauge", "Hits divided by lookups since start")
+):
+    metrics.gauge(
+        f"flowstate_cache_{stat}" + ("_total" if kind == "counter" else ""), help_text,
+        lambda stat=stat: {(name,): cache.stats()[stat] for name, cache in CACHES.items()},
+        ("cache",), kind
+    )
+metrics.gauge("flowstate_analytics_pending", "Analytics jobs waiting or running",
+              lambda: analytics_executor.pending)
+metrics.gauge("flowstate_analytics_shed_total", "Analytics requests refused with 429 while saturated",
+              lambda: analytics_executor.rejected, kind="counter")
+metrics.gauge("flowstate_rate_limited_total", "Requests refused by the rate limiter",
+              lambda: rate_limiter.rejected, kind="counter")
+metrics.gauge("flowstate_sse_subscribers", "Open session event streams",
+              lambda: session_events.subscriber_count())
+app.add_middleware(
+    MetricsMiddleware, latency=request_latency, requests=request_count, errors=request_errors
+)
 
-# In-memory storage for demo (in production, use proper database)
-users_db: Dict[str, Dict] = {}
-engines_db: Dict[str, ProductivityEngine] = {}
-profiles_db: Dict[str, UserProfile] = {}
+# Admin-only request profiling: a request carrying X-FlowState-Profile: 1 and
+# the admin token runs under cProfile. Without a token the middleware is not
+# installed and the admin endpoints answer 404
+ADMIN_TOKEN = os.environ.get("FLOWSTATE_ADMIN_TOKEN", "")
+request_profiler = RequestProfiler(
+    rate=os.environ.get("FLOWSTATE_PROFILE_RATE", "10 per hour"),
+    max_profiles=int(os.environ.get("FLOWSTATE_MAX_PROFILES", "20"))
+)
+if ADMIN_TOKEN:
+    app.add_middleware(ProfilingMiddleware, profiler=request_profiler, token=ADMIN_TOKEN)
+
+def require_admin(request: Request):
+    """Admin endpoints need the configured token in X-FlowState-Admin-Token"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token_matches(request.headers.get("x-flowstate-admin-token"), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+def timed(function: str, compute):
+    """Wrap an analytics computation so its duration is recorded"""
+    def run(*args):
+        with analytics_seconds.time((function,)), profile_thread():
+            return compute(*args)
+    return run
+
+# Per-user reads carry an ETag derived from the data version; clients must
+# revalidate, and get an empty 304 while nothing has changed
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+# Upper bound on sessions accepted by one /sessions/batch request
+MAX_BATCH_SESSIONS = int(os.environ.get("FLOWSTATE_MAX_BATCH_SESSIONS", "10000"))
+MAX_BATCH_ERRORS = 100
+
+# Streaming exports read this many entries from storage per chunk
+EXPORT_BATCH_SIZE = int(os.environ.get("FLOWSTATE_EXPORT_BATCH_SIZE", "500"))
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+# Top-level keys of /tags/analytics for fields=; the totals need no per-tag breakdown
+TAG_ANALYTICS_FIELDS = ("timeframe_days", "total_entries", "total_time_minutes",
+                        "main_tag_analysis", "user_tags", "insights", "message")
+TAG_ANALYTICS_TOTALS = {"timeframe_days", "total_entries", "total_time_minutes"}
+
+# Retried session starts and ends carrying the same Idempotency-Key get the
+# recorded response back instead of acting twice. Keys live in the database,
+# so a retry that reaches another worker is recognized as well. A key is
+# claimed before the request runs; a claim left by a crashed worker lapses
+# after IDEMPOTENCY_PENDING_SECONDS. Each user keeps at most MAX_KEYS keys
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("FLOWSTATE_IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_PENDING_SECONDS = int(os.environ.get("FLOWSTATE_IDEMPOTENCY_PENDING_SECONDS", "60"))
+IDEMPOTENCY_MAX_KEYS = int(os.environ.get("FLOWSTATE_IDEMPOTENCY_MAX_KEYS", "1000"))
+
+# Page sizes of the session listing
+SESSION_PAGE_DEFAULT = 50
+SESSION_PAGE_MAX = int(os.environ.get("FLOWSTATE_SESSION_PAGE_MAX", "500"))
+
+# Background jobs: sessions left running for STALE_SESSION_HOURS are closed,
+# dashboard rollups of users active in the last ROLLUP_ACTIVE_DAYS are
+# computed off-peak at ROLLUP_HOUR
+# and in-memory caches are compacted. Jobs that touch shared data hold a
+# lease in the database, so with several workers only one runs them
+SCHEDULER_ENABLED = os.environ.get("FLOWSTATE_SCHEDULER", "1").lower() in ("1", "true", "yes")
+STALE_SESSION_HOURS = float(os.environ.get("FLOWSTATE_STALE_SESSION_HOURS", "12"))
+REAP_INTERVAL_SECONDS = float(os.environ.get("FLOWSTATE_REAP_INTERVAL_SECONDS", "300"))
+ROLLUP_HOUR = int(os.environ.get("FLOWSTATE_ROLLUP_HOUR", "3"))
+ROLLUP_ACTIVE_DAYS = float(os.environ.get("FLOWSTATE_ROLLUP_ACTIVE_DAYS", "1"))
+COMPACT_INTERVAL_SECONDS = float(os.environ.get("FLOWSTATE_COMPACT_INTERVAL_SECONDS", "600"))
+IDEMPOTENCY_PURGE_SECONDS = 3600
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+scheduler = Scheduler(lease=lambda name, seconds: repository.acquire_lease(name, WORKER_ID, seconds))
+
+# Session changes are pushed to open /sessions/stream connections; between
+# changes each stream gets a tick with current durations
+session_events = SessionEventBroker()
+SESSION_STREAM_TICK_SECONDS = float(os.environ.get("FLOWSTATE_STREAM_TICK_SECONDS", "15"))
 
 # Pydantic models for API requests/responses
 class StartSessionRequest(BaseModel):
@@ -525,18 +838,491 @@ class UpdatePreferencesRequest(BaseModel):
     productivity_prefs: Optional[Dict[str, Any]] = None
     privacy_settings: Optional[Dict[str, Any]] = None
 
+class BatchSession(BaseModel):
+    main_tag: str
+    sub_tag: Optional[str] = None
+    task_description: str = ""
+    start_time: datetime
+    end_time: datetime
+    estimated_minutes: Optional[int] = None
+    user_notes: str = ""
+    energy_level: int = 3
+    focus_quality: int = 3
+    interruptions: int = 0
+
+class BatchSessionsRequest(BaseModel):
+    sessions: List[BatchSession]  # Completed sessions, e.g. from another tracker
+
 # Helper functions
+def publish_session_events(engine: ProductivityEngine):
+    """Push the engine's queued session changes to the user's open streams"""
+    events, engine.pending_events = engine.pending_events, []
+    if not events or not session_events.has_subscribers(engine.user_id):
+        return
+    
+    active = engine.get_active_sessions()
+    for event, session_id in events:
+        session_events.publish(engine.user_id, {
+            "type": event,
+            "session": engine.time_tracker.get_session(session_id),
+            "active_sessions": active["active_sessions"],
+            "count": active["count"],
+            "timestamp": datetime.now().isoformat()
+        })
+
+def new_user_engine(user_id: str) -> ProductivityEngine:
+    """
+    Create an engine whose session changes are published to streams
+    
+    Changes are queued as the tracker makes them and published by
+    locked_user_engine once the block that made them has stored them, so
+    streams never announce a change that a VersionConflict threw away.
+    """
+    engine = ProductivityEngine(user_id)
+    engine.pending_events = []
+    engine.time_tracker.add_listener(
+        lambda event, entry: engine.pending_events.append((event, entry.session_id))
+    )
+    return engine
+
+def load_user_engine(user_id: str) -> ProductivityEngine:
+    """Hydrate a productivity engine from stored entries"""
+    engine = new_user_engine(user_id)
+    engine.time_tracker.load_entries(repository.load_entries(user_id))
+    return engine
+
+def refresh_user_engine(engine: ProductivityEngine, user_id: str) -> bool:
+    """Apply entries other workers wrote since the engine's version; False if it must be reloaded"""
+    changes = repository.get_entry_changes(user_id, engine.data_version)
+    return changes is not None and engine.time_tracker.apply_changes(changes)
+
+def load_user_profile(user_id: str) -> UserProfile:
+    """Load a user profile from storage, or start a fresh one"""
+    data = repository.get_profile(user_id)
+    return UserProfile.from_dict(data) if data else UserProfile(user_id)
+
+def get_current(cache: LRUCache, user_id: str, loader, refresher=None):
+    """
+    Get a cached engine or profile, catching up when the user's data changed
+    
+    Several worker processes may share one database. Each cached object
+    remembers the data version it reflects; if another worker has written
+    since, the stored version differs and the object is brought up to date,
+    incrementally through refresher(cached, user_id) when it succeeds and
+    otherwise by loading it again.
+    """
+    version = repository.get_data_version(user_id)
+    cached = cache.get(user_id)
+    if cached is None or cached.data_version != version:
+        # Version is read before catching up, so a concurrent write is caught next time
+        if cached is None or refresher is None or not refresher(cached, user_id):
+            cached = loader(user_id)
+        cached.data_version = version
+        cache.put(user_id, cached)
+    return cached
+
 def get_or_create_user_engine(user_id: str) -> ProductivityEngine:
-    """Get or create productivity engine for user"""
-    if user_id not in engines_db:
-        engines_db[user_id] = ProductivityEngine(user_id)
-    return engines_db[user_id]
+    """Get productivity engine for user, hydrating it from storage if needed"""
+    return get_current(engine_cache, user_id, load_user_engine, refresh_user_engine)
+
+@contextlib.asynccontextmanager
+async def locked_user_engine(user_id: str):
+    """
+    The user's engine, held exclusively for the duration of the block
+    
+    Analytics jobs read the engine on the pool while holding the user's
+    lock, so everything that changes an engine on the event loop, catching
+    up with other workers included, happens inside this block. Session
+    changes are published to streams when the block completes, and dropped
+    when it raises.
+    """
+    async with analytics_executor.user_lock(user_id):
+        engine = get_or_create_user_engine(user_id)
+        try:
+            yield engine
+        except BaseException:
+            # Whatever the block changed was not stored
+            engine.pending_events.clear()
+            raise
+        publish_session_events(engine)
+
+async def current_user_engine(user_id: str) -> ProductivityEngine:
+    """The user's engine, brought up to date without racing a running analytics job"""
+    async with locked_user_engine(user_id) as engine:
+        return engine
 
 def get_or_create_user_profile(user_id: str) -> UserProfile:
-    """Get or create user profile"""
-    if user_id not in profiles_db:
-        profiles_db[user_id] = UserProfile(user_id)
-    return profiles_db[user_id]
+    """Get user profile, loading it from storage if needed"""
+    return get_current(profile_cache, user_id, load_user_profile)
+
+async def cached_analytics(user_id: str, engine: ProductivityEngine, endpoint: str,
+                           params: tuple, compute) -> Dict[str, Any]:
+    """
+    Memoize an analytics computation until the user's data changes
+    
+    Misses are computed on the analytics pool. Timeframe windows end "now",
+    so the current date is part of the key; cached windows therefore move
+    forward at day granularity.
+    """
+    params = params + (datetime.now().date().isoformat(),)
+    version = engine.data_version
+    result = result_cache.get(user_id, endpoint, params, version)
+    if result is None:
+        result = await analytics_executor.run(user_id, compute)
+        result_cache.put(user_id, endpoint, params, version, result)
+    return result
+
+def current_data_version(user_id: str) -> int:
+    """Stored data version of a user; doubles as the existence check"""
+    version = repository.get_data_version(user_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return version
+
+def user_etag(user_id: str, version: int, *variant) -> str:
+    """
+    Weak ETag for a per-user read
+    
+    Every write bumps the data version, so (version, endpoint, params, date)
+    identifies the payload; the date covers responses that default to today.
+    """
+    key = repr((user_id, datetime.now().date().isoformat()) + variant).encode()
+    return f'W/"{version}-{hashlib.blake2s(key, digest_size=8).hexdigest()}"'
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 response when the client already holds this representation"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    candidates = [tag.strip() for tag in header.split(",")]
+    if "*" in candidates or etag in candidates or etag[2:] in candidates:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL})
+    return None
+
+def etag_response(content: Any, etag: str) -> FastJSONResponse:
+    """Render a per-user read directly, tagged with its ETag"""
+    return FastJSONResponse(content, headers={"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL})
+
+def parse_fields(fields: Optional[str], sections: Iterable[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Normalize a fields= parameter into sorted dotted paths
+    
+    The first component of each path must be one of the response's
+    sections; paths inside an already selected sub-tree are dropped.
+    """
+    if fields is None:
+        return None
+    paths = sorted({path.strip() for path in fields.split(",") if path.strip()})
+    if not paths:
+        raise HTTPException(status_code=400, detail="fields must name at least one section")
+    unknown = sorted({path.split(".")[0] for path in paths} - set(sections))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return tuple(path for path in paths
+                 if not any(path.startswith(other + ".") for other in paths))
+
+def select_fields(data: Dict[str, Any], paths: Tuple[str, ...]) -> Dict[str, Any]:
+    """Copy only the sub-trees named by dotted paths; missing paths are skipped"""
+    selected: Dict[str, Any] = {}
+    for path in paths:
+        keys = path.split(".")
+        value = data
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = selected
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = value
+    return selected
+
+def local_naive(value: datetime) -> datetime:
+    """Entries use naive local time; convert timezone-aware client input"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+def encode_cursor(entry: TimeEntry) -> str:
+    """Opaque cursor for the keyset position just after this entry"""
+    position = json.dumps([entry.start_time.isoformat(), entry.session_id])
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        start_time, session_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        datetime.fromisoformat(start_time)
+        return str(start_time), str(session_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def build_batch_entries(sessions: List[BatchSession]) -> Tuple[List[TimeEntry], List[Dict[str, Any]]]:
+    """Validate a batch of completed sessions and turn them into entries"""
+    entries = []
+    errors = []
+    now = datetime.now()
+    
+    for index, session in enumerate(sessions):
+        start_time = local_naive(session.start_time)
+        end_time = local_naive(session.end_time)
+        main_tag = session.main_tag.strip().lower()
+        
+        problems = []
+        if not main_tag:
+            problems.append("main_tag must not be empty")
+        if end_time <= start_time:
+            problems.append("end_time must be after start_time")
+        if end_time > now:
+            problems.append("end_time is in the future")
+        for field in ("energy_level", "focus_quality"):
+            if not 1 <= getattr(session, field) <= 5:
+                problems.append(f"{field} must be between 1 and 5")
+        if session.interruptions < 0:
+            problems.append("interruptions must not be negative")
+        if session.estimated_minutes is not None and session.estimated_minutes <= 0:
+            problems.append("estimated_minutes must be positive")
+        
+        if problems:
+            errors.extend({"index": index, "error": problem} for problem in problems)
+            continue
+        
+        entries.append(TimeEntry(
+            session_id=str(uuid.uuid4()),
+            start_time=start_time,
+            tag=SessionTag(main_tag=main_tag, sub_tag=session.sub_tag),
+            task_description=session.task_description,
+            end_time=end_time,
+            status=SessionStatus.COMPLETED,
+            confidence=ConfidenceLevel.MODERATE,
+            user_notes=session.user_notes,
+            interruptions=session.interruptions,
+            energy_level=session.energy_level,
+            focus_quality=session.focus_quality,
+            estimated_minutes=session.estimated_minutes
+        ))
+    
+    return entries, errors
+
+def save_user_changes(user_id: str, entries: Optional[List[TimeEntry]] = None,
+                      profile: Optional[UserProfile] = None, expected_version: Optional[int] = None) -> int:
+    """
+    Write entry and profile changes in one batch and advance the data version
+    
+    expected_version is the version the changes were made on top of. If
+    another worker has written since, nothing is saved, the cached objects
+    holding the unsaved changes are dropped and VersionConflict propagates.
+    """
+    try:
+        with repository.transaction():
+            if profile is not None and expected_version is not None and profile.data_version != expected_version:
+                raise VersionConflict(user_id, expected_version, profile.data_version)
+            version = repository.bump_data_version(user_id, expected_version)
+            repository.save_entries(user_id, entries or [], version)
+            if profile is not None:
+                repository.save_profile(user_id, profile.to_dict())
+    except VersionConflict:
+        engine_cache.pop(user_id)
+        profile_cache.pop(user_id)
+        raise
+    
+    # Cached objects that saw the previous version are still current; anything
+    # that missed a write made by another worker is dropped and reloaded later
+    for cache in (engine_cache, profile_cache):
+        cached = cache.peek(user_id)
+        if cached is None:
+            continue
+        if cached.data_version == version - 1:
+            cached.data_version = version
+        else:
+            cache.pop(user_id)
+    
+    return version
+
+def save_session(user_id: str, engine: ProductivityEngine, session_id: str,
+                 profile: Optional[UserProfile] = None) -> int:
+    """Persist the current state of one session"""
+    entry = engine.time_tracker.get_entry(session_id)
+    try:
+        return save_user_changes(user_id, [entry] if entry else [], profile, engine.data_version)
+    except VersionConflict:
+        # Callers may carry on after a conflict; the dropped change is never published
+        engine.pending_events.clear()
+        raise
+
+def check_idempotency_key(user_id: str, key: Optional[str], route: str,
+                          payload: BaseModel) -> Tuple[Optional[str], Optional[Response]]:
+    """
+    Fingerprint a keyed request and claim its key, or find the response to replay
+    
+    Returns (fingerprint, replay), both None for requests without a key.
+    Without a replay the caller holds the key and runs the request inside
+    idempotency_claim(); of concurrent requests with one key only one does,
+    the others get 409 until it has finished. Reusing a key for a different
+    request is an error rather than a replay.
+    """
+    if key is None:
+        return None, None
+    if not 0 < len(key) <= 255 or not key.isprintable():
+        raise HTTPException(status_code=400, detail="Idempotency-Key must be 1-255 printable characters")
+    
+    fingerprint = hashlib.sha256(f"{route}\n{payload.model_dump_json()}".encode()).hexdigest()
+    stored = repository.reserve_idempotency_key(
+        user_id, key, fingerprint, datetime.now() + timedelta(seconds=IDEMPOTENCY_PENDING_SECONDS)
+    )
+    if stored is None:
+        return fingerprint, None
+    if stored["fingerprint"] != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    if stored["status"] == IDEMPOTENCY_PENDING:
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is still in progress",
+            headers={"Retry-After": "1"}
+        )
+    return fingerprint, Response(
+        content=stored["body"],
+        status_code=stored["status"],
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+@contextlib.contextmanager
+def idempotency_claim(user_id: str, key: Optional[str]):
+    """Give up the claim on a key if the request fails, so a retry runs it again"""
+    try:
+        yield
+    except BaseException:
+        if key is not None:
+            repository.release_idempotency_key(user_id, key)
+        raise
+
+def remember_response(user_id: str, key: Optional[str], fingerprint: Optional[str],
+                      result: Dict[str, Any]) -> None:
+    """Record a successful keyed response; call inside the transaction that saved its effects"""
+    if key is None:
+        return
+    repository.save_idempotent_response(
+        user_id, key,
+        {"fingerprint": fingerprint, "status": 200, "body": dumps(result).decode("utf-8")},
+        datetime.now() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+        IDEMPOTENCY_MAX_KEYS
+    )
+
+def save_profile(profile: UserProfile) -> int:
+    """Persist a user profile"""
+    return save_user_changes(profile.user_id, profile=profile, expected_version=profile.data_version)
+
+async def reap_stale_sessions() -> int:
+    """
+    Close sessions nobody ended within STALE_SESSION_HOURS
+    
+    The entry is credited with its estimate (or nothing without one) rather
+    than the hours it sat open, and flagged as uncertain for the user to
+    review. Runs on the event loop under the user's lock, like the handlers
+    sharing the engines.
+    """
+    now = datetime.now()
+    stale = await asyncio.to_thread(
+        repository.find_open_entries, now - timedelta(hours=STALE_SESSION_HOURS)
+    )
+    note = f"Auto-closed: not ended within {STALE_SESSION_HOURS:g} hours"
+    closed = 0
+    for user_id, stored in stale:
+        async with locked_user_engine(user_id) as engine:
+            entry = engine.time_tracker.active_sessions.get(stored.session_id)
+            if entry is None:
+                continue
+            end_time = min(now, entry.start_time + timedelta(minutes=entry.estimated_minutes or 0))
+            engine.time_tracker.close_stale_session(entry.session_id, end_time, note)
+            try:
+                save_session(user_id, engine, entry.session_id)
+            except VersionConflict:
+                # Another worker changed the user meanwhile; the next run sees the result
+                continue
+        closed += 1
+    return closed
+
+async def precompute_rollups() -> int:
+    """
+    Fill the result cache for recently active users before they open the dashboard
+    
+    Users with a session started in the last ROLLUP_ACTIVE_DAYS are hydrated,
+    evicted ones included, most recently active first and no more than the
+    engine cache holds. Uses the keys of the default daily summary, weekly
+    and monthly tag analytics, insights and patterns, so the first reads of
+    the day hit. Stops early when the analytics pool is busy with real
+    requests.
+    """
+    since = datetime.now() - timedelta(days=ROLLUP_ACTIVE_DAYS)
+    warmed = 0
+    for user_id in repository.find_recent_users(since, limit=ENGINE_CACHE_SIZE):
+        if not repository.user_exists(user_id):
+            continue
+        engine = await current_user_engine(user_id)
+        rollups = [
+            ("daily_summary", (None,), timed("get_daily_summary", engine.get_daily_productivity_summary)),
+            ("tag_analytics", (7, None), timed("get_tag_analytics",
+                                               functools.partial(engine.time_tracker.get_tag_analytics, 7))),
+            ("tag_analytics", (30, None), timed("get_tag_analytics",
+                                                functools.partial(engine.time_tracker.get_tag_analytics, 30))),
+            ("insights", (30, None), timed("get_comprehensive_insights",
+                                           functools.partial(engine.get_comprehensive_insights, 30))),
+            ("patterns", (), timed("get_patterns", engine.get_patterns))
+        ]
+        try:
+            for endpoint, params, compute in rollups:
+                await cached_analytics(user_id, engine, endpoint, params, compute)
+        except AnalyticsSaturated:
+            break
+        warmed += 1
+    return warmed
+
+def compact_caches() -> Dict[str, int]:
+    """Drop cached results for past days or superseded versions and idle rate-limit buckets"""
+    today = datetime.now().date().isoformat()
+    
+    def keep(user_id: str, endpoint: str, params: tuple, version: int) -> bool:
+        engine = engine_cache.peek(user_id)
+        return params[-1:] == (today,) and (engine is None or engine.data_version == version)
+    
+    return {"results": result_cache.compact(keep), "rate_limits": rate_limiter.compact()}
+
+def purge_idempotency_keys() -> int:
+    """Delete expired idempotency keys"""
+    return repository.purge_idempotency_keys(datetime.now())
+
+scheduler.every(REAP_INTERVAL_SECONDS, "reap_stale_sessions", reap_stale_sessions, exclusive=True)
+scheduler.daily(ROLLUP_HOUR, "precompute_rollups", precompute_rollups)
+scheduler.every(COMPACT_INTERVAL_SECONDS, "compact_caches", compact_caches)
+scheduler.every(IDEMPOTENCY_PURGE_SECONDS, "purge_idempotency_keys", purge_idempotency_keys, exclusive=True)
+
+@app.on_event("startup")
+async def start_scheduler():
+    """Start background jobs unless disabled"""
+    if SCHEDULER_ENABLED:
+        scheduler.start()
+
+# Startup work that runs after the server is already answering requests
+background_tasks = set()
+
+@app.on_event("startup")
+async def precompress_assets():
+    """Load and compress the frontend build and the demo page in the background"""
+    frontend_assets.load_in_background()
+    task = asyncio.create_task(asyncio.to_thread(demo_asset))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+@app.on_event("shutdown")
+async def close_repository():
+    """Stop background jobs and close the storage layer on shutdown"""
+    await scheduler.stop()
+    for job in scheduler.jobs.values():
+        if job.exclusive:
+            repository.release_lease(job.name, WORKER_ID)
+    analytics_executor.shutdown()
+    repository.close()
 
 # API Routes
 
@@ -1016,10 +1802,23 @@ def demo_page():
 </html>
     """
 
+@functools.lru_cache(maxsize=None)
+def demo_asset() -> Asset:
+    """The demo page, rendered and compressed on first use; startup does it in the background"""
+    return Asset.build(demo_page().encode("utf-8"), "demo.html")
+
 @app.get("/demo", response_class=HTMLResponse)
-async def demo_route():
+async def demo_route(request: Request):
     """Serve the demo page"""
-    return demo_page()
+    return demo_asset().response(request)
+
+@app.get("/static/{asset_path:path}")
+async def serve_static_asset(asset_path: str, request: Request):
+    """Serve a file from the React build's static directory"""
+    asset = frontend_assets.get(f"static/{asset_path}")
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return asset.response(request)
 
 # API Routes
 
@@ -1032,15 +1831,54 @@ async def root():
         "philosophy": "The first productivity app that works with your psychology, not against it"
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics"""
+    return Response(content=metrics.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "active_users": len(engines_db)
+        "active_users": len(engine_cache),
+        "caches": {
+            "engines": engine_cache.stats(),
+            "profiles": profile_cache.stats(),
+            "results": result_cache.stats()
+        },
+        "analytics": analytics_executor.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "static_assets": frontend_assets.stats(),
+        "scheduler": scheduler.stats()
     }
 
+@app.get("/api/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """Captured request profiles, newest first"""
+    return {"profiles": request_profiler.list(), **request_profiler.stats()}
+
+@app.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str, format: str = "text", sort: str = "cumulative"):
+    """One profile as pstats text, or as a .prof file with format=prof"""
+    capture = request_profiler.get(profile_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    if format == "prof":
+        return Response(
+            content=capture.dump(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+        )
+    if format != "text":
+        raise HTTPException(status_code=400, detail="format must be text or prof")
+    try:
+        return Response(content=capture.text(sort=sort), media_type="text/plain")
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown sort key: {sort}")
+
 # User Management
 @app.post("/api/users")
 async def create_user(request: UserCreateRequest):
@@ -1050,19 +1888,19 @@ async def create_user(request: UserCreateRequest):
     # Create user profile
     profile = UserProfile(user_id)
     profile.created_at = datetime.now()
-    profiles_db[user_id] = profile
     
-    # Create productivity engine
-    engine = ProductivityEngine(user_id)
-    engines_db[user_id] = engine
+    # Store user info and profile together
+    with repository.transaction():
+        repository.create_user({
+            "user_id": user_id,
+            "username": request.username,
+            "created_at": datetime.now().isoformat(),
+            "preferences": request.preferences or {}
+        })
+        repository.save_profile(user_id, profile.to_dict())
     
-    # Store user info
-    users_db[user_id] = {
-        "user_id": user_id,
-        "username": request.username,
-        "created_at": datetime.now().isoformat(),
-        "preferences": request.preferences or {}
-    }
+    profile_cache.put(user_id, profile)
+    engine_cache.put(user_id, new_user_engine(user_id))
     
     return {
         "user_id": user_id,
@@ -1071,30 +1909,36 @@ async def create_user(request: UserCreateRequest):
     }
 
 @app.get("/api/users/{user_id}")
-async def get_user(user_id: str):
+async def get_user(user_id: str, request: Request):
     """Get user information"""
-    if user_id not in users_db:
+    etag = user_etag(user_id, current_data_version(user_id), "user")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    user_info = repository.get_user(user_id)
+    if not user_info:
         raise HTTPException(status_code=404, detail="User not found")
     
     profile = get_or_create_user_profile(user_id)
-    user_info = users_db[user_id]
+    mode = profile.current_productivity_mode
     
-    return {
+    return etag_response({
         "user_id": user_id,
         "username": user_info["username"],
         "created_at": user_info["created_at"],
         "profile": {
-            "productivity_mode": profile.current_productivity_mode.value,
+            "productivity_mode": getattr(mode, "value", mode),
             "days_active": profile.days_active,
             "total_sessions": profile.total_sessions,
             "ui_complexity_level": profile.ui_complexity_level
         }
-    }
+    }, user_etag(user_id, profile.data_version, "user"))
 
 @app.put("/api/users/{user_id}/preferences")
 async def update_user_preferences(user_id: str, request: UpdatePreferencesRequest):
     """Update user preferences"""
-    if user_id not in users_db:
+    if not repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
     profile = get_or_create_user_profile(user_id)
@@ -1108,70 +1952,133 @@ async def update_user_preferences(user_id: str, request: UpdatePreferencesReques
     if request.privacy_settings:
         profile.update_privacy_settings(**request.privacy_settings)
     
+    save_profile(profile)
+    
     return {"message": "Preferences updated successfully"}
 
 # Session Management
 @app.post("/api/users/{user_id}/sessions/start")
-async def start_session(user_id: str, request: StartSessionRequest):
+async def start_session(user_id: str, request: StartSessionRequest,
+                        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
     """Start a productivity session with user-defined tags"""
-    if user_id not in users_db:
+    if not repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    engine = get_or_create_user_engine(user_id)
-    profile = get_or_create_user_profile(user_id)
-    
-    # Start session with enhanced tagging system
-    session_result = engine.start_productivity_session(
-        main_tag=request.main_tag,
-        sub_tag=request.sub_tag,
-        task_description=request.task_description,
-        estimated_minutes=request.estimated_minutes,
-        context={"energy_level": request.energy_level}
-    )
+    fingerprint, replay = check_idempotency_key(user_id, idempotency_key, "sessions/start", request)
+    if replay:
+        return replay
     
-    # Track usage
-    profile.track_usage("productivity_session")
+    with idempotency_claim(user_id, idempotency_key):
+        async with locked_user_engine(user_id) as engine:
+            profile = get_or_create_user_profile(user_id)
+            
+            # Start session with enhanced tagging system
+            session_result = engine.start_productivity_session(
+                main_tag=request.main_tag,
+                sub_tag=request.sub_tag,
+                task_description=request.task_description,
+                estimated_minutes=request.estimated_minutes,
+                context={"energy_level": request.energy_level}
+            )
+            
+            # Track usage
+            profile.track_usage("productivity_session")
+            
+            with repository.transaction():
+                save_session(user_id, engine, session_result["session_id"], profile)
+                remember_response(user_id, idempotency_key, fingerprint, session_result)
     
     return session_result
 
 @app.post("/api/users/{user_id}/sessions/end")
-async def end_session(user_id: str, request: EndSessionRequest):
+async def end_session(user_id: str, request: EndSessionRequest,
+                      idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
     """End a specific productivity session"""
-    if user_id not in users_db:
+    if not repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    engine = get_or_create_user_engine(user_id)
+    fingerprint, replay = check_idempotency_key(user_id, idempotency_key, "sessions/end", request)
+    if replay:
+        return replay
+    
+    with idempotency_claim(user_id, idempotency_key):
+        async with locked_user_engine(user_id) as engine:
+            session_result = engine.end_productivity_session(
+                session_id=request.session_id,
+                user_notes=request.user_notes,
+                energy_level=request.energy_level,
+                focus_quality=request.focus_quality,
+                interruptions=request.interruptions,
+                satisfaction=request.satisfaction
+            )
+            
+            if "error" in session_result:
+                raise HTTPException(status_code=404, detail=session_result["error"])
+            
+            with repository.transaction():
+                save_session(user_id, engine, request.session_id)
+                remember_response(user_id, idempotency_key, fingerprint, session_result)
     
-    session_result = engine.end_productivity_session(
-        session_id=request.session_id,
-        user_notes=request.user_notes,
-        energy_level=request.energy_level,
-        focus_quality=request.focus_quality,
-        interruptions=request.interruptions,
-        satisfaction=request.satisfaction
-    )
+    return session_result
+
+@app.get("/api/users/{user_id}/sessions")
+async def list_sessions(user_id: str, request: Request,
+                        start: Optional[datetime] = Query(None, alias="from"),
+                        end: Optional[datetime] = Query(None, alias="to"),
+                        tag: Optional[str] = None,
+                        status: Optional[SessionStatus] = None,
+                        cursor: Optional[str] = None,
+                        limit: int = Query(SESSION_PAGE_DEFAULT, ge=1, le=SESSION_PAGE_MAX)):
+    """
+    Page through a user's sessions, oldest first
     
-    if "error" in session_result:
-        raise HTTPException(status_code=404, detail=session_result["error"])
+    from/to bound the start time (from inclusive, to exclusive); tag is a
+    main tag or main/sub; next_cursor resumes after the last session of the
+    page and stays valid while sessions are added or changed.
+    """
+    etag = user_etag(user_id, current_data_version(user_id), "sessions",
+                     start, end, tag, status, cursor, limit)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    # Main tags are stored lowercased, as sessions are started and imported
+    main_tag, _, sub_tag = (tag or "").strip().lstrip("#").partition("/")
+    main_tag, sub_tag = main_tag.strip().lower(), sub_tag.strip()
+    entries = repository.list_entries(
+        user_id,
+        start=local_naive(start) if start else None,
+        end=local_naive(end) if end else None,
+        main_tag=main_tag or None,
+        sub_tag=sub_tag or None,
+        status=status.value if status else None,
+        after=decode_cursor(cursor) if cursor else None,
+        limit=limit + 1
+    )
+    page = entries[:limit]
     
-    return session_result
+    return etag_response({
+        "sessions": [entry.to_dict() for entry in page],
+        "count": len(page),
+        "next_cursor": encode_cursor(page[-1]) if len(entries) > limit else None
+    }, etag)
 
 @app.get("/api/users/{user_id}/sessions/active")
 async def get_active_sessions(user_id: str):
     """Get all currently active sessions"""
-    if user_id not in users_db:
+    if not repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    engine = get_or_create_user_engine(user_id)
+    engine = await current_user_engine(user_id)
     return engine.get_active_sessions()
 
 @app.get("/api/users/{user_id}/sessions/current")
 async def get_current_session(user_id: str):
     """Get current active sessions (legacy compatibility)"""
-    if user_id not in users_db:
+    if not repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    engine = get_or_create_user_engine(user_id)
+    engine = await current_user_engine(user_id)
     active_sessions = engine.get_active_sessions()
     
     # For backward compatibility, return the first active session
@@ -1185,13 +2092,50 @@ async def get_current_session(user_id: str):
     else:
         return {"active_session": False, "total_active": 0}
 
+@app.get("/api/users/{user_id}/sessions/stream")
+async def stream_sessions(user_id: str, request: Request):
+    """Server-sent event stream of session changes, replacing client polling"""
+    if not repository.user_exists(user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    async def active_snapshot(event_type: str) -> Dict[str, Any]:
+        # Re-reading through the cache also picks up changes made by other workers
+        engine = await current_user_engine(user_id)
+        return {"type": event_type, **engine.get_active_sessions(), "timestamp": datetime.now().isoformat()}
+    
+    async def event_stream():
+        queue = session_events.subscribe(user_id)
+        try:
+            yield format_sse("snapshot", await active_snapshot("snapshot"))
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SESSION_STREAM_TICK_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    event = await active_snapshot("tick")
+                
+                if event["type"] == "resync":
+                    event = await active_snapshot("snapshot")
+                
+                yield format_sse(event["type"], event)
+        finally:
+            session_events.unsubscribe(user_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/users/{user_id}/sessions/{session_id}")
 async def get_session(user_id: str, session_id: str):
     """Get specific session details"""
-    if user_id not in users_db:
+    if not repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    engine = get_or_create_user_engine(user_id)
+    engine = await current_user_engine(user_id)
     session = engine.time_tracker.get_session(session_id)
     
     if not session:
@@ -1202,53 +2146,93 @@ async def get_session(user_id: str, session_id: str):
 @app.post("/api/users/{user_id}/sessions/{session_id}/pause")
 async def pause_session(user_id: str, session_id: str):
     """Pause a session (future enhancement)"""
-    if user_id not in users_db:
+    if not repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    engine = get_or_create_user_engine(user_id)
-    result = engine.time_tracker.pause_session(session_id)
-    
-    if not result:
-        raise HTTPException(status_code=404, detail="Session not found")
+    async with locked_user_engine(user_id) as engine:
+        result = engine.time_tracker.pause_session(session_id)
+        
+        if not result:
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        save_session(user_id, engine, session_id)
     
     return {"message": "Session paused", "session_id": session_id}
 
 @app.post("/api/users/{user_id}/sessions/{session_id}/resume")
 async def resume_session(user_id: str, session_id: str):
     """Resume a paused session (future enhancement)"""
-    if user_id not in users_db:
+    if not repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    engine = get_or_create_user_engine(user_id)
-    result = engine.time_tracker.resume_session(session_id)
-    
-    if not result:
-        raise HTTPException(status_code=404, detail="Session not found")
+    async with locked_user_engine(user_id) as engine:
+        result = engine.time_tracker.resume_session(session_id)
+        
+        if not result:
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        save_session(user_id, engine, session_id)
     
     return {"message": "Session resumed", "session_id": session_id}
 
 @app.delete("/api/users/{user_id}/sessions/{session_id}")
 async def cancel_session(user_id: str, session_id: str):
     """Cancel a session without recording completion"""
-    if user_id not in users_db:
+    if not repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    engine = get_or_create_user_engine(user_id)
-    result = engine.time_tracker.cancel_session(session_id)
-    
-    if not result:
-        raise HTTPException(status_code=404, detail="Session not found")
+    async with locked_user_engine(user_id) as engine:
+        result = engine.time_tracker.cancel_session(session_id)
+        
+        if not result:
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        save_session(user_id, engine, session_id)
     
     return {"message": "Session cancelled", "session_id": session_id}
 
+@app.post("/api/users/{user_id}/sessions/batch")
+async def import_sessions(user_id: str, request: BatchSessionsRequest):
+    """Import many completed sessions at once, all or nothing"""
+    if not repository.user_exists(user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    if len(request.sessions) > MAX_BATCH_SESSIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_BATCH_SESSIONS} sessions per batch"
+        )
+    
+    entries, errors = build_batch_entries(request.sessions)
+    if errors:
+        raise HTTPException(status_code=422, detail={
+            "message": f"{len(errors)} validation errors; nothing was imported",
+            "errors": errors[:MAX_BATCH_ERRORS]
+        })
+    
+    async with locked_user_engine(user_id) as engine:
+        # Persist first so a failed write leaves the cached engine untouched
+        save_user_changes(user_id, entries, expected_version=engine.data_version)
+        engine.time_tracker.import_entries(entries)
+    
+    return {
+        "imported": len(entries),
+        "main_tags": sorted({entry.tag.main_tag for entry in entries}),
+        "first_start": min(entry.start_time for entry in entries).isoformat() if entries else None,
+        "last_end": max(entry.end_time for entry in entries).isoformat() if entries else None
+    }
+
 # Analytics and Insights
 @app.get("/api/users/{user_id}/summary/daily")
-async def get_daily_summary(user_id: str, date: Optional[str] = None):
+async def get_daily_summary(user_id: str, request: Request,
+                            date: Optional[str] = None):
     """Get daily productivity summary"""
-    if user_id not in users_db:
-        raise HTTPException(status_code=404, detail="User not found")
+    etag = user_etag(user_id, current_data_version(user_id), "summary/daily", date)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     
-    engine = get_or_create_user_engine(user_id)
+    engine = await current_user_engine(user_id)
     
     if date:
         try:
@@ -1258,65 +2242,111 @@ async def get_daily_summary(user_id: str, date: Optional[str] = None):
     else:
         target_date = None
     
-    summary = engine.get_daily_productivity_summary(target_date)
-    return summary
+    summary = await cached_analytics(
+        user_id, engine, "daily_summary", (date,),
+        timed("get_daily_summary", functools.partial(engine.get_daily_productivity_summary, target_date))
+    )
+    return etag_response(summary, user_etag(user_id, engine.data_version, "summary/daily", date))
 
 @app.get("/api/users/{user_id}/insights")
-async def get_insights(user_id: str, timeframe_days: int = 30):
-    """Get comprehensive productivity insights"""
-    if user_id not in users_db:
-        raise HTTPException(status_code=404, detail="User not found")
+async def get_insights(user_id: str, request: Request,
+                       timeframe_days: int = 30, fields: Optional[str] = None):
+    """
+    Get comprehensive productivity insights
     
-    engine = get_or_create_user_engine(user_id)
-    insights = engine.get_comprehensive_insights(timeframe_days)
+    fields=time_tracking_insights.total_tracked_time,estimation_accuracy
+    returns only those sub-trees, and sections not named are not computed.
+    """
+    paths = parse_fields(fields, INSIGHT_SECTIONS)
+    etag = user_etag(user_id, current_data_version(user_id), "insights", timeframe_days, paths)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    def compute():
+        if paths is None:
+            return engine.get_comprehensive_insights(timeframe_days)
+        sections = {path.split(".")[0] for path in paths}
+        return select_fields(engine.get_comprehensive_insights(timeframe_days, sections), paths)
+    
+    engine = await current_user_engine(user_id)
+    insights = await cached_analytics(
+        user_id, engine, "insights", (timeframe_days, paths),
+        timed("get_comprehensive_insights", compute)
+    )
     
-    return insights
+    return etag_response(insights, user_etag(user_id, engine.data_version, "insights", timeframe_days, paths))
 
 @app.get("/api/users/{user_id}/patterns")
-async def get_patterns(user_id: str):
+async def get_patterns(user_id: str, request: Request):
     """Get pattern analysis"""
-    if user_id not in users_db:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    engine = get_or_create_user_engine(user_id)
-    patterns = engine.get_patterns()
+    etag = user_etag(user_id, current_data_version(user_id), "patterns")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    engine = await current_user_engine(user_id)
+    patterns = await cached_analytics(
+        user_id, engine, "patterns", (), timed("get_patterns", engine.get_patterns)
+    )
     
-    return patterns
+    return etag_response(patterns, user_etag(user_id, engine.data_version, "patterns"))
 
 # Tag Management Endpoints
 @app.get("/api/users/{user_id}/tags")
-async def get_user_tags(user_id: str):
+async def get_user_tags(user_id: str, request: Request):
     """Get all tags the user has used"""
-    if user_id not in users_db:
-        raise HTTPException(status_code=404, detail="User not found")
+    etag = user_etag(user_id, current_data_version(user_id), "tags")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     
-    engine = get_or_create_user_engine(user_id)
+    engine = await current_user_engine(user_id)
     tags = engine.time_tracker.get_user_tags()
     
-    return {
+    return etag_response({
         "user_tags": tags,
         "count": len(tags),
         "suggestion": "Use tags that feel natural to describe your work"
-    }
+    }, user_etag(user_id, engine.data_version, "tags"))
 
 @app.get("/api/users/{user_id}/tags/analytics")
-async def get_tag_analytics(user_id: str, timeframe_days: int = 30):
-    """Get detailed analytics based on user's tagging patterns"""
-    if user_id not in users_db:
-        raise HTTPException(status_code=404, detail="User not found")
+async def get_tag_analytics(user_id: str, request: Request,
+                            timeframe_days: int = 30, fields: Optional[str] = None):
+    """
+    Get detailed analytics based on user's tagging patterns
     
-    engine = get_or_create_user_engine(user_id)
-    analytics = engine.time_tracker.get_tag_analytics(timeframe_days)
+    fields= selects sub-trees as for /insights; asking only for totals
+    skips the per-tag breakdown.
+    """
+    paths = parse_fields(fields, TAG_ANALYTICS_FIELDS)
+    etag = user_etag(user_id, current_data_version(user_id), "tags/analytics", timeframe_days, paths)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    def compute():
+        if paths is None:
+            return engine.time_tracker.get_tag_analytics(timeframe_days)
+        if {path.split(".")[0] for path in paths} <= TAG_ANALYTICS_TOTALS:
+            return select_fields(engine.time_tracker.get_time_totals(timeframe_days), paths)
+        return select_fields(engine.time_tracker.get_tag_analytics(timeframe_days), paths)
+    
+    engine = await current_user_engine(user_id)
+    analytics = await cached_analytics(
+        user_id, engine, "tag_analytics", (timeframe_days, paths),
+        timed("get_tag_analytics", compute)
+    )
     
-    return analytics
+    return etag_response(analytics, user_etag(user_id, engine.data_version, "tags/analytics", timeframe_days, paths))
 
 @app.get("/api/users/{user_id}/estimation-accuracy")
 async def get_estimation_accuracy(user_id: str):
     """Get user's time estimation accuracy"""
-    if user_id not in users_db:
+    if not repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    engine = get_or_create_user_engine(user_id)
+    engine = await current_user_engine(user_id)
     accuracy = engine.time_tracker.get_estimation_accuracy()
     
     return accuracy
@@ -1325,50 +2355,98 @@ async def get_estimation_accuracy(user_id: str):
 @app.post("/api/users/{user_id}/self-discovery/start")
 async def start_self_discovery(user_id: str, category: str, support_level: str = "guided"):
     """Start a self-discovery session"""
-    if user_id not in users_db:
+    if not repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    engine = get_or_create_user_engine(user_id)
-    
     try:
         reflection_category = ReflectionCategory(category)
         support_level_enum = SupportLevel(support_level)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid category or support level")
     
-    discovery_session = engine.start_self_discovery_session(
-        reflection_category, support_level_enum
-    )
+    async with locked_user_engine(user_id) as engine:
+        discovery_session = engine.start_self_discovery_session(
+            reflection_category, support_level_enum
+        )
     
     return discovery_session
 
 # Data Export and Privacy
+def stream_export(user_id: str, user_data: Dict[str, Any], profile_data: Dict[str, Any],
+                  export_format: str):
+    """
+    Yield an export straight from storage, one chunk per batch of entries
+    
+    "ndjson" emits a header record, one record per entry and a trailer;
+    "json" emits the same content as a single JSON document.
+    """
+    header = jsonable_encoder({
+        "export_timestamp": datetime.now().isoformat(),
+        "user_info": user_data,
+        "user_profile": profile_data,
+        "data_ownership": "This data belongs entirely to the user"
+    })
+    count = 0
+    
+    if export_format == "ndjson":
+        yield json.dumps({"type": "export", **header}) + "\n"
+        for batch in repository.iter_entries(user_id, EXPORT_BATCH_SIZE):
+            count += len(batch)
+            yield "".join('{"type": "entry", ' + encode_entry(entry)[1:] + "\n" for entry in batch)
+        yield json.dumps({"type": "end", "entry_count": count}) + "\n"
+        return
+    
+    yield json.dumps(header)[:-1] + ', "entries": ['
+    for batch in repository.iter_entries(user_id, EXPORT_BATCH_SIZE):
+        prefix = ", " if count else ""
+        count += len(batch)
+        yield prefix + ", ".join(encode_entry(entry) for entry in batch)
+    yield f'], "entry_count": {count}}}'
+
 @app.get("/api/users/{user_id}/export")
-async def export_user_data(user_id: str):
-    """Export all user data"""
-    if user_id not in users_db:
+async def export_user_data(user_id: str, stream: Optional[str] = None):
+    """
+    Export all user data
+    
+    With stream=ndjson or stream=json the entries are streamed from storage
+    in batches instead of being assembled in memory.
+    """
+    user_data = repository.get_user(user_id)
+    if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
     
-    engine = get_or_create_user_engine(user_id)
+    if stream is not None:
+        if stream not in EXPORT_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail="stream must be 'ndjson' or 'json'")
+        
+        profile_data = get_or_create_user_profile(user_id).export_all_data()
+        return StreamingResponse(
+            stream_export(user_id, user_data, profile_data, stream),
+            media_type=EXPORT_MEDIA_TYPES[stream],
+            headers={
+                "Content-Disposition": f'attachment; filename="flowstate-{user_id}.{stream}"'
+            }
+        )
+    
+    engine = await current_user_engine(user_id)
     profile = get_or_create_user_profile(user_id)
     
     # Export from all modules
     engine_data = engine.export_complete_user_data()
     profile_data = profile.export_all_data()
-    user_data = users_db[user_id]
     
-    return {
+    return FastJSONResponse({
         "export_timestamp": datetime.now().isoformat(),
         "user_info": user_data,
         "productivity_engine": engine_data,
         "user_profile": profile_data,
         "data_ownership": "This data belongs entirely to the user"
-    }
+    })
 
 @app.delete("/api/users/{user_id}")
 async def delete_user(user_id: str, confirmation: str):
     """Delete user and all data"""
-    if user_id not in users_db:
+    if not repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
     expected_confirmation = f"DELETE-{user_id[:8]}"
@@ -1379,11 +2457,10 @@ async def delete_user(user_id: str, confirmation: str):
         )
     
     # Delete from all storage
-    del users_db[user_id]
-    if user_id in engines_db:
-        del engines_db[user_id]
-    if user_id in profiles_db:
-        del profiles_db[user_id]
+    repository.delete_user(user_id)
+    engine_cache.pop(user_id)
+    profile_cache.pop(user_id)
+    result_cache.invalidate(user_id)
     
     return {"message": "User and all data deleted successfully"}
 
@@ -1396,7 +2473,7 @@ async def create_sample_user():
     
     # Create user
     profile = UserProfile(user_id)
-    engine = ProductivityEngine(user_id)
+    engine = new_user_engine(user_id)
     
     # Add sample sessions with diverse tagging
     sample_sessions = [
@@ -1410,6 +2487,7 @@ async def create_sample_user():
     ]
     
     # Create sessions with realistic time spread
+    sample_entries = []
     for i, session in enumerate(sample_sessions):
         # Create time entry manually for demo
         start_time = datetime.now() - timedelta(hours=len(sample_sessions)-i, minutes=15)
@@ -1428,19 +2506,24 @@ async def create_sample_user():
             interruptions=0 if session["focus"] >= 4 else 1
         )
         
-        engine.time_tracker.entries.append(session_entry)
-        engine.time_tracker.user_tags.add(session["main_tag"])
+        sample_entries.append(session_entry)
     
-    # Store user
-    users_db[user_id] = {
-        "user_id": user_id,
-        "username": username,
-        "created_at": datetime.now().isoformat(),
-        "preferences": {},
-        "is_demo": True
-    }
-    engines_db[user_id] = engine
-    profiles_db[user_id] = profile
+    engine.time_tracker.import_entries(sample_entries)
+    
+    # Store user, profile and sample sessions in one batch
+    with repository.transaction():
+        repository.create_user({
+            "user_id": user_id,
+            "username": username,
+            "created_at": datetime.now().isoformat(),
+            "preferences": {},
+            "is_demo": True
+        })
+        repository.save_profile(user_id, profile.to_dict())
+        repository.save_entries(user_id, sample_entries)
+    
+    engine_cache.put(user_id, engine)
+    profile_cache.put(user_id, profile)
     
     return {
         "user_id": user_id,
@@ -1454,28 +2537,38 @@ async def create_sample_user():
 @app.get("/api/demo/reset/{user_id}")
 async def reset_demo_user(user_id: str):
     """Reset demo user data"""
-    if user_id not in users_db or not users_db[user_id].get("is_demo"):
+    user_info = repository.get_user(user_id)
+    if not user_info or not user_info.get("is_demo"):
         raise HTTPException(status_code=404, detail="Demo user not found")
     
     # Reset engine and profile
-    engines_db[user_id] = ProductivityEngine(user_id)
-    profiles_db[user_id] = UserProfile(user_id)
+    profile = UserProfile(user_id)
+    engine = new_user_engine(user_id)
+    with repository.transaction():
+        repository.delete_entries(user_id)
+        version = save_user_changes(user_id, profile=profile)
+    
+    engine.data_version = profile.data_version = version
+    engine_cache.put(user_id, engine)
+    profile_cache.put(user_id, profile)
+    result_cache.invalidate(user_id)
     
     return {"message": "Demo user data reset"}
 
 # Serve the React app for any unmatched routes (MUST BE LAST!)
 @app.get("/{full_path:path}")
-async def serve_react_app(full_path: str):
+async def serve_react_app(full_path: str, request: Request):
     """Serve React app for frontend routes"""
     # For demo route, serve the demo page first
     if full_path == "demo" or full_path == "demo/":
-        return demo_page()
+        return demo_asset().response(request)
     
-    # Try to serve React build files for frontend routes
-    try:
-        with open("/app/frontend/build/index.html", "r") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
+    # Top-level build files (favicon.ico, manifest.json, ...) are served as
+    # is; every other path is a client-side route answered by index.html
+    asset = frontend_assets.get(full_path) or frontend_assets.get("index.html")
+    if asset is not None:
+        return asset.response(request)
+    else:
         # If React build doesn't exist, show error message instead of demo page
         return HTMLResponse(content="""
         <html>
@@ -1489,4 +2582,12 @@ async def serve_react_app(full_path: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    
+    # All state is shared through the repository, so any number of worker
+    # processes can serve the API from the same database file
+    workers = int(os.environ.get("FLOWSTATE_WORKERS", "1"))
+    port = int(os.environ.get("FLOWSTATE_PORT", "8001"))
+    if workers > 1:
+        uvicorn.run("server:app", app_dir=str(backend_path), host="0.0.0.0", port=port, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""
+FlowState Static Assets
+In-memory, precompressed serving of the React build and the demo page
+
+Files are read once, compressed once (gzip, and brotli when installed) and
+served from memory with ETags. The build is loaded and compressed on a
+background thread started at startup, so readiness does not depend on the
+bundle size; until it is in memory, requested files are read from disk and
+served uncompressed. Afterwards the directory is re-scanned at most every
+few seconds on a background thread, so a redeployed build is picked up
+without a restart and without blocking the event loop.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Content-hashed build output (main.3f2a9c1b.js, 2.8e1d0c55.chunk.css) never changes
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.(chunk\.)?[a-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml",
+                      "application/manifest+json", "application/xml")
+MIN_COMPRESS_BYTES = 256
+# Maximum compression pays off for files compressed once before serving;
+# files changed while serving use a level that takes milliseconds, not seconds
+BROTLI_QUALITY = 11
+RELOAD_BROTLI_QUALITY = 5
+
+
+@dataclass
+class Asset:
+    """One file held in memory with its precompressed variants"""
+    body: bytes
+    media_type: str
+    etag: str
+    cache_control: str
+    variants: Dict[str, bytes] = field(default_factory=dict)  # content-encoding -> body
+
+    @classmethod
+    def build(cls, body: bytes, name: str, cache_control: Optional[str] = None,
+              brotli_quality: int = BROTLI_QUALITY, compress: bool = True) -> "Asset":
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if cache_control is None:
+            cache_control = IMMUTABLE if HASHED_NAME.search(name) else REVALIDATE
+
+        variants = {}
+        if compress and len(body) >= MIN_COMPRESS_BYTES and media_type.startswith(COMPRESSIBLE_TYPES):
+            if brotli is not None:
+                variants["br"] = brotli.compress(body, quality=brotli_quality)
+            variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            # Keep only variants that actually save bytes
+            variants = {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+
+        return cls(
+            body=body,
+            media_type=media_type,
+            etag=hashlib.blake2s(body, digest_size=12).hexdigest(),
+            cache_control=cache_control,
+            variants=variants
+        )
+
+    def choose(self, accept_encoding: str) -> Tuple[Optional[str], bytes]:
+        """Best encoding the client accepts: brotli, then gzip, then identity"""
+        accepted = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and encoding in accepted:
+                return encoding, self.variants[encoding]
+        return None, self.body
+
+    def response(self, request: Request) -> Response:
+        encoding, body = self.choose(request.headers.get("accept-encoding", ""))
+        # Each encoding is a distinct representation and gets its own validator
+        etag = f'"{self.etag}-{encoding}"' if encoding else f'"{self.etag}"'
+        headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        if self.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in
+                              [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]):
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+class StaticAssetCache:
+    """
+    A directory tree loaded into memory, reloaded when its files change
+
+    load_in_background() loads the tree on a background thread; a lookup
+    before it has finished starts the load if needed and reads just the
+    requested file, uncompressed. Once loaded, lookups never touch the
+    disk: when the tree is due for a check they start one on a background
+    thread and keep serving the loaded files until it has finished. Only
+    added or modified files are read and compressed again.
+    Paths are relative to the root with forward slashes ("static/js/main.3f2a9c1b.js").
+    """
+
+    def __init__(self, root: str, check_interval: float = 2.0):
+        self.root = root
+        self.check_interval = check_interval
+        self._assets: Dict[str, Asset] = {}
+        self._signature: Optional[tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()  # Held by refresh() for a whole reload
+        # Guards starting a check; lookups on the event loop only ever take this one
+        self._checker_lock = threading.Lock()
+        self._checker: Optional[threading.Thread] = None
+        self.reloads = 0
+
+    def _scan(self) -> tuple:
+        """(path, mtime, size) of every file; cheap stat calls only"""
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((os.path.relpath(path, self.root).replace(os.sep, "/"),
+                              stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(files))
+
+    def refresh(self, brotli_quality: int = BROTLI_QUALITY) -> None:
+        """Reload the tree if any file was added, removed or modified; blocks on disk I/O"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            signature = self._scan()
+            if signature == self._signature:
+                return
+
+            unchanged = set(self._signature or ())
+            assets = {}
+            for stamp in signature:
+                relative = stamp[0]
+                if stamp in unchanged and relative in self._assets:
+                    assets[relative] = self._assets[relative]
+                    continue
+                try:
+                    with open(os.path.join(self.root, relative), "rb") as f:
+                        assets[relative] = Asset.build(f.read(), relative, brotli_quality=brotli_quality)
+                except OSError:
+                    continue
+            self._assets = assets
+            self._signature = signature
+            self.reloads += 1
+
+    def load_in_background(self) -> None:
+        """Load and fully compress the tree on a background thread"""
+        self._check_in_background(BROTLI_QUALITY)
+
+    def _check_in_background(self, brotli_quality: int = RELOAD_BROTLI_QUALITY) -> None:
+        with self._checker_lock:
+            if self._checker is not None and self._checker.is_alive():
+                return
+            # Claim the check so lookups arriving meanwhile do not start another
+            self._checked_at = time.monotonic()
+            self._checker = threading.Thread(target=self.refresh, args=(brotli_quality,),
+                                             name="static-assets", daemon=True)
+            self._checker.start()
+
+    def _read_uncompressed(self, path: str) -> Optional[Asset]:
+        """One file of the tree straight from disk, for lookups before it is loaded"""
+        root = os.path.realpath(self.root)
+        full_path = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, full_path]) != root or not os.path.isfile(full_path):
+            return None
+        try:
+            with open(full_path, "rb") as f:
+                return Asset.build(f.read(), path, compress=False)
+        except OSError:
+            return None
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until a background check in progress has finished"""
+        checker = self._checker
+        if checker is not None:
+            checker.join(timeout)
+
+    def get(self, path: str) -> Optional[Asset]:
+        if self._signature is None:
+            self.load_in_background()
+            return self._read_uncompressed(path)
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._check_in_background()
+        return self._assets.get(path)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._assets
+
+    def __len__(self) -> int:
+        return len(self._assets)
+
+    def stats(self) -> Dict[str, int]:
+        assets = list(self._assets.values())
+        return {
+            "files": len(assets),
+            "bytes": sum(len(asset.body) for asset in assets),
+            "compressed_bytes": sum(sum(map(len, asset.variants.values())) for asset in assets),
+            "reloads": self.reloads
+        }
@@ -0,0 +1,708 @@
+"""
+FlowState Storage Layer
+Durable persistence for users, profiles and time entries behind a pluggable repository
+"""
+
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from enhanced_time_tracker import (
+    TimeEntry, SessionTag, SessionStatus, ConfidenceLevel
+)
+
+# Status stored for an idempotency key whose request is still running
+IDEMPOTENCY_PENDING = 0
+
+
+class VersionConflict(Exception):
+    """Raised when a write was based on a data version another writer has since replaced"""
+
+    def __init__(self, user_id: str, expected: int, actual: Optional[int]):
+        super().__init__(f"Data of {user_id} is at version {actual}, not {expected}")
+        self.user_id = user_id
+        self.expected = expected
+        self.actual = actual
+
+
+class UserRepository(ABC):
+    """
+    Persistence interface used by the API server
+
+    Implementations store three kinds of records:
+    - users: account info (username, creation time, preferences)
+    - profiles: serialized UserProfile state
+    - time entries: one row per TimeEntry, addressable by user_id and session_id
+    """
+
+    @abstractmethod
+    def transaction(self) -> ContextManager["UserRepository"]:
+        """Group several writes into a single atomic batch"""
+
+    # Users
+    @abstractmethod
+    def create_user(self, user: Dict) -> None:
+        """Store a new user record"""
+
+    @abstractmethod
+    def get_user(self, user_id: str) -> Optional[Dict]:
+        """Get a user record or None if it does not exist"""
+
+    @abstractmethod
+    def user_exists(self, user_id: str) -> bool:
+        """Check whether a user exists"""
+
+    @abstractmethod
+    def delete_user(self, user_id: str) -> bool:
+        """Delete a user together with their profile and entries"""
+
+    @abstractmethod
+    def count_users(self) -> int:
+        """Number of stored users"""
+
+    @abstractmethod
+    def get_data_version(self, user_id: str) -> Optional[int]:
+        """Current data version of a user, or None if the user does not exist"""
+
+    @abstractmethod
+    def bump_data_version(self, user_id: str, expected: Optional[int] = None) -> int:
+        """
+        Increment and return the data version after a change to the user's data
+
+        With `expected`, the increment is a compare-and-set: VersionConflict
+        is raised unless the stored version still equals it.
+        """
+
+    # Profiles
+    @abstractmethod
+    def get_profile(self, user_id: str) -> Optional[Dict]:
+        """Get serialized profile data for a user"""
+
+    @abstractmethod
+    def save_profile(self, user_id: str, profile: Dict) -> None:
+        """Insert or replace serialized profile data for a user"""
+
+    # Time entries
+    @abstractmethod
+    def load_entries(self, user_id: str) -> List[TimeEntry]:
+        """Load all entries of a user ordered by start time"""
+
+    @abstractmethod
+    def iter_entries(self, user_id: str, batch_size: int = 500) -> Iterator[List[TimeEntry]]:
+        """Yield all entries of a user in start-time order, one batch at a time"""
+
+    @abstractmethod
+    def list_entries(self, user_id: str, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None, main_tag: Optional[str] = None,
+                     sub_tag: Optional[str] = None, status: Optional[str] = None,
+                     after: Optional[Tuple[str, str]] = None, limit: int = 50) -> List[TimeEntry]:
+        """
+        One page of entries in (start_time, session_id) order
+
+        start is inclusive and end exclusive, both on start_time; after is the
+        (start_time, session_id) of the last entry of the previous page.
+        """
+
+    @abstractmethod
+    def get_entry(self, user_id: str, session_id: str) -> Optional[TimeEntry]:
+        """Get a single entry by session id"""
+
+    @abstractmethod
+    def save_entries(self, user_id: str, entries: Iterable[TimeEntry], version: int = 0) -> None:
+        """Insert or update entries in one batch, stamped with the data version that wrote them"""
+
+    @abstractmethod
+    def get_entry_changes(self, user_id: str, since_version: int) -> Optional[List[TimeEntry]]:
+        """
+        Entries written after a data version, in start-time order
+
+        None when entries were deleted since; only a full load is correct then.
+        """
+
+    @abstractmethod
+    def delete_entries(self, user_id: str) -> int:
+        """Delete all entries of a user, returning the number removed"""
+
+    @abstractmethod
+    def count_entries(self) -> int:
+        """Number of stored entries across all users"""
+
+    @abstractmethod
+    def find_open_entries(self, started_before: datetime, limit: int = 500) -> List[Tuple[str, TimeEntry]]:
+        """(user_id, entry) of active or paused sessions started before a time, oldest first"""
+
+    @abstractmethod
+    def find_recent_users(self, started_since: datetime, limit: int = 500) -> List[str]:
+        """Users with an entry started at or after a time, most recently started first"""
+
+    # Idempotency keys
+    @abstractmethod
+    def reserve_idempotency_key(self, user_id: str, key: str, fingerprint: str,
+                                expires_at: datetime) -> Optional[Dict]:
+        """
+        Claim a key for a request about to run
+
+        Returns None if the caller won the key and must run the request, else
+        what is stored for it; status IDEMPOTENCY_PENDING means another request
+        holding the key has not finished. A claim lapses at expires_at.
+        """
+
+    @abstractmethod
+    def release_idempotency_key(self, user_id: str, key: str) -> None:
+        """Drop an unfinished claim so the request can be retried"""
+
+    @abstractmethod
+    def save_idempotent_response(self, user_id: str, key: str, response: Dict,
+                                 expires_at: datetime, max_keys: int) -> None:
+        """
+        Record the response to replay for a key, dropping expired keys and the user's surplus keys
+
+        Only completed keys count towards max_keys; claims still pending are
+        never dropped, or a retry of one would run its request twice.
+        """
+
+    @abstractmethod
+    def purge_idempotency_keys(self, now: datetime) -> int:
+        """Delete expired keys, returning the number removed"""
+
+    # Leases
+    @abstractmethod
+    def acquire_lease(self, name: str, owner: str, seconds: float) -> bool:
+        """Take or renew a named lease unless another owner holds an unexpired one"""
+
+    @abstractmethod
+    def release_lease(self, name: str, owner: str) -> None:
+        """Give up a lease held by owner"""
+
+    def close(self) -> None:
+        """Release any resources held by the repository"""
+
+
+class SQLiteRepository(UserRepository):
+    """
+    SQLite implementation of the repository running in WAL mode
+
+    A single connection is shared between threads and guarded by a lock.
+    Writes issued inside transaction() are committed together, so a request
+    that touches an entry and a profile costs one commit instead of two.
+    Entries are upserted row by row, so persisting a session change writes
+    that one row rather than the user's history.
+    Exports page through entries on a read-only connection of their own,
+    so their batches never hold the lock request handlers wait on.
+
+    Several processes may open the same database file; WAL lets readers
+    proceed while one writer holds the lock, and busy writers wait up to
+    busy_timeout seconds instead of failing.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            preferences TEXT NOT NULL DEFAULT '{}',
+            is_demo INTEGER NOT NULL DEFAULT 0,
+            data_version INTEGER NOT NULL DEFAULT 0,
+            entries_deleted_version INTEGER
+        );
+
+        CREATE TABLE IF NOT EXISTS profiles (
+            user_id TEXT PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+            data TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS time_entries (
+            session_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+            start_time TEXT NOT NULL,
+            end_time TEXT,
+            main_tag TEXT NOT NULL,
+            sub_tag TEXT,
+            task_description TEXT NOT NULL DEFAULT '',
+            status TEXT NOT NULL,
+            confidence TEXT NOT NULL,
+            user_notes TEXT NOT NULL DEFAULT '',
+            interruptions INTEGER NOT NULL DEFAULT 0,
+            energy_level INTEGER NOT NULL DEFAULT 3,
+            focus_quality INTEGER NOT NULL DEFAULT 3,
+            estimated_minutes INTEGER,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_time_entries_user_start_session
+            ON time_entries(user_id, start_time, session_id);
+
+        CREATE INDEX IF NOT EXISTS idx_time_entries_user_tag_start_session
+            ON time_entries(user_id, main_tag, start_time, session_id);
+
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            user_id TEXT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+            idempotency_key TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            body TEXT NOT NULL,
+            expires_at TEXT NOT NULL,
+            PRIMARY KEY (user_id, idempotency_key)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires
+            ON idempotency_keys(expires_at);
+
+        CREATE INDEX IF NOT EXISTS idx_time_entries_open
+            ON time_entries(start_time) WHERE status IN ('active', 'paused');
+
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at TEXT NOT NULL
+        );
+    """
+
+    ENTRY_COLUMNS = (
+        "session_id", "user_id", "start_time", "end_time", "main_tag", "sub_tag",
+        "task_description", "status", "confidence", "user_notes", "interruptions",
+        "energy_level", "focus_quality", "estimated_minutes", "version"
+    )
+
+    def __init__(self, db_path: str, busy_timeout: float = 10.0):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._conn = sqlite3.connect(
+            db_path, timeout=busy_timeout, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(self.SCHEMA)
+        self._migrate()
+
+        # WAL readers see the last commit without waiting for writers; an
+        # in-memory database exists only on its own connection
+        self._reader_lock = threading.Lock()
+        if db_path == ":memory:":
+            self._reader, self._reader_lock = self._conn, self._lock
+        else:
+            self._reader = sqlite3.connect(
+                Path(db_path).resolve().as_uri() + "?mode=ro", uri=True,
+                timeout=busy_timeout, check_same_thread=False, isolation_level=None
+            )
+            self._reader.row_factory = sqlite3.Row
+
+        columns = ", ".join(self.ENTRY_COLUMNS)
+        placeholders = ", ".join("?" for _ in self.ENTRY_COLUMNS)
+        # An upsert rather than INSERT OR REPLACE, whose implicit delete
+        # would not reach the entry count triggers
+        updates = ", ".join(f"{column} = excluded.{column}" for column in self.ENTRY_COLUMNS[1:])
+        self._upsert_entry_sql = (
+            f"INSERT INTO time_entries ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT(session_id) DO UPDATE SET {updates}"
+        )
+
+    def _migrate(self) -> None:
+        """Bring databases created by older versions up to the current schema"""
+        user_columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(users)")}
+        if "data_version" not in user_columns:
+            self._conn.execute(
+                "ALTER TABLE users ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0"
+            )
+        if "entries_deleted_version" not in user_columns:
+            self._conn.execute("ALTER TABLE users ADD COLUMN entries_deleted_version INTEGER")
+        entry_columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(time_entries)")}
+        if "version" not in entry_columns:
+            self._conn.execute(
+                "ALTER TABLE time_entries ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+            )
+        # Created here rather than in SCHEMA, which older databases run before the column exists
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_time_entries_user_version ON time_entries(user_id, version)"
+        )
+        # Superseded by idx_time_entries_user_start_session, which also orders ties
+        self._conn.execute("DROP INDEX IF EXISTS idx_time_entries_user_start")
+        # The entry count is kept by triggers, so reading it never scans the
+        # table; it is seeded in the transaction that creates the triggers
+        with self.transaction():
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO counters (name, value) "
+                "SELECT 'time_entries', COUNT(*) FROM time_entries"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS time_entries_counted AFTER INSERT ON time_entries "
+                "BEGIN UPDATE counters SET value = value + 1 WHERE name = 'time_entries'; END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS time_entries_uncounted AFTER DELETE ON time_entries "
+                "BEGIN UPDATE counters SET value = value - 1 WHERE name = 'time_entries'; END"
+            )
+
+    @contextmanager
+    def transaction(self) -> Iterator["SQLiteRepository"]:
+        """Group writes into one commit; nested calls join the outer transaction"""
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _read(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """_query on the read-only connection"""
+        with self._reader_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    # Users
+    def create_user(self, user: Dict) -> None:
+        with self.transaction():
+            self._conn.execute(
+                "INSERT INTO users (user_id, username, created_at, preferences, is_demo) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    user["user_id"],
+                    user["username"],
+                    user["created_at"],
+                    json.dumps(user.get("preferences") or {}),
+                    1 if user.get("is_demo") else 0
+                )
+            )
+
+    def get_user(self, user_id: str) -> Optional[Dict]:
+        rows = self._query("SELECT * FROM users WHERE user_id = ?", (user_id,))
+        if not rows:
+            return None
+
+        row = rows[0]
+        user = {
+            "user_id": row["user_id"],
+            "username": row["username"],
+            "created_at": row["created_at"],
+            "preferences": json.loads(row["preferences"])
+        }
+        if row["is_demo"]:
+            user["is_demo"] = True
+        return user
+
+    def user_exists(self, user_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM users WHERE user_id = ?", (user_id,)))
+
+    def delete_user(self, user_id: str) -> bool:
+        with self.transaction():
+            cursor = self._conn.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+        return cursor.rowcount > 0
+
+    def count_users(self) -> int:
+        return self._query("SELECT COUNT(*) FROM users")[0][0]
+
+    def get_data_version(self, user_id: str) -> Optional[int]:
+        rows = self._query("SELECT data_version FROM users WHERE user_id = ?", (user_id,))
+        return rows[0][0] if rows else None
+
+    def bump_data_version(self, user_id: str, expected: Optional[int] = None) -> int:
+        with self.transaction():
+            if expected is None:
+                self._conn.execute(
+                    "UPDATE users SET data_version = data_version + 1 WHERE user_id = ?",
+                    (user_id,)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE users SET data_version = data_version + 1 "
+                    "WHERE user_id = ? AND data_version = ?",
+                    (user_id, expected)
+                )
+                if cursor.rowcount == 0:
+                    raise VersionConflict(user_id, expected, self.get_data_version(user_id))
+            rows = self._conn.execute(
+                "SELECT data_version FROM users WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        return rows[0][0] if rows else 0
+
+    # Profiles
+    def get_profile(self, user_id: str) -> Optional[Dict]:
+        rows = self._query("SELECT data FROM profiles WHERE user_id = ?", (user_id,))
+        return json.loads(rows[0]["data"]) if rows else None
+
+    def save_profile(self, user_id: str, profile: Dict) -> None:
+        with self.transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles (user_id, data) VALUES (?, ?)",
+                (user_id, json.dumps(profile))
+            )
+
+    # Time entries
+    @staticmethod
+    def _entry_to_row(user_id: str, entry: TimeEntry, version: int) -> tuple:
+        return (
+            entry.session_id,
+            user_id,
+            entry.start_time.isoformat(),
+            entry.end_time.isoformat() if entry.end_time else None,
+            entry.tag.main_tag,
+            entry.tag.sub_tag,
+            entry.task_description,
+            entry.status.value,
+            entry.confidence.value,
+            entry.user_notes,
+            entry.interruptions,
+            entry.energy_level,
+            entry.focus_quality,
+            entry.estimated_minutes,
+            version
+        )
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> TimeEntry:
+        return TimeEntry(
+            session_id=row["session_id"],
+            start_time=datetime.fromisoformat(row["start_time"]),
+            tag=SessionTag(main_tag=row["main_tag"], sub_tag=row["sub_tag"]),
+            task_description=row["task_description"],
+            end_time=datetime.fromisoformat(row["end_time"]) if row["end_time"] else None,
+            status=SessionStatus(row["status"]),
+            confidence=ConfidenceLevel(row["confidence"]),
+            user_notes=row["user_notes"],
+            interruptions=row["interruptions"],
+            energy_level=row["energy_level"],
+            focus_quality=row["focus_quality"],
+            estimated_minutes=row["estimated_minutes"]
+        )
+
+    def load_entries(self, user_id: str) -> List[TimeEntry]:
+        rows = self._query(
+            "SELECT * FROM time_entries WHERE user_id = ? ORDER BY start_time, session_id",
+            (user_id,)
+        )
+        return [self._row_to_entry(row) for row in rows]
+
+    def iter_entries(self, user_id: str, batch_size: int = 500) -> Iterator[List[TimeEntry]]:
+        """
+        Page through a user's entries with keyset queries
+
+        Each batch is a separate short query resuming after the last
+        (start_time, session_id) seen, so no cursor or lock is held between
+        batches and memory stays bounded by batch_size. Batches run on the
+        read-only connection.
+        """
+        rows = self._read(
+            "SELECT * FROM time_entries WHERE user_id = ? "
+            "ORDER BY start_time, session_id LIMIT ?",
+            (user_id, batch_size)
+        )
+        while rows:
+            yield [self._row_to_entry(row) for row in rows]
+            if len(rows) < batch_size:
+                return
+            last = rows[-1]
+            rows = self._read(
+                "SELECT * FROM time_entries WHERE user_id = ? "
+                "AND (start_time, session_id) > (?, ?) "
+                "ORDER BY start_time, session_id LIMIT ?",
+                (user_id, last["start_time"], last["session_id"], batch_size)
+            )
+
+    def list_entries(self, user_id: str, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None, main_tag: Optional[str] = None,
+                     sub_tag: Optional[str] = None, status: Optional[str] = None,
+                     after: Optional[Tuple[str, str]] = None, limit: int = 50) -> List[TimeEntry]:
+        """
+        Keyset page over idx_time_entries_user_start_session
+
+        The index seek to the range start or the cursor makes any page cost
+        the same, however long the history before it.
+        """
+        clauses = ["user_id = ?"]
+        params: list = [user_id]
+        if start is not None:
+            clauses.append("start_time >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            clauses.append("start_time < ?")
+            params.append(end.isoformat())
+        if after is not None:
+            clauses.append("(start_time, session_id) > (?, ?)")
+            params.extend(after)
+        if main_tag is not None:
+            clauses.append("main_tag = ?")
+            params.append(main_tag)
+        if sub_tag is not None:
+            clauses.append("sub_tag = ?")
+            params.append(sub_tag)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        params.append(limit)
+        rows = self._query(
+            f"SELECT * FROM time_entries WHERE {' AND '.join(clauses)} "
+            "ORDER BY start_time, session_id LIMIT ?",
+            tuple(params)
+        )
+        return [self._row_to_entry(row) for row in rows]
+
+    def get_entry(self, user_id: str, session_id: str) -> Optional[TimeEntry]:
+        rows = self._query(
+            "SELECT * FROM time_entries WHERE session_id = ? AND user_id = ?",
+            (session_id, user_id)
+        )
+        return self._row_to_entry(rows[0]) if rows else None
+
+    def save_entries(self, user_id: str, entries: Iterable[TimeEntry], version: int = 0) -> None:
+        rows = [self._entry_to_row(user_id, entry, version) for entry in entries]
+        if not rows:
+            return
+        with self.transaction():
+            self._conn.executemany(self._upsert_entry_sql, rows)
+
+    def get_entry_changes(self, user_id: str, since_version: int) -> Optional[List[TimeEntry]]:
+        """Served by idx_time_entries_user_version, so the cost follows the changes, not the history"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entries_deleted_version FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None or (row[0] is not None and since_version <= row[0]):
+                return None
+            rows = self._conn.execute(
+                "SELECT * FROM time_entries WHERE user_id = ? AND version > ? "
+                "ORDER BY start_time, session_id",
+                (user_id, since_version)
+            ).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    def delete_entries(self, user_id: str) -> int:
+        with self.transaction():
+            # Readers that saw the deleted entries can no longer catch up incrementally
+            self._conn.execute(
+                "UPDATE users SET entries_deleted_version = data_version WHERE user_id = ?", (user_id,)
+            )
+            cursor = self._conn.execute("DELETE FROM time_entries WHERE user_id = ?", (user_id,))
+        return cursor.rowcount
+
+    def count_entries(self) -> int:
+        return self._query("SELECT value FROM counters WHERE name = 'time_entries'")[0][0]
+
+    def find_open_entries(self, started_before: datetime, limit: int = 500) -> List[Tuple[str, TimeEntry]]:
+        """Served by the partial index over open sessions, however many are closed"""
+        rows = self._query(
+            "SELECT * FROM time_entries WHERE status IN ('active', 'paused') AND start_time < ? "
+            "ORDER BY start_time LIMIT ?",
+            (started_before.isoformat(), limit)
+        )
+        return [(row["user_id"], self._row_to_entry(row)) for row in rows]
+
+    def find_recent_users(self, started_since: datetime, limit: int = 500) -> List[str]:
+        """
+        One index probe per user for their latest start, so the cost follows
+        the number of users rather than the number of entries
+        """
+        rows = self._read(
+            "SELECT user_id FROM (SELECT user_id, (SELECT MAX(start_time) FROM time_entries "
+            "WHERE time_entries.user_id = users.user_id) AS latest FROM users) "
+            "WHERE latest >= ? ORDER BY latest DESC LIMIT ?",
+            (started_since.isoformat(), limit)
+        )
+        return [row["user_id"] for row in rows]
+
+    # Idempotency keys
+    def reserve_idempotency_key(self, user_id: str, key: str, fingerprint: str,
+                                expires_at: datetime) -> Optional[Dict]:
+        now = datetime.now().isoformat()
+        with self.transaction():
+            self._conn.execute(
+                "DELETE FROM idempotency_keys WHERE user_id = ? AND idempotency_key = ? AND expires_at <= ?",
+                (user_id, key, now)
+            )
+            # The primary key lets exactly one of several concurrent requests insert
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO idempotency_keys "
+                "(user_id, idempotency_key, fingerprint, status, body, expires_at) "
+                "VALUES (?, ?, ?, ?, '', ?)",
+                (user_id, key, fingerprint, IDEMPOTENCY_PENDING, expires_at.isoformat())
+            ).rowcount
+            if inserted:
+                return None
+            rows = self._query(
+                "SELECT fingerprint, status, body FROM idempotency_keys "
+                "WHERE user_id = ? AND idempotency_key = ?",
+                (user_id, key)
+            )
+        return dict(rows[0])
+
+    def release_idempotency_key(self, user_id: str, key: str) -> None:
+        with self.transaction():
+            self._conn.execute(
+                "DELETE FROM idempotency_keys WHERE user_id = ? AND idempotency_key = ? AND status = ?",
+                (user_id, key, IDEMPOTENCY_PENDING)
+            )
+
+    def save_idempotent_response(self, user_id: str, key: str, response: Dict,
+                                 expires_at: datetime, max_keys: int) -> None:
+        """Keys expire after their TTL; beyond max_keys of a user the first to expire are dropped"""
+        with self.transaction():
+            self.purge_idempotency_keys(datetime.now())
+            self._conn.execute(
+                "INSERT OR REPLACE INTO idempotency_keys "
+                "(user_id, idempotency_key, fingerprint, status, body, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, key, response["fingerprint"], response["status"], response["body"],
+                 expires_at.isoformat())
+            )
+            # Every key is stored with the same TTL, so the first to expire are
+            # the oldest; other users' keys are left alone
+            self._conn.execute(
+                "DELETE FROM idempotency_keys WHERE user_id = ? AND idempotency_key IN ("
+                "SELECT idempotency_key FROM idempotency_keys WHERE user_id = ? AND status != ? "
+                "ORDER BY expires_at DESC, rowid DESC LIMIT -1 OFFSET ?)",
+                (user_id, user_id, IDEMPOTENCY_PENDING, max_keys)
+            )
+
+    def purge_idempotency_keys(self, now: datetime) -> int:
+        with self.transaction():
+            return self._conn.execute(
+                "DELETE FROM idempotency_keys WHERE expires_at <= ?", (now.isoformat(),)
+            ).rowcount
+
+    # Leases
+    def acquire_lease(self, name: str, owner: str, seconds: float) -> bool:
+        now = datetime.now()
+        with self.transaction():
+            self._conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                (name, owner, (now + timedelta(seconds=seconds)).isoformat(), now.isoformat())
+            )
+            row = self._conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row["owner"] == owner
+
+    def release_lease(self, name: str, owner: str) -> None:
+        with self.transaction():
+            self._conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._reader is not self._conn:
+                with self._reader_lock:
+                    self._reader.close()
+            self._conn.close()
@@ -0,0 +1,131 @@
+"""
+FlowState Benchmark Helpers
+Synthetic data, timing and server processes shared by the benchmark scripts
+
+Importing this module puts the repository root and backend/ at the front
+of sys.path, so the scripts import the application's modules rather than
+their namesakes in this directory (serialization).
+"""
+
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND = ROOT / "backend"
+SERVER = BACKEND / "server.py"
+sys.path[:0] = [str(BACKEND), str(ROOT)]
+
+from enhanced_time_tracker import (
+    ConfidenceLevel, MultiSessionTimeTracker, SessionStatus, SessionTag, TimeEntry
+)
+
+TAGS = ["work", "learning", "admin", "exercise", "creative", "wellness"]
+SUB_TAGS = [None, "meeting", "review", "deep-work", "email", "reading"]
+
+
+def history_entries(count: int, days: int = 365) -> List[TimeEntry]:
+    """`count` completed sessions spread over the last `days` days"""
+    rng = random.Random(42)
+    start = datetime.now() - timedelta(days=days)
+    step = timedelta(days=days - 1) / max(count, 1)
+    return [
+        TimeEntry(
+            session_id=f"session-{i:08d}",
+            start_time=start + step * i,
+            tag=SessionTag(rng.choice(TAGS), rng.choice(SUB_TAGS)),
+            task_description=f"Task {i}",
+            end_time=start + step * i + timedelta(minutes=rng.randint(5, 90)),
+            status=SessionStatus.COMPLETED,
+            confidence=ConfidenceLevel.MODERATE,
+            interruptions=rng.randint(0, 3),
+            energy_level=rng.randint(1, 5),
+            focus_quality=rng.randint(1, 5),
+            estimated_minutes=rng.choice([None, 15, 30, 60])
+        )
+        for i in range(count)
+    ]
+
+
+def build_tracker(count: int, days: int = 365) -> MultiSessionTimeTracker:
+    """A tracker holding history_entries(count, days)"""
+    tracker = MultiSessionTimeTracker("benchmark_user")
+    tracker.import_entries(history_entries(count, days))
+    return tracker
+
+
+def best_of(repeat: int, func) -> float:
+    """Best wall time in milliseconds over `repeat` runs"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url: str, timeout: float = 30.0, interval: float = 0.1) -> None:
+    deadline = time.monotonic() + timeout
+    with httpx.Client(timeout=1.0) as client:
+        while time.monotonic() < deadline:
+            try:
+                if client.get(f"{base_url}/api/health").status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(interval)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+
+def start_server(data_dir: str, port: int, workers: int = 1, **env) -> subprocess.Popen:
+    """Spawn backend/server.py on localhost with its database in `data_dir`"""
+    env = dict(
+        os.environ,
+        FLOWSTATE_PORT=str(port),
+        FLOWSTATE_WORKERS=str(workers),
+        FLOWSTATE_DB_PATH=os.path.join(data_dir, "flowstate.db"),
+        **env
+    )
+    return subprocess.Popen(
+        [sys.executable, str(SERVER)], env=env, cwd=str(BACKEND),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.terminate()
+    server.wait(timeout=30)
+
+
+@contextmanager
+def running_server(workers: int = 1, data_dir: str = None) -> Iterator[str]:
+    """
+    A server with rate limiting off, on a free port; yields its base URL
+
+    Without a data_dir the database lives in a temporary directory.
+    """
+    with tempfile.TemporaryDirectory() as scratch:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(data_dir or scratch, port, workers, FLOWSTATE_RATE_LIMITING="0")
+        try:
+            wait_until_ready(base_url)
+            yield base_url
+        finally:
+            stop_server(server)
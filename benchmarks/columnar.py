@@ -0,0 +1,114 @@
+"""
+FlowState Columnar Analytics Benchmark
+Compares per-entry aggregation loops with NumPy group-bys over EntryColumns
+
+For synthetic histories of each size this measures:
+- convert: building EntryColumns from TimeEntry objects
+- tag/day rollups: the tracker's per-entry RollupStore against one
+  group-by over (day, tag) keys
+- pattern analysis: PatternAnalyzer's per-entry loops against
+  analyze_column_patterns on prebuilt columns
+Column timings exclude the conversion, which is reported on its own.
+Requires NumPy.
+
+Usage:
+    python benchmarks/columnar.py --sizes 10000,100000,1000000 --repeat 3
+"""
+
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+
+from _common import SUB_TAGS, TAGS, best_of
+from enhanced_time_tracker import ConfidenceLevel, RollupStore, SessionStatus, SessionTag, TimeEntry
+from src.core.columnar import EntryColumns, np, numpy_available
+from src.core.pattern_analyzer import PatternAnalyzer
+
+def build_entries(count: int, days: int = 365):
+    """`count` completed sessions spread over the last `days` days"""
+    rng = random.Random(42)
+    start = datetime.now() - timedelta(days=days)
+    step = timedelta(days=days) / count
+    return [
+        TimeEntry(
+            session_id=f"session-{i:08d}",
+            start_time=start + step * i,
+            tag=SessionTag(rng.choice(TAGS), rng.choice(SUB_TAGS)),
+            end_time=start + step * i + timedelta(minutes=rng.randint(5, 120)),
+            status=SessionStatus.COMPLETED,
+            confidence=rng.choice([ConfidenceLevel.HIGH, ConfidenceLevel.MODERATE]),
+            interruptions=rng.randint(0, 4),
+            energy_level=rng.randint(1, 5),
+            focus_quality=rng.randint(1, 5)
+        )
+        for i in range(count)
+    ]
+
+
+def loop_rollups(entries) -> RollupStore:
+    rollups = RollupStore()
+    for entry in entries:
+        rollups.add(entry)
+    return rollups
+
+
+def column_rollups(columns: EntryColumns):
+    keys, groups = np.unique(columns.day * len(columns.tags) + columns.tag_id, return_inverse=True)
+    return keys, columns.group_by(groups, len(keys))
+
+
+def measure(size: int, repeat: int, timeframe_days: int) -> dict:
+    entries = build_entries(size)
+    convert = best_of(repeat, lambda: EntryColumns.from_entries(entries))
+    columns = EntryColumns.from_entries(entries)
+    loops = PatternAnalyzer(columnar_min_entries=sys.maxsize)
+    vectorized = PatternAnalyzer()
+
+    return {
+        "entries": size,
+        "convert_ms": convert,
+        "column_bytes": sum(getattr(columns, name).nbytes for name in EntryColumns.__slots__ if name != "tags"),
+        "tag_day_rollups": {
+            "loop_ms": best_of(repeat, lambda: loop_rollups(entries)),
+            "columns_ms": best_of(repeat, lambda: column_rollups(columns))
+        },
+        "pattern_analysis": {
+            "loop_ms": best_of(repeat, lambda: loops.analyze_time_patterns(entries, timeframe_days)),
+            "columns_ms": best_of(repeat, lambda: vectorized.analyze_column_patterns(columns, timeframe_days))
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="Comma-separated history sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    parser.add_argument("--timeframe-days", type=int, default=90,
+                        help="Window of the pattern analysis")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this file")
+    args = parser.parse_args()
+
+    if not numpy_available():
+        parser.error("NumPy is not installed; columnar analytics are unavailable")
+
+    results = []
+    print(f"{'entries':>9} {'workload':<18} {'loop ms':>10} {'columns ms':>11} {'speedup':>8} "
+          f"{'convert ms':>11}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        result = measure(size, args.repeat, args.timeframe_days)
+        results.append(result)
+        for workload in ("tag_day_rollups", "pattern_analysis"):
+            timings = result[workload]
+            print(f"{size:>9} {workload:<18} {timings['loop_ms']:>10.1f} {timings['columns_ms']:>11.2f} "
+                  f"{timings['loop_ms'] / timings['columns_ms']:>7.1f}x {result['convert_ms']:>11.1f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
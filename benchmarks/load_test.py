@@ -0,0 +1,267 @@
+"""
+FlowState Load Test
+Drives the REST API with concurrent synthetic users and reports latency per endpoint
+
+Each synthetic user creates an account, then repeats a session cycle:
+start a session, optionally pause and resume it, read the dashboard
+(active sessions, daily summary, tags and now and then insights or
+patterns) and end the session with ratings. Every user draws its choices
+from its own seeded random generator, so a given --seed and --cycles
+always produce the same request mix.
+
+Targets:
+- in-process (default): the FastAPI app is imported and called through
+  ASGI on a temporary database, with no sockets involved
+- --spawn: backend/server.py is started on a free localhost port
+- --url: an already running server
+
+Throughput and p50/p95/p99 latency are reported per endpoint template.
+
+Usage:
+    python benchmarks/load_test.py --users 50 --cycles 20
+    python benchmarks/load_test.py --spawn --users 100 --duration 30 --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import ExitStack, asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from _common import running_server
+
+MAIN_TAGS = {
+    "work": ["coding", "review", "meetings", "email"],
+    "learning": ["reading", "course", "practice"],
+    "personal": ["admin", "planning"]
+}
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(len(ordered) * fraction))
+    return ordered[rank - 1]
+
+
+class LatencyRecorder:
+    """Latencies and failures per endpoint template"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def report(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        results = {}
+        for endpoint in sorted(self.latencies):
+            ordered = sorted(self.latencies[endpoint])
+            results[endpoint] = {
+                "requests": len(ordered),
+                "errors": self.errors[endpoint],
+                "rps": len(ordered) / elapsed,
+                "p50_ms": percentile(ordered, 0.50) * 1000,
+                "p95_ms": percentile(ordered, 0.95) * 1000,
+                "p99_ms": percentile(ordered, 0.99) * 1000,
+                "max_ms": ordered[-1] * 1000
+            }
+        return results
+
+
+class SyntheticUser:
+    """One user cycling through sessions and dashboard reads"""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: LatencyRecorder, seed: int,
+                 think_seconds: float):
+        self.client = client
+        self.recorder = recorder
+        self.random = random.Random(seed)
+        self.think_seconds = think_seconds
+        self.user_id: Optional[str] = None
+
+    async def call(self, endpoint: str, method: str, path: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(endpoint, time.perf_counter() - started, ok=False)
+            raise
+        self.recorder.record(endpoint, time.perf_counter() - started, ok=response.status_code < 400)
+        return response
+
+    async def think(self) -> None:
+        if self.think_seconds:
+            await asyncio.sleep(self.random.uniform(0, 2 * self.think_seconds))
+
+    async def sign_up(self, index: int) -> None:
+        response = await self.call("POST /api/users", "POST", "/api/users",
+                                   json={"username": f"load-user-{index}"})
+        response.raise_for_status()
+        self.user_id = response.json()["user_id"]
+
+    async def cycle(self) -> None:
+        base = f"/api/users/{self.user_id}"
+        main_tag = self.random.choice(list(MAIN_TAGS))
+        started = await self.call(
+            "POST /api/users/{user_id}/sessions/start", "POST", f"{base}/sessions/start",
+            json={
+                "main_tag": main_tag,
+                "sub_tag": self.random.choice(MAIN_TAGS[main_tag]),
+                "estimated_minutes": self.random.choice([15, 25, 45, 60]),
+                "energy_level": self.random.randint(1, 5)
+            }
+        )
+        if started.status_code >= 400:
+            return
+        session_id = started.json()["session_id"]
+        await self.think()
+
+        if self.random.random() < 0.3:
+            await self.call("POST /api/users/{user_id}/sessions/{session_id}/pause", "POST",
+                            f"{base}/sessions/{session_id}/pause")
+            await self.think()
+            await self.call("POST /api/users/{user_id}/sessions/{session_id}/resume", "POST",
+                            f"{base}/sessions/{session_id}/resume")
+
+        await self.call("GET /api/users/{user_id}/sessions/active", "GET", f"{base}/sessions/active")
+        await self.call("GET /api/users/{user_id}/summary/daily", "GET", f"{base}/summary/daily")
+        await self.call("GET /api/users/{user_id}/tags", "GET", f"{base}/tags")
+        roll = self.random.random()
+        if roll < 0.2:
+            await self.call("GET /api/users/{user_id}/insights", "GET", f"{base}/insights")
+        elif roll < 0.3:
+            await self.call("GET /api/users/{user_id}/patterns", "GET", f"{base}/patterns")
+        await self.think()
+
+        await self.call(
+            "POST /api/users/{user_id}/sessions/end", "POST", f"{base}/sessions/end",
+            json={
+                "session_id": session_id,
+                "focus_quality": self.random.randint(1, 5),
+                "energy_level": self.random.randint(1, 5),
+                "satisfaction": self.random.randint(1, 5),
+                "interruptions": self.random.randint(0, 3)
+            }
+        )
+
+
+async def run_users(client: httpx.AsyncClient, args: argparse.Namespace,
+                    recorder: LatencyRecorder) -> float:
+    """Run every synthetic user to completion; returns elapsed seconds"""
+    users = [SyntheticUser(client, recorder, args.seed + index, args.think / 1000)
+             for index in range(args.users)]
+    await asyncio.gather(*(user.sign_up(index) for index, user in enumerate(users)))
+
+    started = time.monotonic()
+    deadline = started + args.duration if args.duration else None
+
+    async def drive(user: SyntheticUser) -> None:
+        completed = 0
+        while (completed < args.cycles) if deadline is None else (time.monotonic() < deadline):
+            await user.cycle()
+            completed += 1
+
+    await asyncio.gather(*(drive(user) for user in users))
+    return time.monotonic() - started
+
+
+@asynccontextmanager
+async def in_process_client(data_dir: str) -> AsyncIterator[httpx.AsyncClient]:
+    # The server reads its configuration at import time
+    os.environ["FLOWSTATE_DB_PATH"] = os.path.join(data_dir, "flowstate.db")
+    os.environ["FLOWSTATE_RATE_LIMITING"] = "0"
+    import server
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://flowstate", timeout=60.0) as client:
+        yield client
+
+
+@asynccontextmanager
+async def http_client(base_url: str, users: int) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        yield client
+
+
+async def run(args: argparse.Namespace, data_dir: str) -> Dict:
+    recorder = LatencyRecorder()
+    with ExitStack() as stack:
+        if args.url:
+            target, client_factory = args.url, http_client(args.url, args.users)
+        elif args.spawn:
+            target = stack.enter_context(running_server(args.workers, data_dir))
+            client_factory = http_client(target, args.users)
+        else:
+            target, client_factory = "in-process", in_process_client(data_dir)
+
+        async with client_factory as client:
+            elapsed = await run_users(client, args, recorder)
+
+    endpoints = recorder.report(elapsed)
+    total = sum(stats["requests"] for stats in endpoints.values())
+    return {
+        "target": target,
+        "users": args.users,
+        "seed": args.seed,
+        "elapsed_seconds": elapsed,
+        "requests": total,
+        "errors": sum(stats["errors"] for stats in endpoints.values()),
+        "rps": total / elapsed,
+        "endpoints": endpoints
+    }
+
+
+def print_report(results: Dict) -> None:
+    print(f"target {results['target']}, {results['users']} users, seed {results['seed']}: "
+          f"{results['requests']} requests in {results['elapsed_seconds']:.1f}s "
+          f"({results['rps']:.1f} req/s, {results['errors']} errors)")
+    print(f"{'endpoint':<54} {'requests':>8} {'errors':>6} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for endpoint, stats in results["endpoints"].items():
+        print(f"{endpoint:<54} {stats['requests']:>8} {stats['errors']:>6} {stats['rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+              f"{stats['max_ms']:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Base URL of a running server, e.g. http://127.0.0.1:8001")
+    target.add_argument("--spawn", action="store_true",
+                        help="Start backend/server.py on a free localhost port")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes with --spawn")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent synthetic users")
+    parser.add_argument("--cycles", type=int, default=10, help="Session cycles per user")
+    parser.add_argument("--duration", type=float, default=0.0,
+                        help="Run for this many seconds instead of a fixed number of cycles")
+    parser.add_argument("--think", type=float, default=0.0,
+                        help="Mean think time between steps, in milliseconds")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic users")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        results = asyncio.run(run(args, data_dir))
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
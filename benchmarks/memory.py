@@ -0,0 +1,135 @@
+"""
+FlowState Entry Memory Benchmark
+Compares bytes per entry of slotted TimeEntry and interned SessionTag with dict-based dataclasses
+
+Entries are loaded the way the server loads them, one JSON record at a
+time through from_dict, so every record brings its own tag strings. The
+retained memory of the loaded list is measured with tracemalloc for:
+- dict: the previous plain dataclasses, with a __dict__ per TimeEntry and
+  a separate SessionTag per entry
+- slots: TimeEntry as loaded today
+Datetimes and session ids are counted too, since they dominate what is
+left per entry.
+
+Usage:
+    python benchmarks/memory.py --entries 100000
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from enhanced_time_tracker import ConfidenceLevel, SessionStatus, SessionTag, TimeEntry
+
+TAGS = ["work", "learning", "admin", "exercise", "creative", "wellness"]
+SUB_TAGS = [None, "meeting", "review", "deep-work", "email", "reading"]
+
+
+@dataclass
+class DictSessionTag:
+    """SessionTag before slots and interning"""
+    main_tag: str
+    sub_tag: Optional[str] = None
+
+
+@dataclass
+class DictTimeEntry:
+    """TimeEntry before slots"""
+    session_id: str
+    start_time: datetime
+    tag: DictSessionTag
+    task_description: str = ""
+    end_time: Optional[datetime] = None
+    status: SessionStatus = SessionStatus.ACTIVE
+    confidence: ConfidenceLevel = ConfidenceLevel.MODERATE
+    user_notes: str = ""
+    interruptions: int = 0
+    energy_level: int = 3
+    focus_quality: int = 3
+    estimated_minutes: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DictTimeEntry":
+        entry = cls(
+            session_id=data["session_id"],
+            start_time=datetime.fromisoformat(data["start_time"]),
+            tag=DictSessionTag(main_tag=data["tag"]["main_tag"], sub_tag=data["tag"].get("sub_tag")),
+            task_description=data.get("task_description", ""),
+            status=SessionStatus(data.get("status", "active")),
+            confidence=ConfidenceLevel(data.get("confidence", "moderate")),
+            user_notes=data.get("user_notes", ""),
+            interruptions=data.get("interruptions", 0),
+            energy_level=data.get("energy_level", 3),
+            focus_quality=data.get("focus_quality", 3),
+            estimated_minutes=data.get("estimated_minutes")
+        )
+        if "end_time" in data:
+            entry.end_time = datetime.fromisoformat(data["end_time"])
+        return entry
+
+
+def build_records(count: int):
+    """`count` completed sessions as the JSON records they are stored as"""
+    rng = random.Random(42)
+    start = datetime.now() - timedelta(days=365)
+    step = timedelta(days=365) / count
+    records = []
+    for i in range(count):
+        begin = start + step * i
+        records.append(json.dumps(TimeEntry(
+            session_id=str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            start_time=begin,
+            tag=SessionTag(rng.choice(TAGS), rng.choice(SUB_TAGS)),
+            end_time=begin + timedelta(minutes=rng.randint(5, 120)),
+            status=SessionStatus.COMPLETED,
+            interruptions=rng.randint(0, 3),
+            energy_level=rng.randint(1, 5),
+            focus_quality=rng.randint(1, 5)
+        ).to_dict()))
+    return records
+
+
+def retained_bytes(records, entry_type) -> int:
+    """Memory still allocated after loading every record as an entry_type"""
+    gc.collect()
+    tracemalloc.start()
+    entries = [entry_type.from_dict(json.loads(record)) for record in records]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del entries
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000, help="Sessions to load")
+    args = parser.parse_args()
+
+    records = build_records(args.entries)
+    # Tags seen before the measurement, as in a server that has been running
+    TimeEntry.from_dict(json.loads(records[0]))
+
+    print(f"{args.entries} entries")
+    print(f"{'layout':<8} {'bytes/entry':>12} {'entries/GiB':>12}")
+    results = {}
+    for name, entry_type in (("dict", DictTimeEntry), ("slots", TimeEntry)):
+        results[name] = retained_bytes(records, entry_type) / args.entries
+        print(f"{name:<8} {results[name]:>12.0f} {2 ** 30 / results[name]:>12,.0f}")
+    print(f"saved {results['dict'] - results['slots']:.0f} bytes per entry "
+          f"({1 - results['slots'] / results['dict']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
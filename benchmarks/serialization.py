@@ -0,0 +1,60 @@
+"""
+FlowState Serialization Benchmark
+Compares FastAPI's default response path with the fast serializers
+
+For a synthetic user with a large history this measures the CPU time to
+turn the /export and /tags/analytics payloads into response bytes:
+- default: jsonable_encoder followed by JSONResponse rendering
+- fast: FastJSONResponse rendering (orjson when installed)
+It also compares per-entry encoding for streaming exports.
+
+Usage:
+    python benchmarks/serialization.py --entries 20000 --repeat 5
+"""
+
+import argparse
+import json
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from _common import best_of, build_tracker
+import serialization
+from serialization import FastJSONResponse, encode_entry
+
+def report(name: str, baseline: float, fast: float, size: int) -> None:
+    print(f"{name:<28} {baseline:>10.1f} {fast:>10.1f} {baseline - fast:>10.1f} "
+          f"{baseline / fast:>7.1f}x {size / 1024:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000, help="Sessions in the synthetic history")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    # Recent enough that the 30 day tag analytics cover the whole history
+    tracker = build_tracker(args.entries, days=25)
+    payloads = {
+        "/export": tracker.export_data(),
+        "/tags/analytics": tracker.get_tag_analytics(30),
+    }
+
+    backend = "orjson" if serialization.orjson is not None else "json (orjson not installed)"
+    print(f"{args.entries} entries, fast backend: {backend}")
+    print(f"{'payload':<28} {'default ms':>10} {'fast ms':>10} {'saved ms':>10} {'speedup':>8} {'KiB':>9}")
+
+    for name, payload in payloads.items():
+        baseline = best_of(args.repeat, lambda: JSONResponse(jsonable_encoder(payload)))
+        fast = best_of(args.repeat, lambda: FastJSONResponse(payload))
+        report(name, baseline, fast, len(FastJSONResponse(payload).body))
+
+    entries = tracker.entries
+    baseline = best_of(args.repeat, lambda: [json.dumps(entry.to_dict()) for entry in entries])
+    fast = best_of(args.repeat, lambda: [encode_entry(entry) for entry in entries])
+    size = sum(len(encode_entry(entry)) for entry in entries)
+    report("streamed entries", baseline, fast, size)
+
+
+if __name__ == "__main__":
+    main()
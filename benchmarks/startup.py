@@ -0,0 +1,159 @@
+"""
+FlowState Startup Benchmark
+Measures how quickly a fresh API process becomes ready to serve
+
+Two numbers are reported, each the median over several cold processes:
+- import time of backend/server.py, from `python -X importtime`, with the
+  slowest top-level imports listed so regressions can be traced
+- time to first request: from spawning `python backend/server.py` until
+  /api/health answers 200
+
+The server serves a frontend build: --build points at a real one, and
+otherwise a synthetic build of --build-mb megabytes of JavaScript and CSS
+is generated, so work that scales with the bundle shows up in the number.
+
+The process exits non-zero when the median time to first request exceeds
+the budget, so the check can run in CI.
+
+Usage:
+    python benchmarks/startup.py --runs 5 --budget 1.0
+    python benchmarks/startup.py --build frontend/build
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import BACKEND, ROOT, free_port, start_server, stop_server, wait_until_ready
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def make_build(directory: str, megabytes: float) -> None:
+    """A React-like build: index.html and hashed bundles of minified-looking code"""
+    rng = random.Random(7)
+    words = ["function", "return", "const", "props", "state", "useEffect", "className", "div",
+             "onClick", "session", "tag", "=>", "null", "{", "}", "(", ")", ";"]
+
+    def code(size: int) -> str:
+        return " ".join(rng.choice(words) for _ in range(size // 6))
+
+    files = {"index.html": "<!doctype html><html><body><div id=root></div></body></html>" + code(2000)}
+    bundles = max(1, int(megabytes * 4))
+    for i in range(bundles):
+        suffix = "css" if i % 4 == 3 else "js"
+        name = f"static/{suffix}/{i}.{rng.getrandbits(32):08x}.chunk.{suffix}"
+        files[name] = code(int(megabytes * 1024 * 1024 / bundles))
+    for relative, text in files.items():
+        path = os.path.join(directory, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+
+def isolated_env(data_dir: str) -> dict:
+    return dict(
+        os.environ,
+        FLOWSTATE_DB_PATH=os.path.join(data_dir, "flowstate.db"),
+        PYTHONDONTWRITEBYTECODE=""
+    )
+
+
+def measure_import(data_dir: str) -> tuple:
+    """Import server in a fresh interpreter; returns (total seconds, {module: cumulative seconds})"""
+    code = f"import sys; sys.path[:0] = [{str(ROOT)!r}, {str(BACKEND)!r}]; import server"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=isolated_env(data_dir), cwd=str(BACKEND), capture_output=True, text=True, check=True
+    )
+
+    total = 0.0
+    top_level = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, module = match.groups()
+        depth = len(indent) // 2
+        if module == "server":
+            total = int(cumulative) / 1e6
+        elif depth == 1:
+            # Direct imports of server.py
+            top_level[module] = int(cumulative) / 1e6
+    return total, top_level
+
+
+def measure_first_request(data_dir: str, build_dir: str, timeout: float = 30.0) -> float:
+    """Seconds from process spawn until /api/health answers 200"""
+    port = free_port()
+    started = time.perf_counter()
+    server = start_server(data_dir, port, PYTHONDONTWRITEBYTECODE="", FLOWSTATE_FRONTEND_BUILD=build_dir)
+    try:
+        wait_until_ready(f"http://127.0.0.1:{port}", timeout, interval=0.005)
+        return time.perf_counter() - started
+    finally:
+        stop_server(server)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Cold processes per measurement")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="Maximum median seconds to first request")
+    parser.add_argument("--build", help="Frontend build directory to serve (default: synthetic)")
+    parser.add_argument("--build-mb", type=float, default=5.0, help="Size of the synthetic build")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        build_dir = args.build
+        if build_dir is None:
+            build_dir = os.path.join(data_dir, "build")
+            make_build(build_dir, args.build_mb)
+        else:
+            build_dir = os.path.abspath(build_dir)
+
+        # One warm-up run so bytecode caches exist, as on a deployed image
+        measure_import(data_dir)
+
+        imports = [measure_import(data_dir) for _ in range(args.runs)]
+        ready = [measure_first_request(data_dir, build_dir) for _ in range(args.runs)]
+
+    import_median = statistics.median(total for total, _ in imports)
+    ready_median = statistics.median(ready)
+    modules = {}
+    for _, top_level in imports:
+        for module, seconds in top_level.items():
+            modules.setdefault(module, []).append(seconds)
+    slowest = sorted(((statistics.median(v), m) for m, v in modules.items()), reverse=True)[:args.top]
+
+    print(f"import server:          {import_median * 1000:8.1f} ms (median of {args.runs})")
+    print(f"time to first request:  {ready_median * 1000:8.1f} ms (budget {args.budget * 1000:.0f} ms)")
+    print("slowest imports of server.py:")
+    for seconds, module in slowest:
+        print(f"  {seconds * 1000:8.1f} ms  {module}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({
+                "import_seconds": import_median,
+                "first_request_seconds": ready_median,
+                "budget_seconds": args.budget,
+                "slowest_imports": {module: seconds for seconds, module in slowest}
+            }, f, indent=2)
+
+    if ready_median > args.budget:
+        print("FAIL: startup budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+FlowState Worker Scaling Benchmark
+Measures API throughput as the number of uvicorn worker processes grows
+
+For each worker count a fresh server is started on a temporary database,
+a pool of client processes drives a session start/read/end mix against it,
+and the aggregate requests per second are reported together with the
+scaling efficiency relative to a single worker. Each user first imports
+--history completed sessions, so workers catching up on each other's
+writes pay for it the way they would with real histories.
+
+Usage:
+    python benchmarks/worker_scaling.py --workers 1,2,4 --duration 10 --history 2000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from _common import running_server
+
+
+def history_sessions(count: int) -> list:
+    """`count` completed sessions over the past year, for the batch import endpoint"""
+    start = datetime.now() - timedelta(days=365)
+    step = timedelta(days=364) / max(count, 1)
+    return [
+        {
+            "main_tag": ("work", "learning", "admin")[i % 3],
+            "start_time": (start + step * i).isoformat(),
+            "end_time": (start + step * i + timedelta(minutes=30)).isoformat()
+        }
+        for i in range(count)
+    ]
+
+
+async def run_user(client: httpx.AsyncClient, deadline: float, history: list) -> int:
+    """One synthetic user repeatedly starting, reading and ending sessions"""
+    response = await client.post("/api/users", json={"username": "load-test"})
+    user_id = response.json()["user_id"]
+    requests = 1
+    if history:
+        await client.post(f"/api/users/{user_id}/sessions/batch", json={"sessions": history})
+        requests += 1
+
+    while time.monotonic() < deadline:
+        started = await client.post(
+            f"/api/users/{user_id}/sessions/start",
+            json={"main_tag": "work", "sub_tag": "benchmark", "estimated_minutes": 25}
+        )
+        session_id = started.json()["session_id"]
+        await client.get(f"/api/users/{user_id}/sessions/active")
+        await client.get(f"/api/users/{user_id}/summary/daily")
+        await client.post(
+            f"/api/users/{user_id}/sessions/end",
+            json={"session_id": session_id, "focus_quality": 4}
+        )
+        requests += 4
+
+    return requests
+
+
+async def drive(base_url: str, users: int, duration: float, history: int) -> int:
+    deadline = time.monotonic() + duration
+    sessions = history_sessions(history) if history else []
+    limits = httpx.Limits(max_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        counts = await asyncio.gather(*(run_user(client, deadline, sessions) for _ in range(users)))
+    return sum(counts)
+
+
+def client_process(args: tuple) -> int:
+    base_url, users, duration, history = args
+    return asyncio.run(drive(base_url, users, duration, history))
+
+
+def measure(workers: int, clients: int, users: int, duration: float, history: int = 0) -> float:
+    """Start a server with the given worker count and return requests per second"""
+    with running_server(workers) as base_url:
+        started = time.monotonic()
+        with multiprocessing.Pool(clients) as pool:
+            total = sum(pool.map(client_process, [(base_url, users, duration, history)] * clients))
+        elapsed = time.monotonic() - started
+
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4",
+                        help="Comma-separated worker counts to compare")
+    parser.add_argument("--clients", type=int, default=max(os.cpu_count() or 1, 2),
+                        help="Client processes generating load")
+    parser.add_argument("--users", type=int, default=16,
+                        help="Concurrent synthetic users per client process")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="Seconds of load per worker count")
+    parser.add_argument("--history", type=int, default=2000,
+                        help="Completed sessions imported per user before the load starts")
+    args = parser.parse_args()
+
+    results = {}
+    for workers in [int(value) for value in args.workers.split(",")]:
+        results[workers] = measure(workers, args.clients, args.users, args.duration, args.history)
+
+    baseline = results[min(results)]
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8} {'efficiency':>10}")
+    for workers, throughput in results.items():
+        speedup = throughput / baseline
+        print(f"{workers:>8} {throughput:>10.1f} {speedup:>8.2f} {speedup / workers:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
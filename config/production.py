@@ -4,7 +4,6 @@
 
 import os
 from datetime import timedelta
-from cryptography.fernet import Fernet
 
 class ProductionConfig:
     """
@@ -136,6 +135,8 @@ class ProductionConfig:
     # Rate Limiting (Protection from abuse)
     RATE_LIMITING = True
     RATE_LIMIT_DEFAULT = "1000 per hour"
+    RATE_LIMIT_ANALYTICS = "120 per hour"  # /insights and /patterns, per user
+    TRUSTED_PROXIES = ""  # Reverse proxies whose X-Forwarded-For is believed, e.g. "10.0.0.0/8"
     RATE_LIMIT_STORAGE_URL = os.environ.get('REDIS_URL')
     
     # Accessibility (Production-grade)
@@ -5,12 +5,19 @@ Supports concurrent sessions and user-defined tag-based categorization
 
 import time
 import json
+import math
 import uuid
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Set
-from dataclasses import dataclass, asdict
+import weakref
+from bisect import bisect_left, bisect_right, insort
+from datetime import date as Date, datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple, Set
+from dataclasses import dataclass, asdict, fields
 from enum import Enum
 
+if TYPE_CHECKING:
+    # Imported by history_columns(), so only callers that want columns pay for NumPy
+    from src.core.columnar import EntryColumns
+
 
 class ConfidenceLevel(Enum):
     """Honest confidence levels for time tracking accuracy"""
@@ -28,12 +35,38 @@ class SessionStatus(Enum):
     CANCELLED = "cancelled"
 
 
-@dataclass
+# One instance per (main_tag, sub_tag) in use; a tag no entry refers to any
+# more drops out, so one-off tags do not accumulate in a long-running server
+_interned_tags: "weakref.WeakValueDictionary[Tuple[str, Optional[str]], SessionTag]" = weakref.WeakValueDictionary()
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True, init=False)
 class SessionTag:
-    """User-defined tag with main tag and optional sub-tag"""
+    """
+    User-defined tag with main tag and optional sub-tag
+    
+    Tags are immutable flyweights: users reuse a handful of tags across
+    thousands of sessions, so SessionTag("work", "meeting") always returns
+    the same shared instance instead of a copy per entry.
+    """
     main_tag: str  # Primary hashtag-like identifier (e.g., "work", "learning", "exercise")
     sub_tag: Optional[str] = None  # Additional description (e.g., "client-meeting", "react-tutorial", "cardio")
     
+    # Fields are set once, here; there is no __init__ to reset a shared instance
+    def __new__(cls, main_tag: str, sub_tag: Optional[str] = None) -> "SessionTag":
+        tag = _interned_tags.get((main_tag, sub_tag))
+        if tag is None:
+            tag = object.__new__(cls)
+            object.__setattr__(tag, "main_tag", main_tag)
+            object.__setattr__(tag, "sub_tag", sub_tag)
+            # A racing thread may have interned an equal tag first; keep that one
+            tag = _interned_tags.setdefault((main_tag, sub_tag), tag)
+        return tag
+    
+    def __reduce__(self):
+        # Unpickling and copying go through __new__, so they return the shared instance
+        return SessionTag, (self.main_tag, self.sub_tag)
+    
     def __str__(self) -> str:
         """String representation for display"""
         if self.sub_tag:
@@ -56,9 +89,14 @@ class SessionTag:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class TimeEntry:
-    """Individual time tracking entry with enhanced tagging support"""
+    """
+    Individual time tracking entry with enhanced tagging support
+    
+    Slotted, so an entry has no per-instance __dict__; trackers hold
+    hundreds of thousands of them.
+    """
     session_id: str
     start_time: datetime
     tag: SessionTag
@@ -137,6 +175,196 @@ class TimeEntry:
         return entry
 
 
+class StartOrder:
+    """Entries kept in start_time order, with a parallel list of start times for bisect"""
+    
+    __slots__ = ("starts", "entries")
+    
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.entries: List[TimeEntry] = []
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def add(self, entry: TimeEntry) -> None:
+        start = entry.start_time
+        if not self.starts or start >= self.starts[-1]:
+            # Live sessions start "now", so this is the common case
+            self.starts.append(start)
+            self.entries.append(entry)
+            return
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.entries.insert(position, entry)
+    
+    def extend(self, entries: Iterable[TimeEntry]) -> None:
+        """Add a batch, sorting once instead of inserting entry by entry"""
+        in_order = True
+        for entry in entries:
+            if self.starts and entry.start_time < self.starts[-1]:
+                in_order = False
+            self.starts.append(entry.start_time)
+            self.entries.append(entry)
+        if in_order:
+            return
+        order = sorted(range(len(self.starts)), key=self.starts.__getitem__)
+        self.starts = [self.starts[i] for i in order]
+        self.entries = [self.entries[i] for i in order]
+    
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[TimeEntry]:
+        """Entries with start <= start_time < end; either bound may be open"""
+        low = 0 if start is None else bisect_left(self.starts, start)
+        high = len(self.starts) if end is None else bisect_left(self.starts, end)
+        return self.entries[low:high]
+
+
+class EntryIndex:
+    """
+    Lookup structures over a tracker's entries
+    
+    Entries are indexed by session_id, by start_time, by day and by main
+    tag when they are added, so reads touch only the entries they return.
+    Ending or cancelling a session changes neither its start nor its tag,
+    so nothing needs updating then; an entry whose start_time is edited
+    afterwards must be indexed again through load_entries().
+    """
+    
+    def __init__(self):
+        self.by_id: Dict[str, TimeEntry] = {}
+        self.by_start = StartOrder()
+        self.by_day: Dict[Date, StartOrder] = {}
+        self.by_main_tag: Dict[str, StartOrder] = {}
+    
+    def add(self, entry: TimeEntry) -> None:
+        self.by_id[entry.session_id] = entry
+        self.by_start.add(entry)
+        self._bucket(self.by_day, entry.start_time.date()).add(entry)
+        self._bucket(self.by_main_tag, entry.tag.main_tag).add(entry)
+    
+    def extend(self, entries: List[TimeEntry]) -> None:
+        by_day: Dict[Date, List[TimeEntry]] = {}
+        by_main_tag: Dict[str, List[TimeEntry]] = {}
+        for entry in entries:
+            self.by_id[entry.session_id] = entry
+            by_day.setdefault(entry.start_time.date(), []).append(entry)
+            by_main_tag.setdefault(entry.tag.main_tag, []).append(entry)
+        
+        self.by_start.extend(entries)
+        for day, grouped in by_day.items():
+            self._bucket(self.by_day, day).extend(grouped)
+        for main_tag, grouped in by_main_tag.items():
+            self._bucket(self.by_main_tag, main_tag).extend(grouped)
+    
+    @staticmethod
+    def _bucket(index: Dict, key) -> StartOrder:
+        bucket = index.get(key)
+        if bucket is None:
+            bucket = index[key] = StartOrder()
+        return bucket
+    
+    def clear(self) -> None:
+        self.by_id.clear()
+        self.by_start = StartOrder()
+        self.by_day.clear()
+        self.by_main_tag.clear()
+    
+    def on_day(self, day: Date) -> List[TimeEntry]:
+        bucket = self.by_day.get(day)
+        return list(bucket.entries) if bucket else []
+    
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                main_tag: Optional[str] = None) -> List[TimeEntry]:
+        if main_tag is None:
+            return self.by_start.between(start, end)
+        bucket = self.by_main_tag.get(main_tag)
+        return bucket.between(start, end) if bucket else []
+
+
+class Rollup:
+    """Running count, sums and sums of squares over completed entries"""
+    
+    __slots__ = ("count", "minutes", "minutes_sq", "energy", "energy_sq", "focus", "focus_sq",
+                 "interruptions", "high_confidence")
+    
+    def __init__(self):
+        self.count = 0
+        self.minutes = 0
+        self.minutes_sq = 0
+        self.energy = 0
+        self.energy_sq = 0
+        self.focus = 0
+        self.focus_sq = 0
+        self.interruptions = 0
+        self.high_confidence = 0
+    
+    def add(self, entry: TimeEntry) -> None:
+        minutes = entry.duration_minutes() or 0
+        self.count += 1
+        self.minutes += minutes
+        self.minutes_sq += minutes * minutes
+        self.energy += entry.energy_level
+        self.energy_sq += entry.energy_level * entry.energy_level
+        self.focus += entry.focus_quality
+        self.focus_sq += entry.focus_quality * entry.focus_quality
+        self.interruptions += entry.interruptions
+        if entry.confidence == ConfidenceLevel.HIGH:
+            self.high_confidence += 1
+    
+    def merge(self, other: 'Rollup') -> None:
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+    
+    def minutes_stddev(self) -> float:
+        """Population standard deviation of session length"""
+        mean = self.minutes / self.count
+        return math.sqrt(max(0.0, self.minutes_sq / self.count - mean * mean))
+
+
+class RollupStore:
+    """
+    Rollups of completed entries keyed by (day, main_tag, sub_tag)
+    
+    An entry is added once, when it completes or is loaded; reads merge
+    the rollups of the days they cover instead of visiting entries. Days
+    are kept sorted so a range of days is found by bisect.
+    """
+    
+    def __init__(self):
+        self.by_day: Dict[Date, Dict[Tuple[str, Optional[str]], Rollup]] = {}
+        self.days: List[Date] = []
+    
+    def add(self, entry: TimeEntry) -> None:
+        day = entry.start_time.date()
+        rollups = self.by_day.get(day)
+        if rollups is None:
+            rollups = self.by_day[day] = {}
+            insort(self.days, day)
+        key = (entry.tag.main_tag, entry.tag.sub_tag)
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = Rollup()
+        rollup.add(entry)
+    
+    def clear(self) -> None:
+        self.by_day.clear()
+        self.days.clear()
+    
+    def day(self, day: Date) -> Dict[Tuple[str, Optional[str]], Rollup]:
+        return self.by_day.get(day, {})
+    
+    def after(self, day: Date) -> Dict[Tuple[str, Optional[str]], Rollup]:
+        """Rollups of every day after `day`, merged per (main_tag, sub_tag)"""
+        merged: Dict[Tuple[str, Optional[str]], Rollup] = {}
+        for later in self.days[bisect_right(self.days, day):]:
+            for key, rollup in self.by_day[later].items():
+                total = merged.get(key)
+                if total is None:
+                    total = merged[key] = Rollup()
+                total.merge(rollup)
+        return merged
+
+
 class MultiSessionTimeTracker:
     """
     Enhanced time tracker supporting multiple concurrent sessions with tagging
@@ -146,6 +374,7 @@ class MultiSessionTimeTracker:
     - User-defined tagging system (main tag + sub tag)
     - Flexible categorization based on user preferences
     - Async session management
+    - Change notifications for start/end/pause/resume/cancel
     """
     
     def __init__(self, user_id: str = "default_user"):
@@ -154,6 +383,51 @@ class MultiSessionTimeTracker:
         self.active_sessions: Dict[str, TimeEntry] = {}  # session_id -> TimeEntry
         self.user_tags: Set[str] = set()  # Track all main tags user has used
         self.estimation_history: List[Tuple[int, int]] = []  # (estimated, actual) pairs
+        self._listeners: List[Callable[[str, TimeEntry], None]] = []
+        self._index = EntryIndex()
+        self._rollups = RollupStore()
+        self._columns: Optional["EntryColumns"] = None
+        self._columns_pending: List[TimeEntry] = []
+    
+    def add_listener(self, listener: Callable[[str, TimeEntry], None]) -> None:
+        """
+        Register a callback for session changes
+        
+        The listener is called as listener(event, entry) where event is one of
+        "start", "end", "pause", "resume" or "cancel".
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[str, TimeEntry], None]) -> None:
+        """Unregister a previously added callback"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _notify(self, event: str, entry: TimeEntry) -> None:
+        for listener in list(self._listeners):
+            listener(event, entry)
+    
+    def _completed(self, entry: TimeEntry) -> None:
+        """Fold a newly completed entry into the rollups and, once built, the columns"""
+        self._rollups.add(entry)
+        if self._columns is not None:
+            self._columns_pending.append(entry)
+    
+    def history_columns(self) -> "EntryColumns":
+        """
+        Completed entries as NumPy columns, for vectorized batch analytics
+        
+        The first call converts the whole history; later calls only convert
+        entries completed since and append them. Requires NumPy.
+        """
+        from src.core.columnar import EntryColumns
+        
+        if self._columns is None:
+            self._columns = EntryColumns.from_entries(self.entries)
+        elif self._columns_pending:
+            self._columns = self._columns.concat(EntryColumns.from_entries(self._columns_pending))
+        self._columns_pending = []
+        return self._columns
         
     def start_session(self, main_tag: str, sub_tag: Optional[str] = None, 
                      task_description: str = "", estimated_minutes: Optional[int] = None) -> TimeEntry:
@@ -185,7 +459,9 @@ class MultiSessionTimeTracker:
         )
         
         self.entries.append(entry)
+        self._index.add(entry)
         self.active_sessions[session_id] = entry
+        self._notify("start", entry)
         
         return entry
     
@@ -224,6 +500,29 @@ class MultiSessionTimeTracker:
         
         # Remove from active sessions
         del self.active_sessions[session_id]
+        self._completed(entry)
+        self._notify("end", entry)
+        
+        return entry
+    
+    def close_stale_session(self, session_id: str, end_time: datetime, note: str) -> Optional[TimeEntry]:
+        """
+        Close a session the user forgot to end
+        
+        The real end time is unknown, so the entry is marked UNCERTAIN, the
+        note explains what happened and it does not count toward estimation
+        accuracy. The user can still review and correct it.
+        """
+        entry = self.active_sessions.pop(session_id, None)
+        if entry is None:
+            return None
+        
+        entry.end_time = end_time
+        entry.status = SessionStatus.COMPLETED
+        entry.confidence = ConfidenceLevel.UNCERTAIN
+        entry.user_notes = f"{entry.user_notes}\n{note}" if entry.user_notes else note
+        self._completed(entry)
+        self._notify("end", entry)
         
         return entry
     
@@ -234,6 +533,7 @@ class MultiSessionTimeTracker:
         
         entry = self.active_sessions[session_id]
         entry.status = SessionStatus.PAUSED
+        self._notify("pause", entry)
         return entry
     
     def resume_session(self, session_id: str) -> Optional[TimeEntry]:
@@ -244,6 +544,7 @@ class MultiSessionTimeTracker:
         entry = self.active_sessions[session_id]
         if entry.status == SessionStatus.PAUSED:
             entry.status = SessionStatus.ACTIVE
+            self._notify("resume", entry)
         return entry
     
     def cancel_session(self, session_id: str) -> Optional[TimeEntry]:
@@ -257,6 +558,7 @@ class MultiSessionTimeTracker:
         
         # Remove from active sessions
         del self.active_sessions[session_id]
+        self._notify("cancel", entry)
         
         return entry
     
@@ -297,37 +599,134 @@ class MultiSessionTimeTracker:
             }
         
         # Check completed sessions
-        for entry in self.entries:
-            if entry.session_id == session_id:
-                return {
-                    "session_id": session_id,
-                    "tag": str(entry.tag),
-                    "main_tag": entry.tag.main_tag,
-                    "sub_tag": entry.tag.sub_tag,
-                    "task": entry.task_description,
-                    "duration_minutes": entry.duration_minutes(),
-                    "start_time": entry.start_time.isoformat(),
-                    "end_time": entry.end_time.isoformat() if entry.end_time else None,
-                    "status": entry.status.value,
-                    "confidence": entry.confidence.value
-                }
+        entry = self._index.by_id.get(session_id)
+        if entry is None:
+            return None
+        return {
+            "session_id": session_id,
+            "tag": str(entry.tag),
+            "main_tag": entry.tag.main_tag,
+            "sub_tag": entry.tag.sub_tag,
+            "task": entry.task_description,
+            "duration_minutes": entry.duration_minutes(),
+            "start_time": entry.start_time.isoformat(),
+            "end_time": entry.end_time.isoformat() if entry.end_time else None,
+            "status": entry.status.value,
+            "confidence": entry.confidence.value
+        }
+    
+    def get_entry(self, session_id: str) -> Optional[TimeEntry]:
+        """Get the TimeEntry object for a session (active or finished)"""
+        return self._index.by_id.get(session_id)
+
+    def find_entries(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                     main_tag: Optional[str] = None) -> List[TimeEntry]:
+        """Entries started in [start, end), optionally with one main tag, oldest first"""
+        return self._index.between(start, end, main_tag)
+
+    def load_entries(self, entries: List[TimeEntry]) -> None:
+        """
+        Rebuild tracker state from previously stored entries
+
+        Active and paused entries become active sessions again; tags and
+        estimation history are derived the same way live sessions update them.
+        """
+        self.clear_data()
+
+        self.entries.extend(entries)
+        self._index.extend(entries)
+        for entry in entries:
+            self.user_tags.add(entry.tag.main_tag)
+
+            if entry.status in (SessionStatus.ACTIVE, SessionStatus.PAUSED):
+                self.active_sessions[entry.session_id] = entry
+            elif entry.is_complete():
+                self._completed(entry)
+                duration = entry.duration_minutes()
+                if duration and entry.estimated_minutes and entry.confidence != ConfidenceLevel.UNCERTAIN:
+                    self.estimation_history.append((entry.estimated_minutes, duration))
+
+    def apply_changes(self, entries: List[TimeEntry]) -> bool:
+        """
+        Bring the tracker up to date with entries stored by another process
         
-        return None
+        New entries are added and open ones updated in place, so catching up
+        costs O(changes) instead of a reload; applying the same changes twice
+        is harmless. Returns False without changing anything when a change
+        cannot be applied incrementally (a moved start time or tag, or an
+        edit to a completed or cancelled entry); the caller then reloads.
+        """
+        for stored in entries:
+            entry = self._index.by_id.get(stored.session_id)
+            if entry is None:
+                continue
+            if entry.start_time != stored.start_time or entry.tag != stored.tag:
+                return False
+            if entry.status in (SessionStatus.COMPLETED, SessionStatus.CANCELLED) and entry != stored:
+                return False
+        
+        for stored in entries:
+            entry = self._index.by_id.get(stored.session_id)
+            if entry is None:
+                entry = stored
+                insort(self.entries, entry, key=lambda known: known.start_time)
+                self._index.add(entry)
+                self.user_tags.add(entry.tag.main_tag)
+            elif entry.status in (SessionStatus.COMPLETED, SessionStatus.CANCELLED):
+                continue
+            else:
+                for field in fields(TimeEntry):
+                    setattr(entry, field.name, getattr(stored, field.name))
+            
+            if entry.status in (SessionStatus.ACTIVE, SessionStatus.PAUSED):
+                self.active_sessions[entry.session_id] = entry
+                continue
+            self.active_sessions.pop(entry.session_id, None)
+            if entry.is_complete():
+                self._completed(entry)
+                duration = entry.duration_minutes()
+                if duration and entry.estimated_minutes and entry.confidence != ConfidenceLevel.UNCERTAIN:
+                    self.estimation_history.append((entry.estimated_minutes, duration))
+        return True
     
+    def import_entries(self, entries: List[TimeEntry]) -> List[TimeEntry]:
+        """
+        Add a batch of completed historical entries
+
+        Tags and estimation history are updated once for the whole batch and
+        entries are kept in start_time order. Imports do not touch active
+        sessions, so no listeners are notified.
+        """
+        entries = [entry for entry in entries if entry.is_complete()]
+        if not entries:
+            return []
+
+        estimates = []
+        for entry in entries:
+            self._completed(entry)
+            duration = entry.duration_minutes()
+            if duration and entry.estimated_minutes and entry.confidence != ConfidenceLevel.UNCERTAIN:
+                estimates.append((entry.estimated_minutes, duration))
+
+        self.user_tags.update(entry.tag.main_tag for entry in entries)
+        self.estimation_history.extend(estimates)
+        self.entries.extend(entries)
+        self.entries.sort(key=lambda entry: entry.start_time)
+        self._index.extend(entries)
+        return entries
+
     def get_daily_summary(self, date: Optional[datetime] = None) -> Dict:
         """
         Get daily summary with tag-based analytics
+        
+        Answered from the day's rollups, without visiting its entries.
         """
         if date is None:
             date = datetime.now().date()
         
-        # Filter entries for the day
-        day_entries = [
-            entry for entry in self.entries
-            if entry.start_time.date() == date and entry.is_complete()
-        ]
+        rollups = self._rollups.day(date)
         
-        if not day_entries:
+        if not rollups:
             return {
                 "date": date.isoformat(),
                 "total_minutes": 0,
@@ -339,128 +738,129 @@ class MultiSessionTimeTracker:
                 "limitations": "No time tracking data available for this date"
             }
         
-        # Calculate summary with tag-based grouping
-        total_minutes = sum(entry.duration_minutes() or 0 for entry in day_entries)
-        
-        # Group by full tags (main + sub)
+        # Group by full tags (main + sub) and by main tag
+        day = Rollup()
         tags = {}
         main_tags = {}
         
-        for entry in day_entries:
-            # Full tag grouping
-            tag_str = str(entry.tag)
+        for (main_tag, sub_tag), rollup in rollups.items():
+            day.merge(rollup)
+            
+            tag_str = str(SessionTag(main_tag, sub_tag))
             if tag_str not in tags:
-                tags[tag_str] = {"minutes": 0, "count": 0, "main_tag": entry.tag.main_tag, "sub_tag": entry.tag.sub_tag}
-            tags[tag_str]["minutes"] += entry.duration_minutes() or 0
-            tags[tag_str]["count"] += 1
+                tags[tag_str] = {"minutes": 0, "count": 0, "main_tag": main_tag, "sub_tag": sub_tag}
+            tags[tag_str]["minutes"] += rollup.minutes
+            tags[tag_str]["count"] += rollup.count
             
-            # Main tag grouping
-            main_tag = entry.tag.main_tag
             if main_tag not in main_tags:
-                main_tags[main_tag] = {"minutes": 0, "count": 0, "sub_tags": set()}
-            main_tags[main_tag]["minutes"] += entry.duration_minutes() or 0
-            main_tags[main_tag]["count"] += 1
-            if entry.tag.sub_tag:
-                main_tags[main_tag]["sub_tags"].add(entry.tag.sub_tag)
-        
-        # Convert sets to lists for JSON serialization
-        for main_tag_data in main_tags.values():
-            main_tag_data["sub_tags"] = list(main_tag_data["sub_tags"])
+                main_tags[main_tag] = {"minutes": 0, "count": 0, "sub_tags": []}
+            main_tags[main_tag]["minutes"] += rollup.minutes
+            main_tags[main_tag]["count"] += rollup.count
+            if sub_tag and sub_tag not in main_tags[main_tag]["sub_tags"]:
+                main_tags[main_tag]["sub_tags"].append(sub_tag)
         
         # Assess overall confidence
-        confidence_levels = [entry.confidence.value for entry in day_entries]
-        high_confidence_count = confidence_levels.count(ConfidenceLevel.HIGH.value)
-        overall_confidence = ConfidenceLevel.HIGH.value if high_confidence_count > len(confidence_levels) * 0.7 else ConfidenceLevel.MODERATE.value
+        overall_confidence = ConfidenceLevel.HIGH.value if day.high_confidence > day.count * 0.7 else ConfidenceLevel.MODERATE.value
         
         return {
             "date": date.isoformat(),
-            "total_minutes": total_minutes,
-            "entries_count": len(day_entries),
+            "total_minutes": day.minutes,
+            "entries_count": day.count,
             "active_sessions_count": len(self.active_sessions),
             "tags": tags,
             "main_tags": main_tags,
             "confidence": overall_confidence,
             "limitations": "Data based on user input and may include estimation errors",
-            "average_energy": sum(e.energy_level for e in day_entries) / len(day_entries),
-            "average_focus": sum(e.focus_quality for e in day_entries) / len(day_entries),
-            "total_interruptions": sum(e.interruptions for e in day_entries)
+            "average_energy": day.energy / day.count,
+            "average_focus": day.focus / day.count,
+            "total_interruptions": day.interruptions
         }
     
+    def _rollups_since(self, cutoff: datetime) -> Dict[Tuple[str, Optional[str]], Rollup]:
+        """
+        Rollups of completed entries started at or after cutoff, per (main_tag, sub_tag)
+        
+        Whole days after the cutoff come from the day rollups; only the
+        entries of the cutoff's own day are visited.
+        """
+        merged = self._rollups.after(cutoff.date())
+        for entry in self._index.by_day.get(cutoff.date(), StartOrder()).between(cutoff):
+            if entry.is_complete():
+                key = (entry.tag.main_tag, entry.tag.sub_tag)
+                if key not in merged:
+                    merged[key] = Rollup()
+                merged[key].add(entry)
+        return merged
+    
     def get_tag_analytics(self, timeframe_days: int = 30) -> Dict:
         """
         Get analytics based on user's tagging patterns
         """
         cutoff_date = datetime.now() - timedelta(days=timeframe_days)
-        recent_entries = [
-            entry for entry in self.entries
-            if entry.start_time >= cutoff_date and entry.is_complete()
-        ]
+        rollups = self._rollups_since(cutoff_date)
         
-        if not recent_entries:
+        if not rollups:
             return {
                 "timeframe_days": timeframe_days,
                 "total_entries": 0,
                 "message": "No data available for the specified timeframe"
             }
         
-        # Analyze by main tags
+        # Merge rollups by main tag and by sub-tag
+        totals = Rollup()
+        main_tags: Dict[str, Rollup] = {}
+        sub_tags: Dict[str, Dict[str, Rollup]] = {}
+        for (main_tag, sub_tag), rollup in rollups.items():
+            totals.merge(rollup)
+            main_tags.setdefault(main_tag, Rollup()).merge(rollup)
+            if sub_tag:
+                sub_tags.setdefault(main_tag, {}).setdefault(sub_tag, Rollup()).merge(rollup)
+        
         main_tag_analysis = {}
-        for entry in recent_entries:
-            main_tag = entry.tag.main_tag
-            if main_tag not in main_tag_analysis:
-                main_tag_analysis[main_tag] = {
-                    "total_minutes": 0,
-                    "session_count": 0,
-                    "sub_tags": {},
-                    "avg_energy": [],
-                    "avg_focus": [],
-                    "avg_duration": []
-                }
-            
-            duration = entry.duration_minutes() or 0
-            main_tag_analysis[main_tag]["total_minutes"] += duration
-            main_tag_analysis[main_tag]["session_count"] += 1
-            main_tag_analysis[main_tag]["avg_energy"].append(entry.energy_level)
-            main_tag_analysis[main_tag]["avg_focus"].append(entry.focus_quality)
-            main_tag_analysis[main_tag]["avg_duration"].append(duration)
-            
-            # Sub-tag analysis
-            if entry.tag.sub_tag:
-                sub_tag = entry.tag.sub_tag
-                if sub_tag not in main_tag_analysis[main_tag]["sub_tags"]:
-                    main_tag_analysis[main_tag]["sub_tags"][sub_tag] = {
-                        "total_minutes": 0,
-                        "session_count": 0,
-                        "avg_energy": [],
-                        "avg_focus": []
+        for main_tag, rollup in main_tags.items():
+            main_tag_analysis[main_tag] = {
+                "total_minutes": rollup.minutes,
+                "session_count": rollup.count,
+                "sub_tags": {
+                    sub_tag: {
+                        "total_minutes": sub.minutes,
+                        "session_count": sub.count,
+                        "avg_energy": sub.energy / sub.count,
+                        "avg_focus": sub.focus / sub.count
                     }
-                
-                main_tag_analysis[main_tag]["sub_tags"][sub_tag]["total_minutes"] += duration
-                main_tag_analysis[main_tag]["sub_tags"][sub_tag]["session_count"] += 1
-                main_tag_analysis[main_tag]["sub_tags"][sub_tag]["avg_energy"].append(entry.energy_level)
-                main_tag_analysis[main_tag]["sub_tags"][sub_tag]["avg_focus"].append(entry.focus_quality)
-        
-        # Calculate averages
-        for main_tag, data in main_tag_analysis.items():
-            if data["avg_energy"]:
-                data["avg_energy"] = sum(data["avg_energy"]) / len(data["avg_energy"])
-                data["avg_focus"] = sum(data["avg_focus"]) / len(data["avg_focus"])
-                data["avg_duration"] = sum(data["avg_duration"]) / len(data["avg_duration"])
-            
-            for sub_tag, sub_data in data["sub_tags"].items():
-                if sub_data["avg_energy"]:
-                    sub_data["avg_energy"] = sum(sub_data["avg_energy"]) / len(sub_data["avg_energy"])
-                    sub_data["avg_focus"] = sum(sub_data["avg_focus"]) / len(sub_data["avg_focus"])
+                    for sub_tag, sub in sub_tags.get(main_tag, {}).items()
+                },
+                "avg_energy": rollup.energy / rollup.count,
+                "avg_focus": rollup.focus / rollup.count,
+                "avg_duration": rollup.minutes / rollup.count,
+                "duration_stddev": round(rollup.minutes_stddev(), 1)
+            }
         
         return {
             "timeframe_days": timeframe_days,
-            "total_entries": len(recent_entries),
-            "total_time_minutes": sum(entry.duration_minutes() or 0 for entry in recent_entries),
+            "total_entries": totals.count,
+            "total_time_minutes": totals.minutes,
             "main_tag_analysis": main_tag_analysis,
             "user_tags": list(self.user_tags),
             "insights": self._generate_tag_insights(main_tag_analysis)
         }
     
+    def get_time_totals(self, timeframe_days: int = 30) -> Dict:
+        """
+        Session count and tracked minutes in the timeframe
+
+        The totals of get_tag_analytics without the per-tag breakdown, for
+        callers that need only these numbers.
+        """
+        cutoff_date = datetime.now() - timedelta(days=timeframe_days)
+        rollups = self._rollups_since(cutoff_date).values()
+        
+        return {
+            "timeframe_days": timeframe_days,
+            "total_entries": sum(rollup.count for rollup in rollups),
+            "total_time_minutes": sum(rollup.minutes for rollup in rollups)
+        }
+    
     def _generate_tag_insights(self, main_tag_analysis: Dict) -> List[str]:
         """Generate insights based on tagging patterns"""
         insights = []
@@ -559,6 +959,10 @@ class MultiSessionTimeTracker:
     def clear_data(self) -> bool:
         """Clear all data with user control (for privacy)"""
         self.entries.clear()
+        self._index.clear()
+        self._rollups.clear()
+        self._columns = None
+        self._columns_pending = []
         self.active_sessions.clear()
         self.user_tags.clear()
         self.estimation_history.clear()
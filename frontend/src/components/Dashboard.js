@@ -11,9 +11,14 @@ const Dashboard = ({ user }) => {
   useEffect(() => {
     loadDashboardData();
     
-    // Set up polling for current session
-    const interval = setInterval(loadCurrentSession, 5000);
-    return () => clearInterval(interval);
+    // Session changes are pushed by the server instead of polled
+    const unsubscribe = apiService.subscribeToSessions(user.user_id, (update) => {
+      applyActiveSessions(update);
+      if (update.type === 'end') {
+        loadDailySummary();
+      }
+    });
+    return unsubscribe;
   }, [user]);
 
   const loadDashboardData = async () => {
@@ -30,13 +35,17 @@ const Dashboard = ({ user }) => {
     }
   };
 
+  const applyActiveSessions = (sessionData) => {
+    setCurrentSession(sessionData.active_sessions && sessionData.active_sessions.length > 0 ? {
+      active_sessions: sessionData.active_sessions,
+      count: sessionData.count
+    } : null);
+  };
+
   const loadCurrentSession = async () => {
     try {
       const sessionData = await apiService.getActiveSessions(user.user_id);
-      setCurrentSession(sessionData.active_sessions && sessionData.active_sessions.length > 0 ? {
-        active_sessions: sessionData.active_sessions,
-        count: sessionData.count
-      } : null);
+      applyActiveSessions(sessionData);
     } catch (error) {
       console.error('Error loading current session:', error);
     }
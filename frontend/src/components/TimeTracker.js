@@ -39,9 +39,11 @@ const TimeTracker = ({ user }) => {
     loadUserTags();
     initializeSpeechRecognition();
     
-    // Poll for session updates
-    const interval = setInterval(loadActiveSessions, 10000);
-    return () => clearInterval(interval);
+    // Session updates are pushed by the server instead of polled
+    const unsubscribe = apiService.subscribeToSessions(user.user_id, (update) => {
+      setActiveSessions(update.active_sessions || []);
+    });
+    return unsubscribe;
   }, [user]);
 
   const initializeSpeechRecognition = () => {
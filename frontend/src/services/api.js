@@ -86,6 +86,28 @@ class ApiService {
     return this.client.delete(`/api/users/${userId}/sessions/${sessionId}`);
   }
 
+  // Live session updates pushed by the server (snapshot, start, end, pause,
+  // resume, cancel and periodic tick events all carry the active sessions).
+  // Falls back to polling when EventSource is unavailable.
+  // Returns a function that closes the subscription.
+  subscribeToSessions(userId, onUpdate, fallbackIntervalMs = 10000) {
+    if (typeof window.EventSource === 'undefined') {
+      const poll = () => this.getActiveSessions(userId)
+        .then((data) => onUpdate({ type: 'poll', ...data }))
+        .catch((error) => console.error('Error polling sessions:', error));
+      poll();
+      const interval = setInterval(poll, fallbackIntervalMs);
+      return () => clearInterval(interval);
+    }
+
+    const source = new EventSource(`${API_BASE_URL}/api/users/${userId}/sessions/stream`);
+    const handler = (event) => onUpdate(JSON.parse(event.data));
+    ['snapshot', 'start', 'end', 'pause', 'resume', 'cancel', 'tick'].forEach((type) => {
+      source.addEventListener(type, handler);
+    });
+    return () => source.close();
+  }
+
   // Tag management
   async getUserTags(userId) {
     return this.client.get(`/api/users/${userId}/tags`);
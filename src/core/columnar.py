@@ -0,0 +1,182 @@
+"""
+FlowState Columnar History
+Completed time entries held as NumPy columns for vectorized analytics
+
+Aggregating hundreds of thousands of TimeEntry objects one at a time is
+dominated by attribute lookups and datetime arithmetic. EntryColumns
+converts the complete entries once into parallel arrays:
+- start, end: wall-clock seconds since 1970-01-01 (entries carry naive
+  local times, so no timezone is applied)
+- minutes: the duration as TimeEntry.duration_minutes() reports it
+- tag_id: dictionary-encoded (main_tag, sub_tag), decoded through `tags`
+- energy, focus, interruptions: int8, clipped to the int8 range
+- high_confidence: bool
+
+Aggregations are group-bys over integer keys with np.bincount. NumPy is
+an optional dependency; without it numpy_available() is False and callers
+keep their per-entry loops.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_DATE = EPOCH.date()
+ONE_SECOND = timedelta(seconds=1)
+SECONDS_PER_DAY = 86400
+
+# Per-group sums produced by EntryColumns.group_by, named like Rollup fields
+GROUP_FIELDS = ("count", "minutes", "minutes_sq", "energy", "energy_sq", "focus", "focus_sq",
+                "interruptions", "high_confidence")
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+def entry_tag(entry) -> Tuple[Optional[str], Optional[str]]:
+    """(main_tag, sub_tag) of a tagged entry, or (category, None) for a core TimeEntry"""
+    tag = getattr(entry, "tag", None)
+    if tag is not None:
+        return tag.main_tag, tag.sub_tag
+    return getattr(entry, "category", None), None
+
+
+def _int8(values: List[int]) -> "np.ndarray":
+    return np.clip(np.array(values, dtype=np.int64), -128, 127).astype(np.int8)
+
+
+class EntryColumns:
+    """Parallel arrays over complete entries; see the module docstring for the columns"""
+
+    __slots__ = ("start", "end", "minutes", "tag_id", "energy", "focus", "interruptions",
+                 "high_confidence", "tags")
+
+    def __init__(self, start, end, minutes, tag_id, energy, focus, interruptions,
+                 high_confidence, tags: List[Hashable]):
+        self.start = start
+        self.end = end
+        self.minutes = minutes
+        self.tag_id = tag_id
+        self.energy = energy
+        self.focus = focus
+        self.interruptions = interruptions
+        self.high_confidence = high_confidence
+        self.tags = tags
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Any],
+                     tag_key: Callable[[Any], Hashable] = entry_tag) -> "EntryColumns":
+        """Convert the complete entries, in their given order"""
+        if np is None:
+            raise RuntimeError("NumPy is required for columnar analytics")
+
+        complete = [entry for entry in entries if entry.is_complete()]
+        tag_ids: Dict[Hashable, int] = {}
+        tag_id = [tag_ids.setdefault(tag_key(entry), len(tag_ids)) for entry in complete]
+
+        start = [(entry.start_time - EPOCH) // ONE_SECOND for entry in complete]
+        end = [(entry.end_time - EPOCH) // ONE_SECOND for entry in complete]
+        minutes = [entry.duration_minutes() or 0 for entry in complete]
+
+        return cls(
+            start=np.array(start, dtype=np.int64),
+            end=np.array(end, dtype=np.int64),
+            minutes=np.array(minutes, dtype=np.int64),
+            tag_id=np.array(tag_id, dtype=np.int32),
+            energy=_int8([entry.energy_level for entry in complete]),
+            focus=_int8([entry.focus_quality for entry in complete]),
+            interruptions=_int8([entry.interruptions for entry in complete]),
+            high_confidence=np.array([entry.confidence.value == "high" for entry in complete], dtype=bool),
+            tags=list(tag_ids)
+        )
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def take(self, selector) -> "EntryColumns":
+        """Rows picked by a boolean mask or index array; the tag dictionary is shared"""
+        return EntryColumns(
+            self.start[selector], self.end[selector], self.minutes[selector], self.tag_id[selector],
+            self.energy[selector], self.focus[selector], self.interruptions[selector],
+            self.high_confidence[selector], self.tags
+        )
+
+    def concat(self, other: "EntryColumns") -> "EntryColumns":
+        """Rows of self followed by rows of other, with other's tags re-encoded"""
+        tag_ids = {tag: encoded for encoded, tag in enumerate(self.tags)}
+        remap = np.array([tag_ids.setdefault(tag, len(tag_ids)) for tag in other.tags], dtype=np.int32)
+        return EntryColumns(
+            np.concatenate([self.start, other.start]),
+            np.concatenate([self.end, other.end]),
+            np.concatenate([self.minutes, other.minutes]),
+            np.concatenate([self.tag_id, remap[other.tag_id]]),
+            np.concatenate([self.energy, other.energy]),
+            np.concatenate([self.focus, other.focus]),
+            np.concatenate([self.interruptions, other.interruptions]),
+            np.concatenate([self.high_confidence, other.high_confidence]),
+            list(tag_ids)
+        )
+
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> "EntryColumns":
+        """Rows started in [start, end), to the second"""
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.start >= (start - EPOCH) // ONE_SECOND
+        if end is not None:
+            mask &= self.start < (end - EPOCH) // ONE_SECOND
+        return self.take(mask)
+
+    @property
+    def day(self) -> "np.ndarray":
+        """Start day as days since 1970-01-01"""
+        return self.start // SECONDS_PER_DAY
+
+    @property
+    def hour(self) -> "np.ndarray":
+        return self.start % SECONDS_PER_DAY // 3600
+
+    @property
+    def weekday(self) -> "np.ndarray":
+        """Monday is 0, as datetime.weekday(); 1970-01-01 was a Thursday"""
+        return (self.day + 3) % 7
+
+    @staticmethod
+    def to_date(day: int) -> date:
+        return EPOCH_DATE + timedelta(days=day)
+
+    def group_by(self, keys: "np.ndarray", size: int) -> Dict[str, List[int]]:
+        """
+        Count and sums per group for integer keys in range(size)
+
+        Sums are taken as float64 weights, exact below 2**53, and returned as
+        Python ints in GROUP_FIELDS order.
+        """
+        minutes = self.minutes
+        energy = self.energy.astype(np.int64)
+        focus = self.focus.astype(np.int64)
+
+        def total(values) -> List[int]:
+            return np.bincount(keys, weights=values, minlength=size).astype(np.int64).tolist()
+
+        return {
+            "count": np.bincount(keys, minlength=size).tolist(),
+            "minutes": total(minutes),
+            "minutes_sq": total(minutes * minutes),
+            "energy": total(energy),
+            "energy_sq": total(energy * energy),
+            "focus": total(focus),
+            "focus_sq": total(focus * focus),
+            "interruptions": total(self.interruptions),
+            "high_confidence": total(self.high_confidence)
+        }
+
+    def first_seen(self, keys: "np.ndarray") -> List[int]:
+        """Distinct keys in order of first appearance, as a per-entry loop meets them"""
+        values, first = np.unique(keys, return_index=True)
+        return values[np.argsort(first, kind="stable")].tolist()
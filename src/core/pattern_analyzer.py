@@ -12,15 +12,20 @@ Key principles implemented:
 - Honest confidence levels
 """
 
+import calendar
 import statistics
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 from collections import defaultdict, Counter
 import json
 
 from .time_tracker import TimeEntry, ConfidenceLevel, TaskComplexity
 
+if TYPE_CHECKING:
+    # Imported where used, so only the vectorized path pays for NumPy
+    from .columnar import EntryColumns
+
 
 @dataclass
 class PatternInsight:
@@ -53,9 +58,11 @@ class PatternAnalyzer:
     without making AI judgments or diagnoses
     """
     
-    def __init__(self):
+    def __init__(self, columnar_min_entries: int = 1000):
         self.minimum_sample_size = 5  # Honest about statistical requirements
         self.confidence_threshold = 0.6  # Conservative threshold
+        # Histories at least this long are analyzed as NumPy columns when available
+        self.columnar_min_entries = columnar_min_entries
         
     def analyze_time_patterns(self, entries: List[TimeEntry], 
                             timeframe_days: int = 30) -> Dict[str, PatternInsight]:
@@ -69,6 +76,11 @@ class PatternAnalyzer:
         Returns:
             Dict of pattern insights for user interpretation
         """
+        if len(entries) >= self.columnar_min_entries:
+            from .columnar import EntryColumns, numpy_available
+            if numpy_available():
+                return self.analyze_column_patterns(EntryColumns.from_entries(entries), timeframe_days)
+        
         # Filter entries to timeframe
         cutoff_date = datetime.now() - timedelta(days=timeframe_days)
         recent_entries = [
@@ -77,43 +89,75 @@ class PatternAnalyzer:
         ]
         
         if len(recent_entries) < self.minimum_sample_size:
-            return {
-                "insufficient_data": PatternInsight(
-                    pattern_type="data_limitation",
-                    description=f"Only {len(recent_entries)} complete entries found",
-                    confidence=ConfidenceLevel.UNCERTAIN,
-                    sample_size=len(recent_entries),
-                    timeframe=f"Last {timeframe_days} days",
-                    limitations=f"Need at least {self.minimum_sample_size} entries for pattern analysis",
-                    supporting_data={"entry_count": len(recent_entries)},
-                    user_interpretation_required=True
-                )
-            }
+            return self._insufficient_data(len(recent_entries), timeframe_days)
+        
+        return self._collect_patterns(
+            self._analyze_time_of_day_patterns(recent_entries),
+            self._analyze_day_of_week_patterns(recent_entries),
+            self._analyze_duration_patterns(recent_entries),
+            self._analyze_energy_patterns(recent_entries),
+            self._analyze_focus_patterns(recent_entries)
+        )
+    
+    def analyze_column_patterns(self, columns: "EntryColumns",
+                                timeframe_days: int = 30) -> Dict[str, PatternInsight]:
+        """
+        analyze_time_patterns over a columnar history, with vectorized group-bys
         
+        Gives the same insights as the per-entry analysis; batch jobs that
+        keep their history as EntryColumns avoid converting it again.
+        """
+        recent = columns.between(datetime.now() - timedelta(days=timeframe_days))
+        
+        if len(recent) < self.minimum_sample_size:
+            return self._insufficient_data(len(recent), timeframe_days)
+        
+        # Entries without a whole minute of duration are skipped, as in the loops
+        timed = recent.take(recent.minutes != 0)
+        return self._collect_patterns(
+            self._column_time_of_day_patterns(timed, len(recent)),
+            self._column_day_of_week_patterns(timed, len(recent)),
+            self._column_duration_patterns(timed),
+            self._column_energy_patterns(recent),
+            self._column_focus_patterns(timed)
+        )
+    
+    def _insufficient_data(self, entry_count: int, timeframe_days: int) -> Dict[str, PatternInsight]:
+        return {
+            "insufficient_data": PatternInsight(
+                pattern_type="data_limitation",
+                description=f"Only {entry_count} complete entries found",
+                confidence=ConfidenceLevel.UNCERTAIN,
+                sample_size=entry_count,
+                timeframe=f"Last {timeframe_days} days",
+                limitations=f"Need at least {self.minimum_sample_size} entries for pattern analysis",
+                supporting_data={"entry_count": entry_count},
+                user_interpretation_required=True
+            )
+        }
+    
+    @staticmethod
+    def _collect_patterns(time_patterns, day_patterns, duration_patterns,
+                          energy_patterns, focus_patterns) -> Dict[str, PatternInsight]:
         patterns = {}
         
         # Time of day patterns
-        time_patterns = self._analyze_time_of_day_patterns(recent_entries)
         if time_patterns:
             patterns["time_of_day"] = time_patterns
         
         # Day of week patterns
-        day_patterns = self._analyze_day_of_week_patterns(recent_entries)
         if day_patterns:
             patterns["day_of_week"] = day_patterns
         
         # Duration patterns
-        duration_patterns = self._analyze_duration_patterns(recent_entries)
         if duration_patterns:
             patterns["session_duration"] = duration_patterns
         
         # Energy patterns
-        energy_patterns = self._analyze_energy_patterns(recent_entries)
         if energy_patterns:
             patterns["energy_levels"] = energy_patterns
         
         # Focus quality patterns
-        focus_patterns = self._analyze_focus_patterns(recent_entries)
         if focus_patterns:
             patterns["focus_quality"] = focus_patterns
         
@@ -146,6 +190,31 @@ class PatternAnalyzer:
                     'avg_energy': statistics.mean([s['energy'] for s in sessions])
                 }
         
+        return self._time_of_day_insight(hour_stats, len(entries))
+    
+    def _column_time_of_day_patterns(self, timed: "EntryColumns", sample_size: int) -> Optional[PatternInsight]:
+        """_analyze_time_of_day_patterns as a group-by over start hours"""
+        hours = timed.hour
+        seen = timed.first_seen(hours)
+        if len(seen) < 3:  # Need variety in times
+            return None
+        
+        stats = timed.group_by(hours, 24)
+        hour_stats = {}
+        for hour in seen:
+            count = stats["count"][hour]
+            if count >= 2:
+                hour_stats[hour] = {
+                    'session_count': count,
+                    'avg_duration': stats["minutes"][hour] / count,
+                    'avg_focus': stats["focus"][hour] / count,
+                    'avg_energy': stats["energy"][hour] / count
+                }
+        
+        return self._time_of_day_insight(hour_stats, sample_size)
+    
+    def _time_of_day_insight(self, hour_stats: Dict[int, Dict[str, Any]],
+                             sample_size: int) -> Optional[PatternInsight]:
         if not hour_stats:
             return None
         
@@ -168,7 +237,7 @@ class PatternAnalyzer:
             pattern_type="time_of_day",
             description="When you tend to have higher focus and energy",
             confidence=ConfidenceLevel.MODERATE,
-            sample_size=len(entries),
+            sample_size=sample_size,
             timeframe="Recent work sessions",
             limitations="Based on self-reported focus/energy scores. Individual daily variation not captured.",
             supporting_data={
@@ -207,6 +276,32 @@ class PatternAnalyzer:
                     'avg_interruptions': statistics.mean([s['interruptions'] for s in sessions])
                 }
         
+        return self._day_of_week_insight(day_stats, len(entries))
+    
+    def _column_day_of_week_patterns(self, timed: "EntryColumns", sample_size: int) -> Optional[PatternInsight]:
+        """_analyze_day_of_week_patterns as a group-by over weekdays"""
+        weekdays = timed.weekday
+        seen = timed.first_seen(weekdays)
+        if len(seen) < 3:  # Need multiple days
+            return None
+        
+        stats = timed.group_by(weekdays, 7)
+        day_stats = {}
+        for weekday in seen:
+            count = stats["count"][weekday]
+            if count >= 2:
+                day_stats[calendar.day_name[weekday]] = {
+                    'session_count': count,
+                    'total_time': stats["minutes"][weekday],
+                    'avg_focus': stats["focus"][weekday] / count,
+                    'avg_energy': stats["energy"][weekday] / count,
+                    'avg_interruptions': stats["interruptions"][weekday] / count
+                }
+        
+        return self._day_of_week_insight(day_stats, sample_size)
+    
+    def _day_of_week_insight(self, day_stats: Dict[str, Dict[str, Any]],
+                             sample_size: int) -> Optional[PatternInsight]:
         if not day_stats:
             return None
         
@@ -222,7 +317,7 @@ class PatternAnalyzer:
             pattern_type="day_of_week",
             description="How your productivity varies by day of the week",
             confidence=ConfidenceLevel.MODERATE,
-            sample_size=len(entries),
+            sample_size=sample_size,
             timeframe="Recent weeks",
             limitations="May reflect work schedule more than personal patterns. External factors not considered.",
             supporting_data={
@@ -239,34 +334,53 @@ class PatternAnalyzer:
         if len(durations) < self.minimum_sample_size:
             return None
         
-        # Calculate duration statistics
-        avg_duration = statistics.mean(durations)
-        median_duration = statistics.median(durations)
-        
-        # Categorize sessions
-        short_sessions = [d for d in durations if d <= 30]
-        medium_sessions = [d for d in durations if 30 < d <= 90]
-        long_sessions = [d for d in durations if d > 90]
+        # Calculate duration statistics and categorize sessions
+        return self._duration_insight(
+            len(durations),
+            statistics.mean(durations),
+            statistics.median(durations),
+            short=len([d for d in durations if d <= 30]),
+            medium=len([d for d in durations if 30 < d <= 90]),
+            long=len([d for d in durations if d > 90])
+        )
+    
+    def _column_duration_patterns(self, timed: "EntryColumns") -> Optional[PatternInsight]:
+        """_analyze_duration_patterns over the duration column"""
+        from .columnar import np
+        durations = timed.minutes
+        if len(durations) < self.minimum_sample_size:
+            return None
         
+        return self._duration_insight(
+            len(durations),
+            int(durations.sum()) / len(durations),
+            float(np.median(durations)),
+            short=int(np.count_nonzero(durations <= 30)),
+            medium=int(np.count_nonzero((durations > 30) & (durations <= 90))),
+            long=int(np.count_nonzero(durations > 90))
+        )
+    
+    def _duration_insight(self, count: int, avg_duration: float, median_duration: float,
+                          short: int, medium: int, long: int) -> PatternInsight:
         duration_distribution = {
-            'short_sessions_30min_or_less': len(short_sessions),
-            'medium_sessions_30_90min': len(medium_sessions),
-            'long_sessions_over_90min': len(long_sessions)
+            'short_sessions_30min_or_less': short,
+            'medium_sessions_30_90min': medium,
+            'long_sessions_over_90min': long
         }
         
         observations = [
             f"Average session: {avg_duration:.0f} minutes",
             f"Typical session: {median_duration:.0f} minutes",
-            f"Short sessions (≤30min): {len(short_sessions)} ({len(short_sessions)/len(durations)*100:.0f}%)",
-            f"Medium sessions (30-90min): {len(medium_sessions)} ({len(medium_sessions)/len(durations)*100:.0f}%)",
-            f"Long sessions (>90min): {len(long_sessions)} ({len(long_sessions)/len(durations)*100:.0f}%)"
+            f"Short sessions (≤30min): {short} ({short/count*100:.0f}%)",
+            f"Medium sessions (30-90min): {medium} ({medium/count*100:.0f}%)",
+            f"Long sessions (>90min): {long} ({long/count*100:.0f}%)"
         ]
         
         return PatternInsight(
             pattern_type="session_duration",
             description="Your typical work session lengths",
             confidence=ConfidenceLevel.MODERATE,
-            sample_size=len(durations),
+            sample_size=count,
             timeframe="All recorded sessions",
             limitations="Duration alone doesn't indicate productivity. Task type and complexity not considered.",
             supporting_data={
@@ -303,6 +417,26 @@ class PatternAnalyzer:
         if evening_energy:
             time_period_stats['evening'] = statistics.mean(evening_energy)
         
+        return self._energy_insight(len(energy_levels), avg_energy, time_period_stats)
+    
+    def _column_energy_patterns(self, recent: "EntryColumns") -> Optional[PatternInsight]:
+        """_analyze_energy_patterns over the energy and start-hour columns"""
+        from .columnar import np
+        if len(recent) < self.minimum_sample_size:
+            return None
+        
+        energy = recent.energy.astype(np.int64)
+        hours = recent.hour
+        time_period_stats = {}
+        for period, first, last in (('morning', 6, 12), ('afternoon', 12, 18), ('evening', 18, 24)):
+            in_period = energy[(hours >= first) & (hours < last)]
+            if len(in_period):
+                time_period_stats[period] = int(in_period.sum()) / len(in_period)
+        
+        return self._energy_insight(len(energy), int(energy.sum()) / len(energy), time_period_stats)
+    
+    def _energy_insight(self, count: int, avg_energy: float,
+                        time_period_stats: Dict[str, float]) -> PatternInsight:
         observations = [f"Overall average energy: {avg_energy:.1f}/5"]
         for period, avg in time_period_stats.items():
             observations.append(f"{period.title()} average: {avg:.1f}/5")
@@ -311,7 +445,7 @@ class PatternAnalyzer:
             pattern_type="energy_levels",
             description="Your self-reported energy patterns",
             confidence=ConfidenceLevel.LOW,  # Self-reported data has limitations
-            sample_size=len(energy_levels),
+            sample_size=count,
             timeframe="All sessions with energy data",
             limitations="Based on subjective self-reports. Daily variation and external factors not captured.",
             supporting_data={
@@ -345,11 +479,32 @@ class PatternAnalyzer:
         low_interruption_focus = [f['focus'] for f in focus_data if f['interruptions'] <= 1]
         high_interruption_focus = [f['focus'] for f in focus_data if f['interruptions'] > 2]
         
+        return self._focus_insight(
+            len(focus_data), avg_focus,
+            len(low_interruption_focus), statistics.mean(low_interruption_focus) if low_interruption_focus else None,
+            len(high_interruption_focus), statistics.mean(high_interruption_focus) if high_interruption_focus else None
+        )
+    
+    def _column_focus_patterns(self, timed: "EntryColumns") -> Optional[PatternInsight]:
+        """_analyze_focus_patterns over the focus and interruption columns"""
+        from .columnar import np
+        if len(timed) < self.minimum_sample_size:
+            return None
+        
+        focus = timed.focus.astype(np.int64)
+        low = focus[timed.interruptions <= 1]
+        high = focus[timed.interruptions > 2]
+        return self._focus_insight(
+            len(focus), int(focus.sum()) / len(focus),
+            len(low), int(low.sum()) / len(low) if len(low) else None,
+            len(high), int(high.sum()) / len(high) if len(high) else None
+        )
+    
+    def _focus_insight(self, count: int, avg_focus: float, low_count: int, low_avg: Optional[float],
+                       high_count: int, high_avg: Optional[float]) -> PatternInsight:
         observations = [f"Overall average focus: {avg_focus:.1f}/5"]
         
-        if low_interruption_focus and high_interruption_focus:
-            low_avg = statistics.mean(low_interruption_focus)
-            high_avg = statistics.mean(high_interruption_focus)
+        if low_count and high_count:
             observations.append(f"Focus with ≤1 interruption: {low_avg:.1f}/5")
             observations.append(f"Focus with >2 interruptions: {high_avg:.1f}/5")
         
@@ -357,14 +512,14 @@ class PatternAnalyzer:
             pattern_type="focus_quality",
             description="Your self-reported focus quality patterns",
             confidence=ConfidenceLevel.LOW,  # Subjective data
-            sample_size=len(focus_data),
+            sample_size=count,
             timeframe="All sessions with focus data",
             limitations="Subjective self-assessment. Doesn't capture flow states or deep work quality.",
             supporting_data={
                 "focus_stats": {
                     "overall_average": avg_focus,
-                    "low_interruption_sessions": len(low_interruption_focus),
-                    "high_interruption_sessions": len(high_interruption_focus)
+                    "low_interruption_sessions": low_count,
+                    "high_interruption_sessions": high_count
                 },
                 "observations": observations
             },
@@ -0,0 +1,124 @@
+"""
+FlowState Caching Tests
+Tests for the bounded caches used by the API server
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from caching import LRUCache, VersionedResultCache
+
+
+class TestLRUCache(unittest.TestCase):
+    """Eviction order, weight bounds and counters"""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_weight_bound_tracks_growing_values(self):
+        cache = LRUCache(max_entries=10, max_weight=10, weigher=len)
+        first = [0] * 4
+        cache.put("first", first)
+        cache.put("second", [0] * 4)
+
+        # Values are re-weighed when touched
+        first.extend([0] * 4)
+        cache.get("first")
+
+        self.assertNotIn("second", cache)
+        self.assertEqual(cache.stats()["weight"], 8)
+
+    def test_counts_hits_and_misses(self):
+        cache = LRUCache(max_entries=5)
+        self.assertIsNone(cache.get("u1"))
+        cache.put("u1", "engine")
+        self.assertEqual(cache.get("u1"), "engine")
+        self.assertIsNone(cache.get("u1", lambda engine: False))
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertEqual(stats["hit_rate"], 0.3333)
+
+    def test_pop_is_not_an_eviction(self):
+        cache = LRUCache(max_entries=5, weigher=len)
+        cache.put("a", "xyz")
+        self.assertEqual(cache.pop("a"), "xyz")
+        self.assertEqual(cache.stats()["evictions"], 0)
+        self.assertEqual(cache.stats()["weight"], 0)
+
+
+class TestVersionedResultCache(unittest.TestCase):
+    """Results are reused until the data version moves"""
+
+    def setUp(self):
+        self.cache = VersionedResultCache(max_entries=10)
+        self.calls = 0
+
+    def lookup(self, user_id, endpoint, params, version):
+        """The server's use: compute on a miss and store the result"""
+        result = self.cache.get(user_id, endpoint, params, version)
+        if result is None:
+            self.calls += 1
+            result = {"calls": self.calls}
+            self.cache.put(user_id, endpoint, params, version, result)
+        return result
+
+    def test_recomputes_on_new_version(self):
+        first = self.lookup("u1", "insights", (30,), 1)
+        again = self.lookup("u1", "insights", (30,), 1)
+        newer = self.lookup("u1", "insights", (30,), 2)
+
+        self.assertIs(first, again)
+        self.assertEqual(newer, {"calls": 2})
+        self.assertEqual(len(self.cache), 1)
+
+    def test_stale_versions_count_as_misses(self):
+        self.lookup("u1", "insights", (30,), 1)
+        self.lookup("u1", "insights", (30,), 1)
+        self.lookup("u1", "insights", (30,), 2)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_params_are_part_of_the_key(self):
+        self.lookup("u1", "insights", (7,), 1)
+        self.lookup("u1", "insights", (30,), 1)
+        self.assertEqual(self.calls, 2)
+
+    def test_invalidate_drops_only_that_user(self):
+        self.lookup("u1", "insights", (30,), 1)
+        self.lookup("u1", "patterns", (), 1)
+        self.lookup("u2", "insights", (30,), 1)
+
+        self.cache.invalidate("u1")
+
+        self.assertEqual(len(self.cache), 1)
+        self.lookup("u2", "insights", (30,), 1)
+        self.assertEqual(self.calls, 3)
+
+    def test_compact_drops_rejected_results(self):
+        self.lookup("u1", "insights", (30, "2024-05-01"), 1)
+        self.lookup("u1", "insights", (30, "2024-05-02"), 1)
+        self.lookup("u2", "patterns", ("2024-05-02",), 3)
+
+        removed = self.cache.compact(lambda user_id, endpoint, params, version:
+                                     params[-1] == "2024-05-02" and version == 1)
+
+        self.assertEqual(removed, 2)
+        self.assertIsNotNone(self.cache.get("u1", "insights", (30, "2024-05-02"), 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
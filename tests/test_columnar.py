@@ -0,0 +1,146 @@
+"""
+FlowState Columnar History Tests
+Tests for the NumPy columns behind vectorized batch analytics
+"""
+
+import os
+import random
+import subprocess
+import sys
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from enhanced_time_tracker import MultiSessionTimeTracker, SessionStatus, SessionTag, TimeEntry
+from src.core.columnar import EntryColumns, numpy_available
+from src.core.pattern_analyzer import PatternAnalyzer
+from src.core.time_tracker import TimeEntry as CoreTimeEntry
+
+
+def tagged_entry(i: int, start: datetime, minutes: float = 30, main_tag: str = "work",
+                 sub_tag: str = None, **fields) -> TimeEntry:
+    return TimeEntry(session_id=f"s-{i}", start_time=start, tag=SessionTag(main_tag, sub_tag),
+                     end_time=start + timedelta(minutes=minutes), status=SessionStatus.COMPLETED, **fields)
+
+
+@unittest.skipUnless(numpy_available(), "NumPy not installed")
+class TestEntryColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.start = datetime(2024, 3, 4, 9, 15, 30, 500000)  # a Monday
+
+    def test_columns_match_entries(self):
+        entries = [
+            tagged_entry(0, self.start, 29.99, energy_level=4, focus_quality=2, interruptions=1),
+            tagged_entry(1, self.start + timedelta(days=1, hours=5), 90, "reading", "deep"),
+            TimeEntry(session_id="live", start_time=self.start, tag=SessionTag("work"))
+        ]
+        columns = EntryColumns.from_entries(entries)
+
+        self.assertEqual(len(columns), 2)
+        self.assertEqual(columns.minutes.tolist(), [entries[0].duration_minutes(), 90])
+        self.assertEqual(columns.tags, [("work", None), ("reading", "deep")])
+        self.assertEqual(columns.tag_id.tolist(), [0, 1])
+        self.assertEqual(columns.hour.tolist(), [9, 14])
+        self.assertEqual(columns.weekday.tolist(), [0, 1])
+        self.assertEqual([EntryColumns.to_date(day) for day in columns.day.tolist()],
+                         [self.start.date(), self.start.date() + timedelta(days=1)])
+        self.assertEqual(columns.energy.tolist(), [4, 3])
+        self.assertEqual(columns.interruptions.tolist(), [1, 0])
+
+    def test_small_ints_are_clipped(self):
+        columns = EntryColumns.from_entries([tagged_entry(0, self.start, interruptions=1000)])
+        self.assertEqual(columns.interruptions.tolist(), [127])
+
+    def test_concat_reencodes_tags(self):
+        first = EntryColumns.from_entries([tagged_entry(0, self.start, main_tag="work")])
+        second = EntryColumns.from_entries([
+            tagged_entry(1, self.start, main_tag="email"),
+            tagged_entry(2, self.start, main_tag="work")
+        ])
+        combined = first.concat(second)
+
+        self.assertEqual(combined.tags, [("work", None), ("email", None)])
+        self.assertEqual(combined.tag_id.tolist(), [0, 1, 0])
+
+    def test_between_and_group_by(self):
+        entries = [tagged_entry(i, self.start + timedelta(hours=i * 10), minutes=10 + i,
+                                main_tag=["work", "email"][i % 2], energy_level=1 + i % 5)
+                   for i in range(12)]
+        columns = EntryColumns.from_entries(entries)
+        window = columns.between(entries[2].start_time, entries[8].start_time)
+        self.assertEqual(len(window), 6)
+
+        groups = window.group_by(window.tag_id, len(window.tags))
+        for tag_id, main_tag in enumerate(["work", "email"]):
+            expected = [e for e in entries[2:8] if e.tag.main_tag == main_tag]
+            self.assertEqual(groups["count"][tag_id], len(expected))
+            self.assertEqual(groups["minutes"][tag_id], sum(e.duration_minutes() for e in expected))
+            self.assertEqual(groups["energy_sq"][tag_id], sum(e.energy_level ** 2 for e in expected))
+
+    def test_tracker_columns_are_incremental(self):
+        tracker = MultiSessionTimeTracker("columns_user")
+        tracker.import_entries([tagged_entry(i, self.start + timedelta(hours=i)) for i in range(3)])
+        built = tracker.history_columns()
+        self.assertEqual(len(built), 3)
+        self.assertIs(tracker.history_columns(), built)
+
+        session = tracker.start_session("email")
+        tracker.end_session(session.session_id)
+        columns = tracker.history_columns()
+        self.assertEqual(len(columns), 4)
+        self.assertEqual(columns.tags, [("work", None), ("email", None)])
+
+        tracker.clear_data()
+        self.assertEqual(len(tracker.history_columns()), 0)
+
+    def test_tracker_import_leaves_numpy_unloaded(self):
+        # The server imports the tracker but never asks for columns
+        result = subprocess.run(
+            [sys.executable, "-c", "import sys, enhanced_time_tracker, src.core.pattern_analyzer; "
+                                   "print('numpy' in sys.modules)"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+@unittest.skipUnless(numpy_available(), "NumPy not installed")
+class TestColumnPatterns(unittest.TestCase):
+    """Vectorized pattern analysis agrees with the per-entry loops"""
+
+    def summarize(self, patterns):
+        return {name: (p.pattern_type, p.sample_size, p.supporting_data, p.confidence, p.timeframe)
+                for name, p in patterns.items()}
+
+    def test_same_insights_as_loops(self):
+        rng = random.Random(7)
+        now = datetime.now()
+        entries = []
+        for _ in range(400):
+            start = now - timedelta(seconds=rng.randint(0, 86400 * 45))
+            end = start + timedelta(seconds=rng.randint(0, 150 * 60)) if rng.random() < 0.95 else None
+            entries.append(CoreTimeEntry(start_time=start, end_time=end, category=rng.choice("abc"),
+                                         energy_level=rng.randint(1, 5), focus_quality=rng.randint(1, 5),
+                                         interruptions=rng.randint(0, 5)))
+
+        loops = PatternAnalyzer(columnar_min_entries=len(entries) + 1).analyze_time_patterns(entries)
+        analyzer = PatternAnalyzer(columnar_min_entries=0)
+        with mock.patch.object(analyzer, "analyze_column_patterns",
+                               wraps=analyzer.analyze_column_patterns) as columnar:
+            vectorized = analyzer.analyze_time_patterns(entries)
+        columnar.assert_called_once()
+
+        self.assertEqual(set(loops), set(vectorized))
+        self.assertEqual(self.summarize(vectorized), self.summarize(loops))
+
+    def test_insufficient_data(self):
+        columns = EntryColumns.from_entries([tagged_entry(0, datetime.now() - timedelta(hours=1))])
+        patterns = PatternAnalyzer().analyze_column_patterns(columns)
+        self.assertEqual(list(patterns), ["insufficient_data"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,320 @@
+"""
+FlowState Multi-Session Tracker Tests
+Tests for the tag-based MultiSessionTimeTracker used by the API server
+"""
+
+import copy
+import gc
+import os
+import pickle
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from enhanced_time_tracker import (
+    ConfidenceLevel, MultiSessionTimeTracker, SessionStatus, SessionTag, TimeEntry, _interned_tags
+)
+
+
+class TestSessionListeners(unittest.TestCase):
+    """Change notifications emitted by the tracker"""
+
+    def setUp(self):
+        self.tracker = MultiSessionTimeTracker("listener_user")
+        self.events = []
+        self.tracker.add_listener(lambda event, entry: self.events.append((event, entry.session_id)))
+
+    def test_lifecycle_events(self):
+        first = self.tracker.start_session("work")
+        second = self.tracker.start_session("learning")
+        self.tracker.pause_session(first.session_id)
+        self.tracker.resume_session(first.session_id)
+        self.tracker.end_session(first.session_id)
+        self.tracker.cancel_session(second.session_id)
+
+        self.assertEqual(self.events, [
+            ("start", first.session_id),
+            ("start", second.session_id),
+            ("pause", first.session_id),
+            ("resume", first.session_id),
+            ("end", first.session_id),
+            ("cancel", second.session_id),
+        ])
+
+    def test_no_events_for_unknown_sessions(self):
+        self.tracker.end_session("missing")
+        self.tracker.pause_session("missing")
+        entry = self.tracker.start_session("work")
+        self.tracker.resume_session(entry.session_id)  # not paused: no change
+
+        self.assertEqual(self.events, [("start", entry.session_id)])
+
+    def test_remove_listener(self):
+        self.tracker.remove_listener(self.tracker._listeners[0])
+        self.tracker.start_session("work")
+        self.assertEqual(self.events, [])
+
+
+class TestImportEntries(unittest.TestCase):
+    """Bulk import of completed history"""
+
+    def test_import_merges_in_start_order(self):
+        tracker = MultiSessionTimeTracker("import_user")
+        live = tracker.start_session("work")
+        events = []
+        tracker.add_listener(lambda event, entry: events.append(event))
+
+        start = datetime.now() - timedelta(days=2)
+        history = [
+            TimeEntry(session_id=f"old-{i}", start_time=start + timedelta(hours=i),
+                      tag=SessionTag("reading"), end_time=start + timedelta(hours=i, minutes=20),
+                      status=SessionStatus.COMPLETED, estimated_minutes=15)
+            for i in (2, 0, 1)
+        ]
+
+        imported = tracker.import_entries(history)
+
+        self.assertEqual(len(imported), 3)
+        self.assertEqual([e.session_id for e in tracker.entries],
+                         ["old-0", "old-1", "old-2", live.session_id])
+        self.assertEqual(tracker.get_user_tags(), ["reading", "work"])
+        self.assertEqual(tracker.estimation_history, [(15, 20)] * 3)
+        self.assertEqual(list(tracker.active_sessions), [live.session_id])
+        self.assertEqual(events, [])
+
+
+class TestApplyChanges(unittest.TestCase):
+    """Catching up with entries written by another process"""
+
+    def copies(self, tracker):
+        return [TimeEntry.from_dict(entry.to_dict()) for entry in tracker.entries]
+
+    def test_changes_match_the_writer(self):
+        writer = MultiSessionTimeTracker("changes_user")
+        reader = MultiSessionTimeTracker("changes_user")
+        kept = writer.start_session("work", estimated_minutes=30)
+        ended = writer.start_session("email")
+        reader.apply_changes(self.copies(writer))
+        self.assertEqual(sorted(reader.active_sessions), sorted(writer.active_sessions))
+
+        writer.pause_session(kept.session_id)
+        writer.end_session(ended.session_id)
+        added = writer.start_session("reading")
+        for _ in range(2):
+            self.assertTrue(reader.apply_changes(self.copies(writer)))
+
+        self.assertEqual([e.to_dict() for e in reader.entries], [e.to_dict() for e in writer.entries])
+        self.assertEqual(sorted(reader.active_sessions), sorted([kept.session_id, added.session_id]))
+        self.assertEqual(reader.active_sessions[kept.session_id].status, SessionStatus.PAUSED)
+        self.assertEqual(reader.get_user_tags(), writer.get_user_tags())
+        self.assertEqual(reader.get_daily_summary(), writer.get_daily_summary())
+
+    def test_unapplicable_changes_leave_the_tracker_alone(self):
+        tracker = MultiSessionTimeTracker("changes_user")
+        session = tracker.start_session("work")
+        tracker.end_session(session.session_id)
+
+        edited = TimeEntry.from_dict(session.to_dict())
+        edited.user_notes = "Changed later"
+        moved = TimeEntry.from_dict(session.to_dict())
+        moved.start_time -= timedelta(minutes=5)
+        for change in (edited, moved):
+            self.assertFalse(tracker.apply_changes([change]))
+        self.assertEqual(tracker.get_entry(session.session_id).user_notes, "")
+
+
+class TestTimeTotals(unittest.TestCase):
+    """Totals without the per-tag breakdown"""
+
+    def test_totals_match_tag_analytics(self):
+        tracker = MultiSessionTimeTracker("totals_user")
+        start = datetime.now() - timedelta(days=40)
+        tracker.import_entries([
+            TimeEntry(session_id=f"s-{i}", start_time=start + timedelta(days=i * 5),
+                      tag=SessionTag("work" if i % 2 else "reading"),
+                      end_time=start + timedelta(days=i * 5, minutes=10 + i),
+                      status=SessionStatus.COMPLETED)
+            for i in range(8)
+        ])
+        tracker.start_session("work")
+
+        for days in (7, 30, 60):
+            analytics = tracker.get_tag_analytics(days)
+            totals = tracker.get_time_totals(days)
+            self.assertEqual(totals["total_entries"], analytics["total_entries"])
+            self.assertEqual(totals["total_time_minutes"], analytics.get("total_time_minutes", 0))
+        self.assertEqual(tracker.get_time_totals(1)["total_entries"], 0)
+
+
+
+class TestEntryIndex(unittest.TestCase):
+    """Indexed reads agree with scans over every entry"""
+
+    def setUp(self):
+        self.tracker = MultiSessionTimeTracker("index_user")
+        self.start = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=20)
+        # Imported out of order, in two batches
+        self.tracker.import_entries([self.entry(i) for i in range(0, 40, 2)][::-1])
+        self.tracker.import_entries([self.entry(i) for i in range(1, 40, 2)])
+        self.live = self.tracker.start_session("work")
+
+    def entry(self, i: int) -> TimeEntry:
+        start = self.start + timedelta(hours=i * 11)
+        return TimeEntry(session_id=f"s-{i}", start_time=start,
+                         tag=SessionTag(["work", "reading", "email"][i % 3], "deep" if i % 2 else None),
+                         end_time=start + timedelta(minutes=5 + i), status=SessionStatus.COMPLETED)
+
+    def test_lookup_by_session_id(self):
+        self.assertEqual(self.tracker.get_entry("s-7").session_id, "s-7")
+        self.assertIs(self.tracker.get_entry(self.live.session_id), self.live)
+        self.assertEqual(self.tracker.get_session("s-7")["duration_minutes"], 12)
+        self.assertIsNone(self.tracker.get_entry("missing"))
+
+    def test_range_and_tag_queries(self):
+        low, high = self.start + timedelta(days=3), self.start + timedelta(days=9)
+        expected = sorted((e for e in self.tracker.entries if low <= e.start_time < high),
+                          key=lambda e: e.start_time)
+
+        self.assertEqual(self.tracker.find_entries(low, high), expected)
+        self.assertEqual(self.tracker.find_entries(low, high, main_tag="email"),
+                         [e for e in expected if e.tag.main_tag == "email"])
+        self.assertEqual(self.tracker.find_entries(main_tag="missing"), [])
+        self.assertEqual(len(self.tracker.find_entries()), 41)
+
+    def test_daily_summary_uses_day_bucket(self):
+        day = (self.start + timedelta(days=5)).date()
+        expected = [e for e in self.tracker.entries if e.start_time.date() == day]
+
+        summary = self.tracker.get_daily_summary(day)
+
+        self.assertEqual(summary["entries_count"], len(expected))
+        self.assertEqual(summary["total_minutes"], sum(e.duration_minutes() for e in expected))
+
+    def test_reload_and_clear_rebuild_the_index(self):
+        reloaded = MultiSessionTimeTracker("index_user")
+        reloaded.load_entries(list(self.tracker.entries))
+        self.assertIs(reloaded.get_entry(self.live.session_id), self.live)
+        self.assertEqual(reloaded.find_entries(), self.tracker.find_entries())
+
+        reloaded.clear_data()
+        self.assertIsNone(reloaded.get_entry("s-1"))
+        self.assertEqual(reloaded.find_entries(), [])
+
+
+class TestRollups(unittest.TestCase):
+    """Summaries merged from (day, main_tag, sub_tag) rollups"""
+
+    def test_ended_sessions_update_daily_summary(self):
+        tracker = MultiSessionTimeTracker("rollup_user")
+        first = tracker.start_session("work", "review")
+        tracker.end_session(first.session_id, energy_level=5, focus_quality=4, interruptions=2)
+        second = tracker.start_session("work")
+        self.assertEqual(tracker.get_daily_summary()["entries_count"], 1)
+
+        tracker.end_session(second.session_id, energy_level=3, focus_quality=2)
+        cancelled = tracker.start_session("email")
+        tracker.cancel_session(cancelled.session_id)
+
+        summary = tracker.get_daily_summary()
+        self.assertEqual(summary["entries_count"], 2)
+        self.assertEqual(summary["main_tags"]["work"]["sub_tags"], ["review"])
+        self.assertEqual(set(summary["tags"]), {"#work/review", "#work"})
+        self.assertEqual(summary["average_energy"], 4)
+        self.assertEqual(summary["average_focus"], 3)
+        self.assertEqual(summary["total_interruptions"], 2)
+
+    def test_tag_analytics_cutoff_inside_a_day(self):
+        tracker = MultiSessionTimeTracker("rollup_user")
+        now = datetime.now()
+        tracker.import_entries([
+            TimeEntry(session_id=f"s-{minutes}", start_time=start, tag=SessionTag("work", "deep"),
+                      end_time=start + timedelta(minutes=minutes), status=SessionStatus.COMPLETED)
+            for minutes, start in ((10, now - timedelta(days=7, minutes=5)),
+                                   (20, now - timedelta(days=6, hours=23, minutes=55)),
+                                   (40, now - timedelta(days=2)))
+        ])
+
+        analytics = tracker.get_tag_analytics(7)
+        work = analytics["main_tag_analysis"]["work"]
+
+        self.assertEqual(analytics["total_entries"], 2)
+        self.assertEqual(analytics["total_time_minutes"], 60)
+        self.assertEqual(work["avg_duration"], 30)
+        self.assertEqual(work["duration_stddev"], 10)
+        self.assertEqual(work["sub_tags"]["deep"]["session_count"], 2)
+        self.assertEqual(tracker.get_time_totals(7)["total_time_minutes"], 60)
+
+
+class TestCloseStaleSession(unittest.TestCase):
+    """Sessions closed on the user's behalf"""
+
+    def test_closed_entry_is_flagged_and_not_learned_from(self):
+        tracker = MultiSessionTimeTracker("stale_user")
+        ended = []
+        tracker.add_listener(lambda event, entry: ended.append((event, entry.session_id)))
+        entry = tracker.start_session("work", estimated_minutes=30)
+        end_time = entry.start_time + timedelta(minutes=30)
+
+        closed = tracker.close_stale_session(entry.session_id, end_time, "Auto-closed")
+
+        self.assertIs(closed, entry)
+        self.assertEqual(entry.status, SessionStatus.COMPLETED)
+        self.assertEqual(entry.confidence, ConfidenceLevel.UNCERTAIN)
+        self.assertEqual(entry.end_time, end_time)
+        self.assertEqual(entry.user_notes, "Auto-closed")
+        self.assertEqual(ended[-1], ("end", entry.session_id))
+        self.assertEqual(tracker.active_sessions, {})
+        self.assertEqual(tracker.estimation_history, [])
+        self.assertIsNone(tracker.close_stale_session(entry.session_id, end_time, "again"))
+
+        reloaded = MultiSessionTimeTracker("stale_user")
+        reloaded.load_entries([entry])
+        self.assertEqual(reloaded.estimation_history, [])
+
+
+class TestCompactEntries(unittest.TestCase):
+    """Slotted entries and shared tag instances"""
+
+    def test_tags_are_interned(self):
+        tag = SessionTag("work", "meeting")
+        self.assertIs(SessionTag(main_tag="work", sub_tag="meeting"), tag)
+        self.assertIs(SessionTag.from_dict({"main_tag": "work", "sub_tag": "meeting"}), tag)
+        self.assertIs(copy.deepcopy(tag), tag)
+        self.assertIs(pickle.loads(pickle.dumps(tag)), tag)
+        self.assertIsNot(SessionTag("work"), tag)
+        self.assertEqual(SessionTag("work").sub_tag, None)
+        with self.assertRaises(AttributeError):
+            tag.main_tag = "email"
+
+    def test_unused_tags_are_released(self):
+        tag = SessionTag("one-off", "tag")
+        self.assertIn(("one-off", "tag"), _interned_tags)
+
+        del tag
+        gc.collect()
+        self.assertNotIn(("one-off", "tag"), _interned_tags)
+
+    def test_entries_are_slotted_and_round_trip(self):
+        tracker = MultiSessionTimeTracker("compact_user")
+        first = tracker.start_session("Work", "review", "Read the PR", estimated_minutes=20)
+        second = tracker.start_session("work", "review")
+        tracker.end_session(first.session_id, user_notes="Done", energy_level=4)
+
+        self.assertIs(first.tag, second.tag)
+        self.assertFalse(hasattr(first, "__dict__"))
+        with self.assertRaises(AttributeError):
+            first.unknown_field = 1
+
+        for entry in (first, second):
+            data = entry.to_dict()
+            restored = TimeEntry.from_dict(data)
+            self.assertEqual(restored, entry)
+            self.assertEqual(restored.to_dict(), data)
+            self.assertIs(restored.tag, entry.tag)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+FlowState Metrics Tests
+Tests for the Prometheus text exposition used by /metrics
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Rendering of counters, histograms and callback gauges"""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = self.registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            latency.observe(value, ("/a",))
+
+        lines = self.registry.render().splitlines()
+
+        self.assertIn("# TYPE latency_seconds histogram", lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="1.0"} 3', lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_count{route="/a"} 4', lines)
+        self.assertIn('latency_seconds_sum{route="/a"} 4.25', lines)
+
+    def test_counter_and_gauges(self):
+        errors = self.registry.counter("errors_total", "Errors", ("route",))
+        errors.inc(("/a",))
+        errors.inc(("/a",), 2)
+        self.registry.gauge("users", "Users", lambda: 7)
+        self.registry.gauge("hits_total", "Hits", lambda: {("engines",): 3, ("results",): None},
+                            ("cache",), kind="counter")
+
+        text = self.registry.render()
+
+        self.assertIn('errors_total{route="/a"} 3', text)
+        self.assertIn("users 7", text)
+        self.assertIn("# TYPE hits_total counter", text)
+        self.assertIn('hits_total{cache="engines"} 3', text)
+        self.assertNotIn('cache="results"', text)
+
+    def test_label_values_are_escaped(self):
+        counter = self.registry.counter("c_total", "C", ("path",))
+        counter.inc(('say "hi"\n',))
+        self.assertIn('c_total{path="say \\"hi\\"\\n"} 1', self.registry.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
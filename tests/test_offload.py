@@ -0,0 +1,78 @@
+"""
+FlowState Analytics Offloading Tests
+Tests for the thread pool that keeps analytics off the event loop
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from offload import AnalyticsExecutor
+
+
+class TestAnalyticsExecutor(unittest.TestCase):
+    """Per-user serialization and loop responsiveness"""
+
+    def setUp(self):
+        self.executor = AnalyticsExecutor(max_workers=4, max_pending=8)
+        self.active = {}
+        self.overlaps = []
+        self.same_user_overlap = False
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def job(self, user_id: str) -> str:
+        with self.lock:
+            self.active[user_id] = self.active.get(user_id, 0) + 1
+            self.overlaps.append(sum(self.active.values()))
+            self.same_user_overlap |= self.active[user_id] > 1
+        time.sleep(0.05)
+        with self.lock:
+            self.active[user_id] -= 1
+        return user_id
+
+    def test_same_user_runs_serially_other_users_in_parallel(self):
+        async def scenario():
+            jobs = [self.executor.run(user, self.job, user) for user in ("a", "a", "b", "b")]
+            return await asyncio.gather(*jobs)
+
+        self.assertEqual(asyncio.run(scenario()), ["a", "a", "b", "b"])
+        self.assertFalse(self.same_user_overlap)
+        self.assertEqual(max(self.overlaps), 2)
+        self.assertEqual(self.executor.stats()["completed"], 4)
+        self.assertEqual(self.executor.pending, 0)
+
+    def test_event_loop_stays_responsive(self):
+        async def scenario():
+            heavy = asyncio.ensure_future(self.executor.run("a", time.sleep, 0.3))
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            latency = time.perf_counter() - started
+            self.assertEqual(self.executor.pending, 1)
+            await heavy
+            return latency
+
+        self.assertLess(asyncio.run(scenario()), 0.2)
+
+    def test_saturation(self):
+        async def scenario():
+            jobs = [asyncio.ensure_future(self.executor.run("a", time.sleep, 0.02)) for _ in range(8)]
+            await asyncio.sleep(0)
+            saturated = self.executor.saturated
+            await asyncio.gather(*jobs)
+            return saturated
+
+        self.assertTrue(asyncio.run(scenario()))
+        self.assertFalse(self.executor.saturated)
+
+
+if __name__ == "__main__":
+    unittest.main()
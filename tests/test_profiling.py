@@ -0,0 +1,96 @@
+"""
+FlowState Request Profiling Tests
+Tests for admission, capture and storage of request profiles
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from offload import AnalyticsExecutor
+from profiling import ProfilingMiddleware, RequestProfiler, profile_thread, token_matches
+
+
+def busy_work(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+def threaded_work() -> int:
+    with profile_thread():
+        return busy_work(1000)
+
+
+class TestRequestProfiler(unittest.TestCase):
+    """Admission limits and capture through the middleware"""
+
+    def setUp(self):
+        self.executor = AnalyticsExecutor(max_workers=2, max_pending=4)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def request(self, profiler: RequestProfiler, headers) -> dict:
+        async def app(scope, receive, send):
+            await self.executor.run("user", threaded_work)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        middleware = ProfilingMiddleware(app, profiler, "secret")
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/api/test", "headers": headers}
+        asyncio.run(middleware(scope, None, send))
+        return dict(sent[0]["headers"])
+
+    def test_capture_includes_worker_threads(self):
+        profiler = RequestProfiler()
+        headers = self.request(profiler, [(b"x-flowstate-profile", b"1"),
+                                          (b"x-flowstate-admin-token", b"secret")])
+
+        capture = profiler.get(headers[b"x-flowstate-profile-id"].decode())
+        self.assertEqual(capture.status, 200)
+        self.assertIn("busy_work", capture.text())
+        self.assertEqual(profiler.list()[0]["path"], "/api/test")
+
+    def test_rate_limited(self):
+        profiler = RequestProfiler(rate="1 per hour")
+        flagged = [(b"x-flowstate-profile", b"1"), (b"x-flowstate-admin-token", b"secret")]
+
+        first = self.request(profiler, flagged)
+        second = self.request(profiler, flagged)
+
+        self.assertNotEqual(first[b"x-flowstate-profile-id"], b"refused")
+        self.assertEqual(second[b"x-flowstate-profile-id"], b"refused")
+        self.assertEqual(profiler.stats(), {"stored": 1, "captured": 1, "refused": 1})
+
+    def test_one_profile_at_a_time(self):
+        profiler = RequestProfiler()
+        capture = profiler.begin("GET", "/a")
+        self.assertIsNotNone(capture)
+        self.assertIsNone(profiler.begin("GET", "/b"))
+
+    def test_unflagged_requests_pass_through(self):
+        profiler = RequestProfiler()
+        headers = self.request(profiler, [(b"x-flowstate-admin-token", b"secret")])
+        self.assertNotIn(b"x-flowstate-profile-id", headers)
+        self.assertEqual(profiler.stats()["captured"], 0)
+
+    def test_profile_thread_is_noop_outside_profiled_requests(self):
+        self.assertEqual(threaded_work(), busy_work(1000))
+
+    def test_token_matches(self):
+        self.assertTrue(token_matches("secret", "secret"))
+        self.assertFalse(token_matches("Secret", "secret"))
+        self.assertFalse(token_matches(None, "secret"))
+        self.assertFalse(token_matches("", ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
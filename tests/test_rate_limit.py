@@ -0,0 +1,93 @@
+"""
+FlowState Rate Limiting Tests
+Tests for the per-client token buckets and per-route budgets
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from rate_limit import RateLimiter, client_address, parse_networks, parse_rate
+
+
+class TestParseRate(unittest.TestCase):
+
+    def test_formats(self):
+        self.assertEqual(parse_rate("1000 per hour"), (1000, 3600))
+        self.assertEqual(parse_rate("5/second"), (5, 1))
+        self.assertEqual(parse_rate("2 per Minutes"), (2, 60))
+        with self.assertRaises(ValueError):
+            parse_rate("lots")
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Burst, refill and bucket isolation"""
+
+    def setUp(self):
+        self.limiter = RateLimiter("3 per minute", {"/insights": "1 per minute"})
+
+    def test_burst_then_retry_after(self):
+        waits = [self.limiter.acquire("u1", "/tags", now=0.0) for _ in range(4)]
+
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(waits[3], 20.0)
+        self.assertEqual(self.limiter.acquire("u1", "/tags", now=20.0), 0.0)
+        self.assertEqual(self.limiter.stats()["rejected"], 1)
+
+    def test_route_budgets_are_per_client_and_route(self):
+        self.assertEqual(self.limiter.acquire("u1", "/insights", now=0.0), 0.0)
+        self.assertGreater(self.limiter.acquire("u1", "/insights", now=1.0), 0)
+
+        # Other routes and other clients are unaffected
+        self.assertEqual(self.limiter.acquire("u1", "/sessions/start", now=1.0), 0.0)
+        self.assertEqual(self.limiter.acquire("u2", "/insights", now=1.0), 0.0)
+
+    def test_default_budget_is_shared_by_all_routes(self):
+        for route in ("/tags", "/sessions", "/export"):
+            self.assertEqual(self.limiter.acquire("u1", route, now=0.0), 0.0)
+
+        self.assertGreater(self.limiter.acquire("u1", "/summary", now=0.0), 0)
+        self.assertGreater(self.limiter.acquire("u1", "/insights", now=0.0), 0)
+        # The refused request left the route's own budget untouched
+        self.assertEqual(self.limiter.acquire("u1", "/insights", now=20.0), 0.0)
+
+    def test_compact_drops_refilled_buckets(self):
+        self.limiter.acquire("u1", "/tags", now=0.0)
+        self.limiter.acquire("u2", "/insights", now=0.0)
+
+        self.assertEqual(self.limiter.compact(now=30.0), 2)
+        self.assertEqual(self.limiter.stats()["buckets"], 1)
+        self.assertEqual(self.limiter.compact(now=60.0), 1)
+
+
+
+class TestClientAddress(unittest.TestCase):
+    """X-Forwarded-For is believed only as far as trusted proxies wrote it"""
+
+    def setUp(self):
+        self.proxies = parse_networks("10.0.0.0/8, 192.168.1.1")
+
+    def test_untrusted_peer_is_the_client(self):
+        self.assertEqual(client_address("203.0.113.5", "198.51.100.1", self.proxies), "203.0.113.5")
+        self.assertEqual(client_address("10.0.0.2", None, self.proxies), "10.0.0.2")
+
+    def test_walks_back_through_trusted_proxies(self):
+        self.assertEqual(client_address("10.0.0.2", "203.0.113.5", self.proxies), "203.0.113.5")
+        self.assertEqual(client_address("10.0.0.2", "198.51.100.1, 203.0.113.5, 192.168.1.1", self.proxies),
+                         "203.0.113.5")
+
+    def test_stops_at_malformed_hops(self):
+        self.assertEqual(client_address("10.0.0.2", "203.0.113.5, unknown", self.proxies), "10.0.0.2")
+        self.assertEqual(client_address("10.0.0.2", "10.0.0.3", self.proxies), "10.0.0.3")
+
+    def test_invalid_proxy_is_an_error(self):
+        with self.assertRaises(ValueError):
+            parse_networks("10.0.0.0/8, proxy.internal")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+FlowState Scheduler Tests
+Tests for the periodic background jobs run inside the API process
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from scheduler import Job, Scheduler
+
+
+class TestJob(unittest.TestCase):
+
+    def test_needs_exactly_one_schedule(self):
+        with self.assertRaises(ValueError):
+            Job("job", lambda: None)
+        with self.assertRaises(ValueError):
+            Job("job", lambda: None, interval=5, hour=3)
+
+    def test_daily_next_delay(self):
+        job = Job("rollups", lambda: None, hour=3)
+        self.assertEqual(job.next_delay(datetime(2024, 5, 1, 1, 30)), 90 * 60)
+        self.assertEqual(job.next_delay(datetime(2024, 5, 1, 3, 0)), 24 * 3600)
+        self.assertEqual(Job("tick", lambda: None, interval=5).next_delay(datetime.now()), 5)
+
+
+class TestScheduler(unittest.TestCase):
+    """Running, leasing and failure handling"""
+
+    def test_runs_sync_and_async_jobs(self):
+        scheduler = Scheduler()
+
+        async def async_job():
+            return "async"
+
+        scheduler.every(60, "sync", lambda: "sync")
+        scheduler.every(60, "async", async_job)
+
+        async def run():
+            return [await scheduler.run_job("sync"), await scheduler.run_job("async")]
+
+        self.assertEqual(asyncio.run(run()), ["sync", "async"])
+        self.assertEqual(scheduler.jobs["sync"].runs, 1)
+        self.assertIsNotNone(scheduler.stats()["jobs"]["async"]["last_run"])
+
+    def test_exclusive_job_skipped_without_lease(self):
+        leases = []
+        scheduler = Scheduler(lease=lambda name, seconds: leases.append((name, seconds)) or False)
+        scheduler.every(10, "reap", lambda: "ran", exclusive=True)
+
+        self.assertIsNone(asyncio.run(scheduler.run_job("reap")))
+        self.assertEqual(leases, [("reap", 15)])
+        self.assertEqual((scheduler.jobs["reap"].runs, scheduler.jobs["reap"].skipped), (0, 1))
+
+    def test_failures_are_counted_not_raised(self):
+        scheduler = Scheduler()
+
+        def broken():
+            raise RuntimeError("boom")
+
+        scheduler.every(60, "broken", broken)
+        with self.assertLogs("scheduler", level="ERROR"):
+            self.assertIsNone(asyncio.run(scheduler.run_job("broken")))
+        self.assertEqual(scheduler.jobs["broken"].failures, 1)
+
+    def test_interval_loop_until_stopped(self):
+        scheduler = Scheduler()
+        scheduler.every(0.01, "tick", lambda: None)
+
+        async def run():
+            scheduler.start()
+            self.assertTrue(scheduler.running)
+            await asyncio.sleep(0.1)
+            await scheduler.stop()
+
+        asyncio.run(run())
+        self.assertFalse(scheduler.running)
+        self.assertGreaterEqual(scheduler.jobs["tick"].runs, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+FlowState Serialization Tests
+Tests for the fast JSON encoders used by the API server
+"""
+
+import json
+import os
+import sys
+import unittest
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from enhanced_time_tracker import MultiSessionTimeTracker, SessionStatus, SessionTag
+import serialization
+from serialization import FastJSONResponse, encode_entry, encode_tag
+
+
+class TestEncodeEntry(unittest.TestCase):
+    """The fixed-layout encoder matches json.dumps(to_dict())"""
+
+    def test_matches_to_dict(self):
+        tracker = MultiSessionTimeTracker("serial_user")
+        active = tracker.start_session("work", task_description='Quote "this" \\ and ünïcode\n')
+        done = tracker.start_session("learning", "react", estimated_minutes=30)
+        done.start_time -= timedelta(minutes=31)
+        tracker.end_session(done.session_id, user_notes="tab\there", interruptions=2)
+
+        for entry in (active, done):
+            self.assertEqual(encode_entry(entry), json.dumps(entry.to_dict()))
+            self.assertEqual(encode_tag(entry.tag), json.dumps(entry.tag.to_dict()))
+
+    def test_round_trips_through_from_dict(self):
+        tracker = MultiSessionTimeTracker("serial_user")
+        entry = tracker.start_session("work")
+        tracker.end_session(entry.session_id)
+
+        restored = json.loads(encode_entry(entry))
+        self.assertEqual(restored, entry.to_dict())
+
+
+class TestFastJSONResponse(unittest.TestCase):
+    """Rendering of the types analytics payloads contain"""
+
+    def test_renders_like_jsonable_encoder(self):
+        now = datetime(2024, 5, 1, 9, 30, 15, 250000)
+        body = FastJSONResponse({
+            "status": SessionStatus.PAUSED,
+            "tags": {"work"},
+            "when": now,
+            "pairs": [(25, 30)],
+            3: "int key"
+        }).body
+
+        self.assertEqual(json.loads(body), {
+            "status": "paused",
+            "tags": ["work"],
+            "when": now.isoformat(),
+            "pairs": [[25, 30]],
+            "3": "int key"
+        })
+
+
+@dataclass
+class Stat:
+    name: str
+    value: float
+
+
+class TestBackendsAgree(unittest.TestCase):
+    """orjson and the json fallback produce the same bytes"""
+
+    def test_same_bytes(self):
+        if serialization.orjson is None:
+            self.skipTest("orjson not installed")
+        tracker = MultiSessionTimeTracker("serial_user")
+        active = tracker.start_session("work", task_description="ünïcode")
+        done = tracker.start_session("learning", "react")
+        tracker.end_session(done.session_id)
+        payload = {
+            "entries": [active, done],
+            "tag": SessionTag("work", None),
+            "stats": [Stat("mean", 1.5), Stat("stdev", float("nan"))],
+            "ratio": float("inf"),
+            "status": SessionStatus.ACTIVE,
+            "when": datetime(2024, 5, 1, 9, 30),
+            7: {"tags": {"work"}}
+        }
+
+        body = serialization.dumps(payload)
+        self.assertEqual(body, serialization._dumps_json(payload))
+        decoded = json.loads(body)
+        self.assertNotIn("end_time", decoded["entries"][0])
+        self.assertEqual(decoded["stats"][1], {"name": "stdev", "value": None})
+        self.assertIsNone(decoded["ratio"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,592 @@
+"""
+FlowState API Server Tests
+Tests for HTTP behaviour of the FastAPI backend against a temporary database
+"""
+
+import asyncio
+import json
+import marshal
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ.setdefault("FLOWSTATE_DB_PATH", os.path.join(_tmpdir.name, "flowstate.db"))
+os.environ.setdefault("FLOWSTATE_ADMIN_TOKEN", "test-admin-token")
+
+from fastapi.testclient import TestClient
+
+import server
+
+
+class ServerTestCase(unittest.TestCase):
+    """Shared client and a fresh user per test"""
+
+    def setUp(self):
+        self.client = TestClient(server.app)
+        response = self.client.post("/api/users", json={"username": "tester"})
+        self.user_id = response.json()["user_id"]
+
+    def tearDown(self):
+        self.client.delete(f"/api/users/{self.user_id}")
+
+    def url(self, path: str = "") -> str:
+        return f"/api/users/{self.user_id}{path}"
+
+
+class TestConditionalReads(ServerTestCase):
+    """ETag / If-None-Match on per-user reads"""
+
+    def test_unchanged_data_returns_304(self):
+        for path in ["", "/summary/daily", "/tags", "/insights"]:
+            first = self.client.get(self.url(path))
+            etag = first.headers["etag"]
+
+            second = self.client.get(self.url(path), headers={"If-None-Match": etag})
+
+            self.assertEqual(second.status_code, 304, path)
+            self.assertEqual(second.content, b"")
+            self.assertEqual(second.headers["etag"], etag)
+
+    def test_write_changes_etag(self):
+        etag = self.client.get(self.url("/tags")).headers["etag"]
+        self.client.post(self.url("/sessions/start"), json={"main_tag": "work"})
+
+        response = self.client.get(self.url("/tags"), headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["etag"], etag)
+        self.assertEqual(response.json()["user_tags"], ["work"])
+
+    def test_params_change_etag(self):
+        month = self.client.get(self.url("/insights")).headers["etag"]
+        week = self.client.get(self.url("/insights?timeframe_days=7")).headers["etag"]
+        self.assertNotEqual(month, week)
+
+    def test_unknown_user_is_404(self):
+        self.assertEqual(self.client.get("/api/users/missing/tags").status_code, 404)
+
+
+class TestCrossWorkerWrites(ServerTestCase):
+    """Cached engines catch up with writes made by other worker processes"""
+
+    def setUp(self):
+        super().setUp()
+        self.other = server.SQLiteRepository(server.DB_PATH)
+        self.addCleanup(self.other.close)
+
+    def write_elsewhere(self, entry):
+        """Save an entry the way another worker would"""
+        with self.other.transaction():
+            self.other.save_entries(self.user_id, [entry], self.other.bump_data_version(self.user_id))
+
+    def test_other_workers_writes_are_applied_incrementally(self):
+        self.client.post(self.url("/sessions/start"), json={"main_tag": "work"})
+        engine = server.get_or_create_user_engine(self.user_id)
+
+        elsewhere = server.MultiSessionTimeTracker(self.user_id).start_session("email")
+        self.write_elsewhere(elsewhere)
+        with mock.patch.object(server, "load_user_engine") as reload:
+            refreshed = server.get_or_create_user_engine(self.user_id)
+        reload.assert_not_called()
+
+        self.assertIs(refreshed, engine)
+        self.assertIn(elsewhere.session_id, engine.time_tracker.active_sessions)
+        self.assertEqual(engine.data_version, self.other.get_data_version(self.user_id))
+        self.assertEqual(self.client.get(self.url("/tags")).json()["user_tags"], ["email", "work"])
+
+    def test_stale_write_is_rejected(self):
+        session_id = self.client.post(self.url("/sessions/start"), json={"main_tag": "work"}).json()["session_id"]
+        engine = server.get_or_create_user_engine(self.user_id)
+        self.write_elsewhere(server.MultiSessionTimeTracker(self.user_id).start_session("email"))
+
+        with self.assertRaises(server.VersionConflict):
+            server.save_session(self.user_id, engine, session_id)
+        self.assertIsNone(server.engine_cache.peek(self.user_id))
+
+        # Handlers catch up before writing, so the next request goes through
+        response = self.client.post(self.url("/sessions/end"), json={"session_id": session_id})
+        self.assertEqual(response.status_code, 200)
+
+    def stream_changes(self, change):
+        """Run change(engine) inside a locked block and return what a stream received"""
+        async def scenario():
+            queue = server.session_events.subscribe(self.user_id)
+            try:
+                async with server.locked_user_engine(self.user_id) as engine:
+                    change(engine)
+                    self.assertTrue(queue.empty())
+                return [queue.get_nowait() for _ in range(queue.qsize())]
+            finally:
+                server.session_events.unsubscribe(self.user_id, queue)
+
+        return asyncio.run(scenario())
+
+    def test_stored_changes_are_streamed(self):
+        def start(engine):
+            entry = engine.time_tracker.start_session("work")
+            server.save_session(self.user_id, engine, entry.session_id)
+
+        events = self.stream_changes(start)
+
+        self.assertEqual([event["type"] for event in events], ["start"])
+        self.assertEqual(events[0]["count"], 1)
+
+    def test_conflicting_changes_are_not_streamed(self):
+        def start(engine):
+            entry = engine.time_tracker.start_session("work")
+            self.write_elsewhere(server.MultiSessionTimeTracker(self.user_id).start_session("email"))
+            with self.assertRaises(server.VersionConflict):
+                server.save_session(self.user_id, engine, entry.session_id)
+
+        self.assertEqual(self.stream_changes(start), [])
+
+
+class TestBatchImport(ServerTestCase):
+    """Bulk ingestion of completed sessions"""
+
+    def sessions(self, count: int, **overrides):
+        base = datetime.now() - timedelta(days=30)
+        sessions = []
+        for i in range(count):
+            start = base + timedelta(hours=i)
+            session = {
+                "main_tag": "Work" if i % 2 else "learning",
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(minutes=30)).isoformat(),
+                "estimated_minutes": 25
+            }
+            session.update(overrides)
+            sessions.append(session)
+        return sessions
+
+    def test_imports_batch(self):
+        response = self.client.post(self.url("/sessions/batch"), json={"sessions": self.sessions(50)})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["imported"], 50)
+        self.assertEqual(response.json()["main_tags"], ["learning", "work"])
+        self.assertEqual(self.client.get(self.url("/tags")).json()["user_tags"], ["learning", "work"])
+        accuracy = self.client.get(self.url("/estimation-accuracy")).json()
+        self.assertEqual(accuracy["sample_size"], 50)
+
+        # Survives a reload from storage
+        server.engine_cache.clear()
+        export = self.client.get(self.url("/tags/analytics?timeframe_days=60")).json()
+        self.assertEqual(export["total_entries"], 50)
+
+    def test_invalid_rows_reject_whole_batch(self):
+        sessions = self.sessions(3)
+        sessions[1]["end_time"] = sessions[1]["start_time"]
+        sessions[2]["energy_level"] = 9
+
+        response = self.client.post(self.url("/sessions/batch"), json={"sessions": sessions})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual([error["index"] for error in response.json()["detail"]["errors"]], [1, 2])
+        self.assertEqual(self.client.get(self.url("/tags")).json()["user_tags"], [])
+
+
+class TestIdempotencyKeys(ServerTestCase):
+    """Retried session starts and ends are replayed, not repeated"""
+
+    def start(self, key: str, main_tag: str = "work"):
+        return self.client.post(self.url("/sessions/start"), json={"main_tag": main_tag},
+                                headers={"Idempotency-Key": key})
+
+    def test_retried_start_creates_one_session(self):
+        first = self.start("start-1")
+        retry = self.start("start-1")
+
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry.headers["idempotent-replayed"], "true")
+        self.assertNotIn("idempotent-replayed", first.headers)
+        self.assertEqual(self.client.get(self.url("/sessions/active")).json()["count"], 1)
+
+        # A fresh key starts a second session
+        self.assertNotEqual(self.start("start-2").json()["session_id"], first.json()["session_id"])
+
+    def test_retried_end_replays_original_result(self):
+        session_id = self.start("start-1").json()["session_id"]
+        body = {"session_id": session_id, "focus_quality": 4}
+        headers = {"Idempotency-Key": "end-1"}
+
+        first = self.client.post(self.url("/sessions/end"), json=body, headers=headers)
+        retry = self.client.post(self.url("/sessions/end"), json=body, headers=headers)
+        unkeyed = self.client.post(self.url("/sessions/end"), json=body)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(unkeyed.status_code, 404)
+
+    def test_key_in_progress_is_not_run_twice(self):
+        # Another worker has claimed the key and is still running the request
+        self.assertEqual(self.start("start-1").status_code, 200)
+        payload = server.StartSessionRequest(main_tag="work")
+        fingerprint = server.check_idempotency_key(self.user_id, "start-2", "sessions/start", payload)[0]
+        self.assertIsNotNone(fingerprint)
+
+        response = self.start("start-2")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.headers["retry-after"], "1")
+        self.assertEqual(self.client.get(self.url("/sessions/active")).json()["count"], 1)
+
+    def test_failed_request_releases_its_key(self):
+        body = {"session_id": "missing"}
+        headers = {"Idempotency-Key": "end-1"}
+        first = self.client.post(self.url("/sessions/end"), json=body, headers=headers)
+        retry = self.client.post(self.url("/sessions/end"), json=body, headers=headers)
+
+        self.assertEqual((first.status_code, retry.status_code), (404, 404))
+        self.assertNotIn("idempotent-replayed", retry.headers)
+
+    def test_key_reused_for_different_request(self):
+        self.start("start-1")
+        self.assertEqual(self.start("start-1", main_tag="learning").status_code, 422)
+        self.assertEqual(self.start("x" * 256).status_code, 400)
+        self.assertEqual(self.client.get(self.url("/sessions/active")).json()["count"], 1)
+
+
+class TestSessionListing(ServerTestCase):
+    """Cursor pagination and filters of GET /sessions"""
+
+    def setUp(self):
+        super().setUp()
+        self.base = datetime(2024, 5, 1, 8, 0)
+        sessions = []
+        for i in range(7):
+            start = self.base + timedelta(hours=i)
+            sessions.append({
+                "main_tag": "work" if i % 2 else "learning",
+                "sub_tag": "deep" if i < 4 else None,
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(minutes=30)).isoformat()
+            })
+        self.client.post(self.url("/sessions/batch"), json={"sessions": sessions})
+
+    def pages(self, query: str = ""):
+        ids, cursor = [], None
+        while True:
+            params = query + (f"&cursor={cursor}" if cursor else "")
+            body = self.client.get(self.url(f"/sessions?limit=3{params}")).json()
+            ids.append([session["session_id"] for session in body["sessions"]])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_history_in_start_order(self):
+        pages = self.pages()
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        everything = self.client.get(self.url("/sessions?limit=100")).json()["sessions"]
+        self.assertEqual([session["session_id"] for session in everything], sum(pages, []))
+        starts = [session["start_time"] for session in everything]
+        self.assertEqual(starts, sorted(starts))
+
+    def test_cursor_is_stable_when_sessions_are_added(self):
+        first = self.client.get(self.url("/sessions?limit=3")).json()
+        expected = self.client.get(self.url(f"/sessions?limit=3&cursor={first['next_cursor']}")).json()
+        self.client.post(self.url("/sessions/start"), json={"main_tag": "work"})
+        earlier = (self.base - timedelta(days=1)).isoformat()
+        self.client.post(self.url("/sessions/batch"), json={"sessions": [
+            {"main_tag": "work", "start_time": earlier, "end_time": (self.base - timedelta(hours=20)).isoformat()}
+        ]})
+
+        again = self.client.get(self.url(f"/sessions?limit=3&cursor={first['next_cursor']}")).json()
+        self.assertEqual(again["sessions"], expected["sessions"])
+
+    def test_filters(self):
+        window = self.client.get(self.url(
+            f"/sessions?from={(self.base + timedelta(hours=2)).isoformat()}"
+            f"&to={(self.base + timedelta(hours=5)).isoformat()}"
+        )).json()
+        self.assertEqual(window["count"], 3)
+
+        self.assertEqual(sum(map(len, self.pages("&tag=work"))), 3)
+        self.assertEqual(sum(map(len, self.pages("&tag=work/deep"))), 2)
+        display = self.client.get(self.url("/sessions"), params={"tag": "#work/deep"}).json()
+        self.assertEqual(display["count"], 2)
+        typed = self.client.get(self.url("/sessions"), params={"tag": " #Work / deep "}).json()
+        self.assertEqual(typed["count"], 2)
+        self.client.post(self.url("/sessions/start"), json={"main_tag": "work"})
+        active = self.client.get(self.url("/sessions?status=active")).json()["sessions"]
+        self.assertEqual([session["status"] for session in active], ["active"])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url("/sessions?cursor=not-a-cursor")).status_code, 400)
+        self.assertEqual(self.client.get(self.url("/sessions?status=bogus")).status_code, 422)
+        self.assertEqual(self.client.get(self.url("/sessions?limit=0")).status_code, 422)
+        self.assertEqual(self.client.get("/api/users/missing/sessions").status_code, 404)
+
+
+class TestSparseFields(ServerTestCase):
+    """fields= on /insights and /tags/analytics"""
+
+    def setUp(self):
+        super().setUp()
+        base = datetime.now() - timedelta(days=5)
+        self.client.post(self.url("/sessions/batch"), json={"sessions": [
+            {
+                "main_tag": "work" if i % 2 else "learning",
+                "start_time": (base + timedelta(hours=i)).isoformat(),
+                "end_time": (base + timedelta(hours=i, minutes=20 + i)).isoformat(),
+                "estimated_minutes": 25
+            } for i in range(6)
+        ]})
+        self.full = self.client.get(self.url("/insights")).json()
+
+    def test_each_section_matches_full_response(self):
+        for section in server.INSIGHT_SECTIONS:
+            response = self.client.get(self.url(f"/insights?fields={section}"))
+            self.assertEqual(response.json(), {section: self.full[section]}, section)
+
+    def test_dotted_paths_select_subtrees(self):
+        response = self.client.get(self.url(
+            "/insights?fields=time_tracking_insights.total_tracked_time,estimation_accuracy.sample_size"
+        ))
+        self.assertEqual(response.json(), {
+            "time_tracking_insights": {"total_tracked_time": self.full["time_tracking_insights"]["total_tracked_time"]},
+            "estimation_accuracy": {"sample_size": 6}
+        })
+        self.assertNotEqual(response.headers["etag"], self.client.get(self.url("/insights")).headers["etag"])
+
+    def test_unrequested_sections_are_not_computed(self):
+        tracker = server.get_or_create_user_engine(self.user_id).time_tracker
+        with mock.patch.object(tracker, "get_tag_analytics", side_effect=AssertionError("computed")):
+            response = self.client.get(self.url("/insights?fields=time_tracking_insights,integration_insights"))
+            totals = self.client.get(self.url("/tags/analytics?fields=total_entries,total_time_minutes"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["time_tracking_insights"], self.full["time_tracking_insights"])
+        self.assertEqual(response.json()["integration_insights"], self.full["integration_insights"])
+        self.assertEqual(totals.json(), {
+            "total_entries": self.full["tag_insights"]["total_entries"],
+            "total_time_minutes": self.full["tag_insights"]["total_time_minutes"]
+        })
+
+    def test_unknown_field_is_400(self):
+        self.assertEqual(self.client.get(self.url("/insights?fields=bogus")).status_code, 400)
+        self.assertEqual(self.client.get(self.url("/insights?fields=,")).status_code, 400)
+        self.assertEqual(self.client.get(self.url("/tags/analytics?fields=summary")).status_code, 400)
+
+
+class TestStreamingExport(ServerTestCase):
+    """Exports streamed from storage"""
+
+    def setUp(self):
+        super().setUp()
+        for tag in ("work", "learning", "admin"):
+            started = self.client.post(self.url("/sessions/start"), json={"main_tag": tag})
+            self.client.post(self.url("/sessions/end"), json={"session_id": started.json()["session_id"]})
+
+    def test_ndjson_export(self):
+        response = self.client.get(self.url("/export?stream=ndjson"))
+
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        records = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual([r["type"] for r in records], ["export", "entry", "entry", "entry", "end"])
+        self.assertEqual(records[0]["user_info"]["username"], "tester")
+        self.assertEqual(records[-1]["entry_count"], 3)
+        self.assertEqual({r["tag"]["main_tag"] for r in records[1:-1]}, {"work", "learning", "admin"})
+
+    def test_chunked_json_export(self):
+        server.EXPORT_BATCH_SIZE, original = 2, server.EXPORT_BATCH_SIZE
+        try:
+            document = self.client.get(self.url("/export?stream=json")).json()
+        finally:
+            server.EXPORT_BATCH_SIZE = original
+
+        self.assertEqual(document["entry_count"], 3)
+        self.assertEqual(len(document["entries"]), 3)
+        self.assertIn("user_profile", document)
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get(self.url("/export?stream=xml")).status_code, 400)
+
+
+class TestMetricsEndpoint(ServerTestCase):
+    """Prometheus metrics exposition"""
+
+    def test_routes_are_labelled_by_template(self):
+        self.client.get(self.url("/tags/analytics"))
+
+        response = self.client.get("/metrics")
+
+        self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('route="/api/users/{user_id}/tags/analytics"', response.text)
+        self.assertNotIn(self.user_id, response.text)
+        self.assertIn('flowstate_analytics_duration_seconds_count{function="get_tag_analytics"}', response.text)
+        self.assertIn("flowstate_time_entries ", response.text)
+
+
+class TestLoadProtection(ServerTestCase):
+    """Rate limits and analytics load shedding"""
+
+    def test_insights_budget_returns_429(self):
+        original = server.rate_limiter
+        server.rate_limiter = server.RateLimiter("100 per minute", {
+            "/api/users/{user_id}/insights": "2 per minute"
+        })
+        try:
+            statuses = [self.client.get(self.url("/insights")).status_code for _ in range(3)]
+            tags = self.client.get(self.url("/tags"))
+        finally:
+            server.rate_limiter = original
+
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(tags.status_code, 200)
+
+    def test_clients_behind_a_trusted_proxy_get_their_own_budget(self):
+        original = server.rate_limiter
+        server.rate_limiter = server.RateLimiter("2 per minute")
+        proxy = TestClient(server.app, client=("10.0.0.2", 50000))
+        first, second = {"X-Forwarded-For": "203.0.113.5"}, {"X-Forwarded-For": "203.0.113.6"}
+        # Addresses left of the one the proxy appended are the client's own claim
+        spoofed = {"X-Forwarded-For": "198.51.100.1, 203.0.113.5"}
+        try:
+            with mock.patch.object(server, "TRUSTED_PROXIES", server.parse_networks("10.0.0.0/8")):
+                statuses = [proxy.get(self.url("/tags"), headers=first).status_code for _ in range(2)]
+                statuses.append(proxy.get(self.url("/tags"), headers=spoofed).status_code)
+                statuses.append(proxy.get(self.url("/tags"), headers=second).status_code)
+            # Without trusting the proxy every forwarded client shares its budget
+            statuses += [proxy.get(self.url("/tags"), headers=second).status_code for _ in range(3)]
+        finally:
+            server.rate_limiter = original
+
+        self.assertEqual(statuses, [200, 200, 429, 200, 200, 200, 429])
+
+    def test_saturated_analytics_are_shed(self):
+        executor = server.analytics_executor
+        executor.pending += executor.max_pending
+        try:
+            response = self.client.get(self.url("/tags/analytics?timeframe_days=3"))
+        finally:
+            executor.pending -= executor.max_pending
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["retry-after"], str(executor.retry_after))
+
+
+class TestRequestProfiling(ServerTestCase):
+    """Admin-flagged requests run under cProfile"""
+
+    ADMIN = {"X-FlowState-Admin-Token": "test-admin-token"}
+
+    def test_flagged_request_is_profiled(self):
+        response = self.client.get(self.url("/insights"), headers={"X-FlowState-Profile": "1", **self.ADMIN})
+        profile_id = response.headers["x-flowstate-profile-id"]
+        self.assertEqual(response.status_code, 200)
+
+        listed = self.client.get("/api/admin/profiles", headers=self.ADMIN).json()
+        self.assertIn(profile_id, [profile["profile_id"] for profile in listed["profiles"]])
+
+        text = self.client.get(f"/api/admin/profiles/{profile_id}", headers=self.ADMIN).text
+        # The analytics ran on a worker thread and are included
+        self.assertIn("get_comprehensive_insights", text)
+
+        raw = self.client.get(f"/api/admin/profiles/{profile_id}?format=prof", headers=self.ADMIN)
+        self.assertIsInstance(marshal.loads(raw.content), dict)
+
+    def test_requests_without_valid_token_are_not_profiled(self):
+        for headers in ({}, {"X-FlowState-Profile": "1"},
+                        {"X-FlowState-Profile": "1", "X-FlowState-Admin-Token": "wrong"}):
+            response = self.client.get(self.url("/tags"), headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("x-flowstate-profile-id", response.headers)
+
+    def test_admin_endpoints_require_token(self):
+        self.assertEqual(self.client.get("/api/admin/profiles").status_code, 403)
+        missing = self.client.get("/api/admin/profiles/missing", headers=self.ADMIN)
+        self.assertEqual(missing.status_code, 404)
+
+
+
+class TestBackgroundJobs(ServerTestCase):
+    """Stale-session reaping, rollup precomputation and cache compaction"""
+
+    def start_backdated_session(self, hours: float, estimated_minutes: int) -> str:
+        session_id = self.client.post(self.url("/sessions/start"), json={
+            "main_tag": "work", "estimated_minutes": estimated_minutes
+        }).json()["session_id"]
+        engine = server.get_or_create_user_engine(self.user_id)
+        engine.time_tracker.active_sessions[session_id].start_time = datetime.now() - timedelta(hours=hours)
+        server.save_session(self.user_id, engine, session_id)
+        return session_id
+
+    def test_reaper_closes_only_stale_sessions(self):
+        stale = self.start_backdated_session(20, 45)
+        fresh = self.start_backdated_session(1, 45)
+
+        self.assertGreaterEqual(asyncio.run(server.reap_stale_sessions()), 1)
+
+        sessions = {session["session_id"]: session
+                    for session in self.client.get(self.url("/sessions")).json()["sessions"]}
+        self.assertEqual(sessions[stale]["status"], "completed")
+        self.assertEqual(sessions[stale]["confidence"], "uncertain")
+        worked = (datetime.fromisoformat(sessions[stale]["end_time"])
+                  - datetime.fromisoformat(sessions[stale]["start_time"]))
+        self.assertEqual(worked, timedelta(minutes=45))
+        self.assertIn("Auto-closed", sessions[stale]["user_notes"])
+        self.assertEqual(sessions[fresh]["status"], "active")
+
+    def test_precomputed_rollups_are_served_from_cache(self):
+        self.client.post(self.url("/sessions/start"), json={"main_tag": "work"})
+        # Evicted users are the ones whose first dashboard read is slowest
+        server.engine_cache.pop(self.user_id)
+
+        self.assertGreaterEqual(asyncio.run(server.precompute_rollups()), 1)
+        self.assertIn(self.user_id, server.engine_cache)
+
+        engine = server.get_or_create_user_engine(self.user_id)
+        with mock.patch.object(engine, "get_daily_productivity_summary") as compute:
+            response = self.client.get(self.url("/summary/daily"))
+        self.assertEqual(response.status_code, 200)
+        compute.assert_not_called()
+
+    def test_compaction_drops_superseded_results(self):
+        self.client.get(self.url("/patterns"))
+        self.client.post(self.url("/sessions/start"), json={"main_tag": "work"})
+
+        self.assertGreaterEqual(server.compact_caches()["results"], 1)
+        engine = server.get_or_create_user_engine(self.user_id)
+        today = datetime.now().date().isoformat()
+        self.assertIsNone(server.result_cache.get(self.user_id, "patterns", (today,), engine.data_version - 1))
+
+    def test_writes_wait_for_running_analytics(self):
+        engine = server.get_or_create_user_engine(self.user_id)
+        release = threading.Event()
+
+        async def scenario():
+            job = asyncio.ensure_future(server.analytics_executor.run(self.user_id, release.wait, 5))
+            await asyncio.sleep(0.05)
+            write = asyncio.ensure_future(
+                server.start_session(self.user_id, server.StartSessionRequest(main_tag="work"), None)
+            )
+            await asyncio.sleep(0.05)
+            # The job still runs, so the engine it reads must not have changed
+            self.assertFalse(write.done())
+            self.assertEqual(engine.time_tracker.active_sessions, {})
+            release.set()
+            await job
+            return await write
+
+        session = asyncio.run(scenario())
+        self.assertIn(session["session_id"], engine.time_tracker.active_sessions)
+
+    def test_health_reports_jobs(self):
+        jobs = self.client.get("/api/health").json()["scheduler"]["jobs"]
+        self.assertEqual(jobs["reap_stale_sessions"]["exclusive"], True)
+        self.assertEqual(jobs["precompute_rollups"]["schedule"], f"daily at {server.ROLLUP_HOUR:02d}:00")
+
+
+if __name__ == "__main__":
+    unittest.main()
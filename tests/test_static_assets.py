@@ -0,0 +1,131 @@
+"""
+FlowState Static Asset Tests
+Tests for in-memory, precompressed serving of the frontend build
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from static_assets import IMMUTABLE, REVALIDATE, StaticAssetCache
+
+
+class TestStaticAssetCache(unittest.TestCase):
+    """Compression, validators, cache headers and reloads"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.write("index.html", "<html>" + "app " * 200 + "</html>")
+        self.write("static/js/main.3f2a9c1b.js", "console.log('hashed');" * 50)
+        self.cache = StaticAssetCache(self.tmpdir.name, check_interval=0)
+        self.cache.refresh()
+
+        app = FastAPI()
+
+        @app.get("/{path:path}")
+        async def serve(path: str, request: Request):
+            return self.cache.get(path).response(request)
+
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, relative: str, text: str) -> None:
+        path = os.path.join(self.tmpdir.name, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_serves_gzip_when_accepted(self):
+        response = self.client.get("/index.html", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        self.assertTrue(response.text.startswith("<html>app"))
+
+        plain = self.client.get("/index.html", headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("content-encoding", plain.headers)
+        self.assertNotEqual(plain.headers["etag"], response.headers["etag"])
+
+    def test_cache_headers(self):
+        hashed = self.client.get("/static/js/main.3f2a9c1b.js")
+        index = self.client.get("/index.html")
+
+        self.assertEqual(hashed.headers["cache-control"], IMMUTABLE)
+        self.assertEqual(index.headers["cache-control"], REVALIDATE)
+        self.assertTrue(hashed.headers["content-type"].startswith(("application/javascript", "text/javascript")))
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get("/index.html").headers["etag"]
+        response = self.client.get("/index.html", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_reloads_changed_files(self):
+        before = self.client.get("/index.html").headers["etag"]
+        hashed = self.cache.get("static/js/main.3f2a9c1b.js")
+        time.sleep(0.01)
+        self.write("index.html", "<html>new build</html>")
+        self.write("manifest.json", "{}")
+
+        # The lookup that notices the change starts a check without waiting for it
+        self.client.get("/index.html")
+        self.cache.wait()
+        response = self.client.get("/index.html")
+
+        self.assertEqual(response.text, "<html>new build</html>")
+        self.assertNotEqual(response.headers["etag"], before)
+        self.assertIn("manifest.json", self.cache)
+        self.assertIs(self.cache.get("static/js/main.3f2a9c1b.js"), hashed)
+        self.assertEqual(self.cache.stats()["reloads"], 2)
+
+    def test_lookups_before_loading_read_from_disk(self):
+        cache = StaticAssetCache(self.tmpdir.name)
+        asset = cache.get("index.html")
+        self.assertEqual(asset.variants, {})
+        self.assertTrue(asset.body.startswith(b"<html>app"))
+        self.assertIsNone(cache.get("../" + os.path.basename(self.tmpdir.name) + "/missing.html"))
+        self.assertIsNone(cache.get("../../etc/passwd"))
+
+        # The first lookup started the full load
+        cache.wait()
+        self.assertIn("gzip", cache.get("index.html").variants)
+        self.assertEqual(cache.stats()["reloads"], 1)
+
+    def test_lookups_do_not_wait_for_a_running_reload(self):
+        self.client.get("/index.html")
+        held = threading.Event()
+        done = threading.Event()
+
+        def slow_reload():
+            # Holds the tree lock as a reload does, e.g. brotli over a large bundle
+            with self.cache._lock:
+                held.set()
+                done.wait(3)
+
+        reload = threading.Thread(target=slow_reload)
+        reload.start()
+        held.wait()
+        started = time.monotonic()
+        response = self.client.get("/index.html")
+        elapsed = time.monotonic() - started
+        done.set()
+        reload.join()
+        self.cache.wait()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(elapsed, 1)
+
+if __name__ == "__main__":
+    unittest.main()
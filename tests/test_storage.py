@@ -0,0 +1,314 @@
+"""
+FlowState Storage Tests
+Tests for the SQLite repository backing the API server
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from enhanced_time_tracker import MultiSessionTimeTracker, SessionStatus
+from storage import IDEMPOTENCY_PENDING, SQLiteRepository, VersionConflict
+
+
+class TestSQLiteRepository(unittest.TestCase):
+    """Round-trip users, profiles and entries through SQLite"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "flowstate.db")
+        self.repo = SQLiteRepository(self.db_path)
+        self.repo.create_user({
+            "user_id": "u1",
+            "username": "tester",
+            "created_at": datetime.now().isoformat(),
+            "preferences": {"theme": "boring"}
+        })
+
+    def tearDown(self):
+        self.repo.close()
+        self.tmpdir.cleanup()
+
+    def test_user_round_trip(self):
+        user = self.repo.get_user("u1")
+        self.assertEqual(user["username"], "tester")
+        self.assertEqual(user["preferences"], {"theme": "boring"})
+        self.assertNotIn("is_demo", user)
+        self.assertTrue(self.repo.user_exists("u1"))
+        self.assertIsNone(self.repo.get_user("missing"))
+
+    def test_entries_survive_reopen(self):
+        tracker = MultiSessionTimeTracker("u1")
+        done = tracker.start_session("work", "review", estimated_minutes=10)
+        done.start_time -= timedelta(minutes=12)
+        tracker.end_session(done.session_id, energy_level=4)
+        running = tracker.start_session("learning")
+        self.repo.save_entries("u1", tracker.entries)
+
+        self.repo.close()
+        self.repo = SQLiteRepository(self.db_path)
+
+        restored = MultiSessionTimeTracker("u1")
+        restored.load_entries(self.repo.load_entries("u1"))
+
+        self.assertEqual(len(restored.entries), 2)
+        self.assertEqual(list(restored.active_sessions), [running.session_id])
+        self.assertEqual(restored.get_user_tags(), ["learning", "work"])
+        self.assertEqual(restored.estimation_history, [(10, 12)])
+
+        entry = self.repo.get_entry("u1", done.session_id)
+        self.assertEqual(entry.to_dict(), done.to_dict())
+        self.assertEqual(entry.status, SessionStatus.COMPLETED)
+
+    def test_transaction_rolls_back_batch(self):
+        tracker = MultiSessionTimeTracker("u1")
+        entry = tracker.start_session("work")
+
+        with self.assertRaises(RuntimeError):
+            with self.repo.transaction():
+                self.repo.save_entries("u1", [entry])
+                self.repo.save_profile("u1", {"user_id": "u1"})
+                raise RuntimeError("abort")
+
+        self.assertEqual(self.repo.load_entries("u1"), [])
+        self.assertIsNone(self.repo.get_profile("u1"))
+
+    def test_iter_entries_pages_in_start_order(self):
+        tracker = MultiSessionTimeTracker("u1")
+        entries = [tracker.start_session("work") for _ in range(7)]
+        entries[3].start_time = entries[4].start_time  # tie broken by session_id
+        self.repo.save_entries("u1", entries)
+
+        batches = list(self.repo.iter_entries("u1", batch_size=3))
+
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+        streamed = [entry.session_id for batch in batches for entry in batch]
+        self.assertEqual(streamed, [entry.session_id for entry in self.repo.load_entries("u1")])
+        self.assertEqual(list(self.repo.iter_entries("missing")), [])
+
+    def test_iter_entries_does_not_wait_for_the_write_lock(self):
+        tracker = MultiSessionTimeTracker("u1")
+        self.repo.save_entries("u1", [tracker.start_session("work") for _ in range(3)])
+
+        # A write in progress on another thread holds the shared connection
+        held, done = threading.Event(), threading.Event()
+
+        def write():
+            with self.repo.transaction():
+                held.set()
+                done.wait(3)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        held.wait()
+        try:
+            started = time.monotonic()
+            batches = list(self.repo.iter_entries("u1", batch_size=2))
+            elapsed = time.monotonic() - started
+        finally:
+            done.set()
+            writer.join()
+
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertLess(elapsed, 1)
+
+    def test_entry_count_is_maintained(self):
+        tracker = MultiSessionTimeTracker("u1")
+        entries = [tracker.start_session("work") for _ in range(3)]
+        self.repo.save_entries("u1", entries)
+        tracker.end_session(entries[0].session_id)
+        self.repo.save_entries("u1", entries[:1], version=1)
+        self.assertEqual(self.repo.count_entries(), 3)
+
+        self.repo.close()
+        self.repo = SQLiteRepository(self.db_path)
+        self.assertEqual(self.repo.count_entries(), 3)
+
+        self.repo.delete_user("u1")
+        self.assertEqual(self.repo.count_entries(), 0)
+
+    def test_list_entries_filters_and_resumes_after_cursor(self):
+        tracker = MultiSessionTimeTracker("u1")
+        base = datetime(2024, 3, 1, 9, 0)
+        entries = []
+        for i in range(6):
+            entry = tracker.start_session("work" if i % 2 else "learning", "deep" if i < 3 else None)
+            entry.start_time = base + timedelta(hours=i)
+            entries.append(entry)
+        tracker.end_session(entries[0].session_id)
+        self.repo.save_entries("u1", entries)
+
+        first = self.repo.list_entries("u1", limit=4)
+        rest = self.repo.list_entries(
+            "u1", after=(first[-1].start_time.isoformat(), first[-1].session_id), limit=4
+        )
+        self.assertEqual([e.session_id for e in first + rest], [e.session_id for e in entries])
+
+        window = self.repo.list_entries("u1", start=base + timedelta(hours=1), end=base + timedelta(hours=3))
+        self.assertEqual([e.session_id for e in window], [e.session_id for e in entries[1:3]])
+        tagged = self.repo.list_entries("u1", main_tag="work", sub_tag="deep")
+        self.assertEqual([e.session_id for e in tagged], [entries[1].session_id])
+        completed = self.repo.list_entries("u1", status=SessionStatus.COMPLETED.value)
+        self.assertEqual([e.session_id for e in completed], [entries[0].session_id])
+
+    def stored_keys(self, user_id: str):
+        rows = self.repo._query(
+            "SELECT idempotency_key FROM idempotency_keys WHERE user_id = ? ORDER BY idempotency_key",
+            (user_id,)
+        )
+        return [row["idempotency_key"] for row in rows]
+
+    def test_idempotent_responses_expire_and_are_bounded(self):
+        now = datetime.now()
+        response = {"fingerprint": "f", "status": 200, "body": "{}"}
+        self.repo.save_idempotent_response("u1", "old", response, now - timedelta(seconds=1), 10)
+        self.repo.save_idempotent_response("u1", "k1", response, now + timedelta(hours=1), 10)
+
+        self.assertEqual(self.stored_keys("u1"), ["k1"])
+        self.assertEqual(self.repo.reserve_idempotency_key("u1", "k1", "f", now + timedelta(minutes=1)), response)
+
+        for i in range(5):
+            self.repo.save_idempotent_response("u1", f"k{i + 2}", response, now + timedelta(hours=1, seconds=i), 3)
+        self.assertEqual(self.stored_keys("u1"), ["k4", "k5", "k6"])
+        self.assertEqual(self.repo.purge_idempotency_keys(now + timedelta(hours=2)), 3)
+
+    def test_idempotency_keys_are_bounded_per_user(self):
+        now = datetime.now()
+        response = {"fingerprint": "f", "status": 200, "body": "{}"}
+        self.repo.create_user({"user_id": "u2", "username": "other", "created_at": now.isoformat()})
+        self.repo.save_idempotent_response("u2", "kept", response, now + timedelta(hours=1), 1)
+
+        for i in range(3):
+            self.repo.save_idempotent_response("u1", f"k{i}", response, now + timedelta(hours=1, seconds=i), 1)
+
+        self.assertEqual(self.stored_keys("u2"), ["kept"])
+        self.assertEqual(self.stored_keys("u1"), ["k2"])
+
+    def test_pending_idempotency_keys_are_not_trimmed(self):
+        now = datetime.now()
+        response = {"fingerprint": "f", "status": 200, "body": "{}"}
+        self.assertIsNone(self.repo.reserve_idempotency_key("u1", "running", "f", now + timedelta(minutes=1)))
+
+        for i in range(3):
+            self.repo.save_idempotent_response("u1", f"k{i}", response, now + timedelta(hours=1, seconds=i), 1)
+
+        self.assertEqual(self.stored_keys("u1"), ["k2", "running"])
+        retry = self.repo.reserve_idempotency_key("u1", "running", "f", now + timedelta(minutes=1))
+        self.assertEqual(retry["status"], IDEMPOTENCY_PENDING)
+
+    def test_idempotency_key_reservation(self):
+        now = datetime.now()
+        self.assertIsNone(self.repo.reserve_idempotency_key("u1", "k", "f", now + timedelta(minutes=1)))
+        pending = self.repo.reserve_idempotency_key("u1", "k", "f", now + timedelta(minutes=1))
+        self.assertEqual(pending["status"], IDEMPOTENCY_PENDING)
+
+        self.repo.release_idempotency_key("u1", "k")
+        self.assertIsNone(self.repo.reserve_idempotency_key("u1", "k", "f", now - timedelta(seconds=1)))
+        # A lapsed claim can be taken over
+        self.assertIsNone(self.repo.reserve_idempotency_key("u1", "k", "f", now + timedelta(minutes=1)))
+
+        response = {"fingerprint": "f", "status": 200, "body": "{}"}
+        self.repo.save_idempotent_response("u1", "k", response, now + timedelta(hours=1), 10)
+        self.repo.release_idempotency_key("u1", "k")
+        self.assertEqual(self.repo.reserve_idempotency_key("u1", "k", "f", now + timedelta(minutes=1)), response)
+
+    def test_find_open_entries(self):
+        tracker = MultiSessionTimeTracker("u1")
+        old = tracker.start_session("work")
+        old.start_time = datetime.now() - timedelta(hours=20)
+        recent = tracker.start_session("reading")
+        done = tracker.start_session("email")
+        done.start_time = old.start_time
+        tracker.end_session(done.session_id)
+        self.repo.save_entries("u1", [old, recent, done])
+
+        found = self.repo.find_open_entries(datetime.now() - timedelta(hours=12))
+
+        self.assertEqual([(user_id, entry.session_id) for user_id, entry in found], [("u1", old.session_id)])
+
+    def test_find_recent_users(self):
+        self.repo.create_user({"user_id": "u2", "username": "other", "created_at": datetime.now().isoformat()})
+        self.repo.create_user({"user_id": "idle", "username": "idle", "created_at": datetime.now().isoformat()})
+        tracker = MultiSessionTimeTracker("u1")
+        early = tracker.start_session("work")
+        early.start_time = datetime.now() - timedelta(hours=3)
+        stale = tracker.start_session("email")
+        stale.start_time = datetime.now() - timedelta(days=3)
+        self.repo.save_entries("u1", [early])
+        self.repo.save_entries("u2", [tracker.start_session("reading")])
+        self.repo.save_entries("idle", [stale])
+
+        since = datetime.now() - timedelta(days=1)
+
+        self.assertEqual(self.repo.find_recent_users(since), ["u2", "u1"])
+        self.assertEqual(self.repo.find_recent_users(since, limit=1), ["u2"])
+
+    def test_leases(self):
+        self.assertTrue(self.repo.acquire_lease("reap", "worker-a", 60))
+        self.assertTrue(self.repo.acquire_lease("reap", "worker-a", 60))
+        self.assertFalse(self.repo.acquire_lease("reap", "worker-b", 60))
+
+        # Expired or released leases go to the next worker
+        self.assertTrue(self.repo.acquire_lease("purge", "worker-a", -1))
+        self.assertTrue(self.repo.acquire_lease("purge", "worker-b", 60))
+        self.repo.release_lease("reap", "worker-a")
+        self.assertTrue(self.repo.acquire_lease("reap", "worker-b", 60))
+
+    def test_data_version_is_shared_between_connections(self):
+        other = SQLiteRepository(self.db_path)
+        try:
+            self.assertEqual(self.repo.get_data_version("u1"), 0)
+            self.assertEqual(other.bump_data_version("u1"), 1)
+            self.assertEqual(self.repo.get_data_version("u1"), 1)
+            self.assertIsNone(self.repo.get_data_version("missing"))
+        finally:
+            other.close()
+
+    def test_data_version_compare_and_set(self):
+        self.assertEqual(self.repo.bump_data_version("u1", expected=0), 1)
+        with self.assertRaises(VersionConflict) as raised:
+            with self.repo.transaction():
+                self.repo.bump_data_version("u1", expected=0)
+        self.assertEqual(raised.exception.actual, 1)
+        self.assertEqual(self.repo.get_data_version("u1"), 1)
+
+    def test_entry_changes_since_version(self):
+        tracker = MultiSessionTimeTracker("u1")
+        first = tracker.start_session("work")
+        second = tracker.start_session("email")
+        self.repo.save_entries("u1", [first], self.repo.bump_data_version("u1"))
+        self.repo.save_entries("u1", [second], self.repo.bump_data_version("u1"))
+
+        self.assertEqual([e.session_id for e in self.repo.get_entry_changes("u1", 0)],
+                         [first.session_id, second.session_id])
+        self.assertEqual([e.session_id for e in self.repo.get_entry_changes("u1", 1)], [second.session_id])
+        self.assertEqual(self.repo.get_entry_changes("u1", 2), [])
+        self.assertIsNone(self.repo.get_entry_changes("missing", 0))
+
+        # Deletions cannot be replayed as changes, so older versions must reload
+        self.repo.delete_entries("u1")
+        self.repo.bump_data_version("u1")
+        self.assertIsNone(self.repo.get_entry_changes("u1", 2))
+        self.assertEqual(self.repo.get_entry_changes("u1", 3), [])
+
+    def test_delete_user_cascades(self):
+        tracker = MultiSessionTimeTracker("u1")
+        self.repo.save_entries("u1", [tracker.start_session("work")])
+        self.repo.save_profile("u1", {"user_id": "u1"})
+
+        self.assertTrue(self.repo.delete_user("u1"))
+        self.assertEqual(self.repo.load_entries("u1"), [])
+        self.assertIsNone(self.repo.get_profile("u1"))
+        self.assertEqual(self.repo.count_users(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()